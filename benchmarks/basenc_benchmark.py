@@ -0,0 +1,167 @@
+"""
+Measure Basenc encode and decode throughput for every encoding, compare the base2 and Z85 codecs with their previous
+implementations, and compare the basenc command with GNU basenc on pipe input.
+
+    python benchmarks/basenc_benchmark.py --sizes 1048576 16777216 --pipe-size 67108864
+"""
+import argparse
+import base64
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import time
+from io import BytesIO
+from itertools import zip_longest
+
+from pygnuutils.basenc import Z85_VALID, Basenc, BasencStub, BasencConfig, Encoding, base2_lsbf_decode, base2_lsbf_encode, \
+    base2_msbf_decode, base2_msbf_encode, z85_decode, z85_encode
+
+
+class BenchmarkStub(BasencStub):
+    def __init__(self, data):
+        self.input_file = BytesIO(data)
+        self.stdout = BytesIO()
+
+    def open(self, file, mode):
+        return self.input_file
+
+    @property
+    def stdout_buffer(self):
+        return self.stdout
+
+
+def legacy_base2_msbf_encode(s):
+    return b''.join([f'{c:08b}'.encode() for c in s])
+
+
+def legacy_base2_lsbf_encode(s):
+    return b''.join([f'{c:08b}'[::-1].encode() for c in s])
+
+
+def legacy_base2_msbf_decode(s):
+    return bytes(map(lambda b: int(struct.pack('8B', *b), 2), zip_longest(*[iter(s)] * 8)))
+
+
+def legacy_base2_lsbf_decode(s):
+    return bytes(map(lambda b: int(struct.pack('8B', *b)[::-1], 2), zip_longest(*[iter(s)] * 8)))
+
+
+B85_ALPHABET = b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+-;<=>?@^_`{|}~'
+B85_TO_Z85 = bytes.maketrans(B85_ALPHABET, Z85_VALID)
+Z85_TO_B85 = bytes.maketrans(Z85_VALID, B85_ALPHABET)
+
+
+def legacy_z85_encode(s):
+    return base64.b85encode(s).translate(B85_TO_Z85)
+
+
+def legacy_z85_decode(s):
+    return base64.b85decode(s.translate(Z85_TO_B85))
+
+
+ENCODING_FLAGS = {
+    Encoding.BASE64: '--base64',
+    Encoding.BASE64_URL: '--base64url',
+    Encoding.BASE32: '--base32',
+    Encoding.BASE32_HEX: '--base32hex',
+    Encoding.BASE16: '--base16',
+    Encoding.BASE2_MSBF: '--base2msbf',
+    Encoding.BASE2_LSBF: '--base2lsbf',
+    Encoding.Z85: '--z85',
+}
+
+# Name, previous implementation, current implementation and, for decoders, the encoder of their input.
+LEGACY_FUNCTIONS = [
+    ('msbf encode', legacy_base2_msbf_encode, base2_msbf_encode, None),
+    ('lsbf encode', legacy_base2_lsbf_encode, base2_lsbf_encode, None),
+    ('msbf decode', legacy_base2_msbf_decode, base2_msbf_decode, base2_msbf_encode),
+    ('lsbf decode', legacy_base2_lsbf_decode, base2_lsbf_decode, base2_lsbf_encode),
+    ('z85 encode', legacy_z85_encode, z85_encode, None),
+    ('z85 decode', legacy_z85_decode, z85_decode, z85_encode),
+]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def measure_basenc(data, encoding, decode, ignore_garbage=False):
+    encoded = BenchmarkStub(data)
+    Basenc(encoded).run('input', BasencConfig(encoding=encoding))
+    stub = BenchmarkStub(encoded.stdout.getvalue() if decode else data)
+    config = BasencConfig(encoding=encoding, decode=decode, ignore_garbage=ignore_garbage)
+    elapsed, _ = timed(Basenc(stub).run, 'input', config)
+    return elapsed
+
+
+def measure_pipe(command, data):
+    """ Time `command` reading `data` from a pipe, process startup included. """
+    start = time.perf_counter()
+    process = subprocess.run(command, input=data, stdout=subprocess.PIPE, check=True)
+    return time.perf_counter() - start, process.stdout
+
+
+def compare_with_gnu(size, encodings):
+    gnu_basenc = shutil.which('basenc')
+    if gnu_basenc is None:
+        print('GNU basenc not found, skipping the pipe comparison')
+        return
+    # Z85 input has to be a multiple of 4 bytes.
+    data = os.urandom(size - size % 4)
+    print(f'{"size":>10} {"encoding":<12} {"GNU encode":>11} {"encode":>11} {"GNU decode":>11} {"decode":>11}  (MiB/s)')
+    for encoding in encodings:
+        flag = ENCODING_FLAGS[encoding]
+        gnu_encode, encoded = measure_pipe([gnu_basenc, flag], data)
+        encode, ours = measure_pipe([sys.executable, '-m', 'pygnuutils', 'basenc', flag], data)
+        assert ours == encoded
+        gnu_decode, _ = measure_pipe([gnu_basenc, flag, '-d'], encoded)
+        decode, decoded = measure_pipe([sys.executable, '-m', 'pygnuutils', 'basenc', flag, '-d'], encoded)
+        assert decoded == data
+        print(f'{len(data):>10} {encoding.name:<12} ' + ' '.join(
+            f'{len(data) / elapsed / 2 ** 20:>11.1f}' for elapsed in (gnu_encode, encode, gnu_decode, decode)
+        ), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1 << 20])
+    parser.add_argument('--encodings', nargs='+', choices=[e.name for e in Encoding], default=[e.name for e in Encoding])
+    parser.add_argument('--legacy-size', type=int, default=1 << 18, help='input size of the legacy functions')
+    parser.add_argument('--pipe-size', type=int, default=1 << 24, help='input size of the GNU basenc comparison')
+    args = parser.parse_args()
+
+    print(f'{"size":>10} {"encoding":<12} {"encode MiB/s":>14} {"decode MiB/s":>14} {"-i decode MiB/s":>16}')
+    for size in args.sizes:
+        # Z85 input has to be a multiple of 4 bytes.
+        size -= size % 4
+        data = os.urandom(size)
+        for encoding_name in args.encodings:
+            encoding = Encoding[encoding_name]
+            encode = measure_basenc(data, encoding, False)
+            decode = measure_basenc(data, encoding, True)
+            garbage = measure_basenc(data, encoding, True, ignore_garbage=True)
+            print(f'{size:>10} {encoding_name:<12} {size / encode / 2 ** 20:>14.1f} {size / decode / 2 ** 20:>14.1f} '
+                  f'{size / garbage / 2 ** 20:>16.1f}', flush=True)
+
+    print()
+    print(f'{"size":>10} {"codec":<12} {"legacy MiB/s":>14} {"current MiB/s":>14}')
+    args.legacy_size -= args.legacy_size % 4
+    data = os.urandom(args.legacy_size)
+    for name, legacy, current, encode in LEGACY_FUNCTIONS:
+        input_ = data if encode is None else encode(data)
+        legacy_elapsed, legacy_result = timed(legacy, input_)
+        current_elapsed, current_result = timed(current, input_)
+        assert legacy_result == current_result
+        print(f'{args.legacy_size:>10} {name:<12} {args.legacy_size / legacy_elapsed / 2 ** 20:>14.1f} '
+              f'{args.legacy_size / current_elapsed / 2 ** 20:>14.1f}', flush=True)
+
+    print()
+    compare_with_gnu(args.pipe_size, [Encoding[name] for name in args.encodings])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Measure Ls throughput and peak memory over synthetic trees, for every tree shape, output format and sort type.
+
+Shapes: `flat` is a single directory, `wide` a root of large directories, `deep` a tree of small directories about
+log2(entries / 4) levels deep, listed recursively. The full matrix up to 10M entries takes hours, select a part of it:
+
+    python benchmarks/ls_benchmark.py --entries 10000 100000 1000000 10000000 --shapes deep --formats LONG_FORMAT
+"""
+import argparse
+import math
+import time
+import tracemalloc
+
+from pygnuutils.ls import Ls, LsConfig, Formats, SortType
+from pygnuutils.synthetic import SyntheticLsStub
+
+# Stub parameters giving about `entries` entries. Entry counts of nested shapes vary with the seed, the entries
+# actually listed are counted.
+SHAPES = {
+    'flat': lambda entries: dict(fanout=entries, depth=1),
+    # The root and each of its fanout / 5 directories hold fanout entries.
+    'wide': lambda entries: dict(fanout=max(int(math.sqrt(entries * 5)), 1), depth=2, dir_ratio=0.2),
+    # Every directory holds 8 entries, 2 of them directories on average. Some branches end early, one more level than
+    # a complete binary tree of directories makes up for them.
+    'deep': lambda entries: dict(fanout=8, depth=max(round(math.log2(entries / 4 + 1)), 1), dir_ratio=0.25),
+}
+
+
+class BenchmarkStub(SyntheticLsStub):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.entries = 0
+
+    def listdir(self, path='.'):
+        names = super().listdir(path)
+        self.entries += len(names)
+        return names
+
+    def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+        pass
+
+    def setlocale(self, locale_setting=''):
+        super().setlocale('C.UTF-8')
+
+
+def run_ls(entries, shape, format_, sort_type):
+    stub = BenchmarkStub(uid_count=50, gid_count=10, **SHAPES[shape](entries))
+    config = LsConfig(format=format_, sort_type=sort_type, line_length=80, recursive=shape != 'flat',
+                      tabsize=0 if format_ in (Formats.LONG_FORMAT, Formats.ONE_PER_LINE) else 8)
+    Ls(stub).run(stub.root, config=config)
+    return stub.entries
+
+
+def measure(entries, shape, format_, sort_type, memory):
+    start = time.perf_counter()
+    listed = run_ls(entries, shape, format_, sort_type)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        run_ls(entries, shape, format_, sort_type)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return listed, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, nargs='+', default=[10000, 100000, 1000000, 10000000])
+    parser.add_argument('--shapes', nargs='+', choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument('--formats', nargs='+', choices=[f.name for f in Formats], default=[f.name for f in Formats])
+    parser.add_argument('--sorts', nargs='+', choices=[s.name for s in SortType], default=[s.name for s in SortType])
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    args = parser.parse_args()
+
+    print(f'{"entries":>10} {"shape":<6} {"format":<14} {"sort":<10} {"listed":>10} {"entries/s":>12} {"peak MiB":>10}')
+    for entries in args.entries:
+        for shape in args.shapes:
+            for format_name in args.formats:
+                for sort_name in args.sorts:
+                    listed, elapsed, peak = measure(entries, shape, Formats[format_name], SortType[sort_name],
+                                                    not args.no_memory)
+                    peak = '-' if peak is None else f'{peak / 2 ** 20:.1f}'
+                    print(f'{entries:>10} {shape:<6} {format_name:<14} {sort_name:<10} {listed:>10} '
+                          f'{listed / elapsed:>12.0f} {peak:>10}', flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@ import click
 
 from pygnuutils.cli.basename import cli as basename_cli
 from pygnuutils.cli.basenc import cli as basenc_cli
+from pygnuutils.cli.du import cli as du_cli
 from pygnuutils.cli.ls import cli as ls_cli
 from pygnuutils.cli.yes import cli as yes_cli
 
@@ -10,6 +11,7 @@ def main():
     cli_commands = click.CommandCollection(sources=[
         basename_cli,
         basenc_cli,
+        du_cli,
         ls_cli,
         yes_cli,
     ])
@@ -0,0 +1,282 @@
+import errno
+import os
+import posixpath
+import tarfile
+import time
+import zipfile
+from abc import ABCMeta, abstractmethod
+from functools import lru_cache
+from stat import S_IFBLK, S_IFCHR, S_IFDIR, S_IFIFO, S_IFLNK, S_IFMT, S_IFREG, S_IMODE, S_ISDIR, S_ISLNK
+
+from pygnuutils.ls import LsStub
+
+INDEX_CACHE_SIZE = 8
+MAX_SYMLINK_HOPS = 40
+TAR_FILE_TYPES = {
+    tarfile.DIRTYPE: S_IFDIR, tarfile.SYMTYPE: S_IFLNK, tarfile.FIFOTYPE: S_IFIFO, tarfile.CHRTYPE: S_IFCHR,
+    tarfile.BLKTYPE: S_IFBLK,
+}
+
+
+class ArchiveEntry:
+    __slots__ = ('mode', 'ino', 'nlink', 'uid', 'gid', 'size', 'mtime', 'rdev', 'linkname', 'children')
+
+    def __init__(self, mode, ino, uid, gid, size, mtime, rdev=0, linkname=''):
+        self.mode = mode
+        self.ino = ino
+        self.nlink = 1
+        self.uid = uid
+        self.gid = gid
+        self.size = size
+        self.mtime = mtime
+        self.rdev = rdev
+        self.linkname = linkname
+        self.children = {} if S_ISDIR(mode) else None
+
+
+class ArchiveIndex:
+    """
+    Path to member index of an archive, built once and then read only.
+
+    Keys are member paths relative to the archive root, without leading or trailing slashes (the root itself is ''),
+    the children of directories map their names to their keys. Directories that only appear as the parents of members
+    are added with the default owner and modification time.
+    """
+
+    def __init__(self, default_uid=0, default_gid=0, default_mtime=0):
+        self.default_uid = default_uid
+        self.default_gid = default_gid
+        self.default_mtime = default_mtime
+        self.entries = {'': ArchiveEntry(S_IFDIR | 0o755, 1, default_uid, default_gid, 0, default_mtime)}
+        self.users = {}
+        self.groups = {}
+
+    @staticmethod
+    def normalize(name):
+        return posixpath.normpath('/' + name)[1:].lstrip('/')
+
+    def add(self, name, mode, uid, gid, size, mtime, rdev=0, linkname=''):
+        key = self.normalize(name)
+        entry = self.entries.get(key)
+        if entry is None:
+            self._directory(posixpath.dirname(key)).children[posixpath.basename(key)] = key
+            self.entries[key] = ArchiveEntry(mode, len(self.entries) + 1, uid, gid, size, mtime, rdev, linkname)
+            return
+        # Archives may hold several versions of a member, the last one wins.
+        children = entry.children
+        entry.__init__(mode, entry.ino, uid, gid, size, mtime, rdev, linkname)
+        if children is not None and entry.children is not None:
+            entry.children = children
+
+    def add_hardlink(self, name, target):
+        entry = self.entries.get(self.normalize(target))
+        if entry is None or entry.children is not None:
+            self.add(name, S_IFREG | 0o644, self.default_uid, self.default_gid, 0, self.default_mtime)
+            return
+        key = self.normalize(name)
+        if key not in self.entries:
+            self._directory(posixpath.dirname(key)).children[posixpath.basename(key)] = key
+        self.entries[key] = entry
+        entry.nlink += 1
+
+    def finish(self):
+        for key, entry in self.entries.items():
+            if entry.children is not None:
+                entry.nlink = 2
+            if key:
+                parent = self.entries[posixpath.dirname(key)]
+                if entry.children is not None and parent is not entry:
+                    parent.nlink += 1
+        return self
+
+    def _directory(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self._directory(posixpath.dirname(key)).children[posixpath.basename(key)] = key
+            entry = ArchiveEntry(S_IFDIR | 0o755, len(self.entries) + 1, self.default_uid, self.default_gid, 0,
+                                 self.default_mtime)
+            self.entries[key] = entry
+        elif entry.children is None:
+            raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), key)
+        return entry
+
+
+@lru_cache(maxsize=INDEX_CACHE_SIZE)
+def _load_index(stub_type, path, size, mtime_ns):
+    return stub_type.build_index(path)
+
+
+class ArchiveLsStub(LsStub, metaclass=ABCMeta):
+    """
+    Read only stub listing the members of an archive below `root`, as if the archive was extracted there.
+
+    The archive is indexed once, then `listdir`, `stat` and `readlink` are dictionary lookups. Indexes of archives
+    given by path are cached, keyed by their size and modification time, and shared between stubs.
+    """
+
+    def __init__(self, archive, root='/'):
+        self.root = posixpath.normpath(root)
+        self.prefix = self.root if self.root.endswith(self.sep) else self.root + self.sep
+        if isinstance(archive, (str, bytes, os.PathLike)):
+            archive = os.fsdecode(os.path.realpath(archive))
+            stat = os.stat(archive)
+            self.index = _load_index(type(self), archive, stat.st_size, stat.st_mtime_ns)
+        else:
+            self.index = self.build_index(archive)
+
+    @classmethod
+    @abstractmethod
+    def build_index(cls, archive):
+        """ Return the ArchiveIndex of `archive`, a path or an open file object. """
+
+    @property
+    def sep(self):
+        return posixpath.sep
+
+    def join(self, path, *paths):
+        return posixpath.join(path, *paths)
+
+    def abspath(self, path):
+        return posixpath.normpath(self.join(self.root, path))
+
+    def isabs(self, path):
+        return posixpath.isabs(path)
+
+    def dirname(self, path):
+        return posixpath.dirname(path)
+
+    def basename(self, path):
+        return posixpath.basename(path)
+
+    def listdir(self, path='.'):
+        entry = self.index.entries[self._resolve(path)]
+        if entry.children is None:
+            raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+        return list(entry.children)
+
+    def stat(self, path, dir_fd=None, follow_symlinks=True):
+        entry = self.index.entries[self._resolve(path, follow_symlinks)]
+        blocks = (entry.size + 511) // 512
+        return os.stat_result(
+            (entry.mode, entry.ino, 0, entry.nlink, entry.uid, entry.gid, entry.size, entry.mtime, entry.mtime,
+             entry.mtime),
+            {
+                'st_atime': float(entry.mtime), 'st_mtime': float(entry.mtime), 'st_ctime': float(entry.mtime),
+                'st_atime_ns': int(entry.mtime * 10 ** 9), 'st_mtime_ns': int(entry.mtime * 10 ** 9),
+                'st_ctime_ns': int(entry.mtime * 10 ** 9), 'st_blocks': blocks, 'st_blksize': 4096,
+                'st_rdev': entry.rdev,
+            }
+        )
+
+    def readlink(self, path, dir_fd=None):
+        entry = self.index.entries[self._resolve(path, follow_symlinks=False)]
+        if not S_ISLNK(entry.mode):
+            raise OSError(errno.EINVAL, os.strerror(errno.EINVAL), path)
+        return entry.linkname
+
+    def getuser(self, st_uid):
+        if st_uid in self.index.users:
+            return self.index.users[st_uid]
+        try:
+            return super().getuser(st_uid)
+        except KeyError:
+            return str(st_uid)
+
+    def getgroup(self, st_gid):
+        if st_gid in self.index.groups:
+            return self.index.groups[st_gid]
+        try:
+            return super().getgroup(st_gid)
+        except KeyError:
+            return str(st_gid)
+
+    def _resolve(self, path, follow_symlinks=True):
+        """ Return the index key of `path`, following symbolic links in all but its last component. """
+        path = self.join(self.root, path)
+        if path != self.root and not path.startswith(self.prefix):
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        pending = path[len(self.prefix):].split(self.sep)[::-1]
+        # Keys of the directories walked down from the root, every step is a lookup in the children of the last one.
+        resolved = ['']
+        hops = 0
+        while pending:
+            name = pending.pop()
+            if name == '..':
+                # The parent of the root is the root.
+                del resolved[max(len(resolved) - 1, 1):]
+                continue
+            if name in ('', '.'):
+                continue
+            key = self._child(resolved[-1], name, path)
+            entry = self.index.entries[key]
+            if S_ISLNK(entry.mode) and (pending or follow_symlinks):
+                hops += 1
+                if hops > MAX_SYMLINK_HOPS:
+                    raise OSError(errno.ELOOP, os.strerror(errno.ELOOP), path)
+                if entry.linkname.startswith(self.sep):
+                    del resolved[1:]
+                pending.extend(reversed(entry.linkname.split(self.sep)))
+                continue
+            if pending and entry.children is None:
+                raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+            resolved.append(key)
+        return resolved[-1]
+
+    def _child(self, key, name, path):
+        child = self.index.entries[key].children.get(name)
+        if child is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        return child
+
+
+class ZipLsStub(ArchiveLsStub):
+    """ List the members of a zip archive, indexed from its central directory. """
+
+    @classmethod
+    def build_index(cls, archive):
+        with zipfile.ZipFile(archive) as zip_file:
+            if isinstance(archive, str):
+                # Zip members have no owner, show them as owned by the owner of the archive.
+                stat = os.stat(archive)
+                index = ArchiveIndex(stat.st_uid, stat.st_gid, stat.st_mtime)
+            else:
+                index = ArchiveIndex()
+            for info in zip_file.infolist():
+                mode = info.external_attr >> 16 if info.create_system == 3 else 0
+                if info.is_dir():
+                    mode = S_IFDIR | (S_IMODE(mode) or 0o755)
+                elif not S_IFMT(mode):
+                    mode = S_IFREG | (S_IMODE(mode) or 0o644)
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                linkname = zip_file.read(info).decode(errors='surrogateescape') if S_ISLNK(mode) else ''
+                index.add(info.filename, mode, index.default_uid, index.default_gid, info.file_size, mtime,
+                          linkname=linkname)
+        return index.finish()
+
+
+class TarLsStub(ArchiveLsStub):
+    """ List the members of a (possibly compressed) tar archive, indexed in a single sequential scan. """
+
+    @classmethod
+    def build_index(cls, archive):
+        if isinstance(archive, str):
+            stat = os.stat(archive)
+            index = ArchiveIndex(stat.st_uid, stat.st_gid, stat.st_mtime)
+            tar_file = tarfile.open(archive, mode='r|*')
+        else:
+            index = ArchiveIndex()
+            tar_file = tarfile.open(fileobj=archive, mode='r|*')
+        with tar_file:
+            for member in tar_file:
+                if member.uname:
+                    index.users.setdefault(member.uid, member.uname)
+                if member.gname:
+                    index.groups.setdefault(member.gid, member.gname)
+                if member.islnk():
+                    index.add_hardlink(member.name, member.linkname)
+                    continue
+                rdev = os.makedev(member.devmajor, member.devminor) if member.isdev() else 0
+                index.add(member.name, TAR_FILE_TYPES.get(member.type, S_IFREG) | (member.mode & 0o7777), member.uid,
+                          member.gid, len(member.linkname) if member.issym() else member.size, member.mtime, rdev,
+                          member.linkname)
+        return index.finish()
@@ -1,11 +1,18 @@
 import base64 as b64
+import io
+import mmap
+import os
 import struct
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
 from dataclasses import dataclass
 from enum import Enum, auto
-from itertools import zip_longest
+from functools import lru_cache
+from stat import S_ISREG
 
-from pygnuutils.exceptions import BasencDecodeError
+from pygnuutils.exceptions import BasencDecodeError, BasencEncodeError
 
 BASE64_VALID = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
 BASE64_URL_VALID = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
@@ -19,19 +26,28 @@ BASE64_URL_DECODE_TRANSLATION = bytes.maketrans(b'-_', b'+/')
 BASE32_HEX_ENCODE_TRANSLATION = bytes.maketrans(BASE32_VALID, BASE32_HEX_VALID)
 BASE32_HEX_DECODE_TRANSLATION = bytes.maketrans(BASE32_HEX_VALID, BASE32_VALID)
 
-Z85_ENCODE_TRANSLATION = bytes.maketrans(
-    b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+-;<=>?@^_`{|}~', Z85_VALID
-)
+Z85_DIGITS_TRANSLATION = bytes.maketrans(bytes(range(85)), Z85_VALID)
+Z85_VALUES_TRANSLATION = bytes.maketrans(Z85_VALID, bytes(range(85)))
+# Z85 words are spread over the 64 bit slots of a single int and all divided by 85 at once: for words below 2 ** 32,
+# w // 85 == w * Z85_MAGIC >> Z85_SHIFT (Z85_MAGIC * 85 - 2 ** Z85_SHIFT < 2 ** (Z85_SHIFT - 32)) and the products
+# still fit in their slot.
+Z85_SHIFT = 38
+Z85_MAGIC = -(-(1 << Z85_SHIFT) // 85)
 
-Z85_DECODE_TRANSLATION = bytes.maketrans(
-    Z85_VALID, b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+-;<=>?@^_`{|}~'
-)
+DEC_BLOCKSIZE = 4200
+ENC_BLOCKSIZE = 1024 * 3 * 10
+MMAP_BLOCKSIZE = 1 << 16
+# Bytes of input converted at once by the Z85 codec, larger ints fall out of the CPU caches.
+Z85_BLOCKSIZE = 1 << 14
+PARALLEL_BLOCKSIZE = 1 << 20
 
+# Maps every byte to the byte with the same bits in reverse order, turning msbf data into lsbf data and back.
+BIT_REVERSE_TRANSLATION = bytes(int(f'{i:08b}'[::-1], 2) for i in range(256))
 
-def grouper(iterable, n, fillvalue=None):
-    """ Collect data into non-overlapping fixed-length chunks or blocks. """
-    args = [iter(iterable)] * n
-    return zip_longest(*args, fillvalue=fillvalue)
+
+def garbage_bytes(valid):
+    """ All the bytes that are neither in `valid` nor padding, to delete with `bytes.translate`. """
+    return bytes(b for b in range(256) if b not in valid and b != ord('='))
 
 
 def b32hex_encode(s):
@@ -41,15 +57,43 @@ def b32hex_encode(s):
 
 
 def base2_msbf_encode(s):
-    return b''.join([f'{c:08b}'.encode() for c in s])
+    # Converting between ints and base 2 strings takes linear time, unlike other bases.
+    return format(int.from_bytes(s, 'big'), f'0{len(s) * 8}b').encode() if s else b''
 
 
 def base2_lsbf_encode(s):
-    return b''.join([f'{c:08b}'[::-1].encode() for c in s])
+    return base2_msbf_encode(bytes(s).translate(BIT_REVERSE_TRANSLATION))
+
+
+@lru_cache(maxsize=16)
+def _z85_slot_masks(words):
+    """ Masks of the quotient bits and of the bits above 32 of `words` slots. """
+    slots = int.from_bytes(b'\xff' * 8 * words, 'little')
+    quotients = int.from_bytes(((1 << 26) - 1).to_bytes(8, 'little') * words, 'little')
+    return quotients, slots ^ int.from_bytes(b'\xff\xff\xff\xff\x00\x00\x00\x00' * words, 'little')
+
+
+def _z85_encode_block(s):
+    words = len(s) // 4
+    # Big endian words to little endian slots.
+    slots = bytearray(8 * words)
+    slots[0::8], slots[1::8], slots[2::8], slots[3::8] = s[3::4], s[2::4], s[1::4], s[0::4]
+    value = int.from_bytes(slots, 'little')
+    quotient_mask, _ = _z85_slot_masks(words)
+    digits = bytearray(5 * words)
+    for i in range(4, 0, -1):
+        quotient = (value * Z85_MAGIC >> Z85_SHIFT) & quotient_mask
+        digits[i::5] = (value - quotient * 85).to_bytes(8 * words, 'little')[0::8]
+        value = quotient
+    digits[0::5] = value.to_bytes(8 * words, 'little')[0::8]
+    return digits.translate(Z85_DIGITS_TRANSLATION)
 
 
 def z85_encode(s):
-    return b64.b85encode(s).translate(Z85_ENCODE_TRANSLATION)
+    if len(s) % 4:
+        raise ValueError('z85 input length must be a multiple of 4')
+    s = bytes(s)
+    return b''.join([_z85_encode_block(s[i:i + Z85_BLOCKSIZE]) for i in range(0, len(s), Z85_BLOCKSIZE)])
 
 
 def base64_url_decode(s):
@@ -64,15 +108,37 @@ def b32hex_decode(s):
 
 
 def base2_msbf_decode(s):
-    return bytes(map(lambda b: int(struct.pack('8B', *b), 2), grouper(s, 8)))
+    # int() would also accept signs, underscores, whitespace and a 0b prefix.
+    if len(s) % 8 or s.translate(None, BASE2_VALID):
+        raise ValueError('invalid base2 input')
+    return int(s, 2).to_bytes(len(s) // 8, 'big') if s else b''
 
 
 def base2_lsbf_decode(s):
-    return bytes(map(lambda b: int(struct.pack('8B', *b)[::-1], 2), grouper(s, 8)))
+    return base2_msbf_decode(s).translate(BIT_REVERSE_TRANSLATION)
+
+
+def _z85_decode_block(s):
+    words = len(s) // 5
+    slots = bytearray(8 * words)
+    value = 0
+    for i in range(5):
+        slots[0::8] = s[i::5]
+        value = value * 85 + int.from_bytes(slots, 'little')
+    if value & _z85_slot_masks(words)[1]:
+        raise ValueError('z85 word out of range')
+    slots = value.to_bytes(8 * words, 'little')
+    decoded = bytearray(4 * words)
+    decoded[0::4], decoded[1::4], decoded[2::4], decoded[3::4] = slots[3::8], slots[2::8], slots[1::8], slots[0::8]
+    return bytes(decoded)
 
 
 def z85_decode(s):
-    return b64.b85decode(s.translate(Z85_DECODE_TRANSLATION))
+    if len(s) % 5 or s.translate(None, Z85_VALID):
+        raise ValueError('invalid z85 input')
+    s = s.translate(Z85_VALUES_TRANSLATION)
+    block_size = Z85_BLOCKSIZE // 4 * 5
+    return b''.join([_z85_decode_block(s[i:i + block_size]) for i in range(0, len(s), block_size)])
 
 
 class Encoding(Enum):
@@ -86,6 +152,229 @@ class Encoding(Enum):
     Z85 = auto()
 
 
+BASE_ENCODES = {
+    Encoding.BASE64: b64.standard_b64encode,
+    Encoding.BASE64_URL: b64.urlsafe_b64encode,
+    Encoding.BASE32: b64.b32encode,
+    Encoding.BASE32_HEX: b32hex_encode,
+    Encoding.BASE16: b64.b16encode,
+    Encoding.BASE2_MSBF: base2_msbf_encode,
+    Encoding.BASE2_LSBF: base2_lsbf_encode,
+    Encoding.Z85: z85_encode,
+}
+
+BASE_DECODES = {
+    Encoding.BASE64: lambda s: b64.b64decode(s, validate=True),
+    Encoding.BASE64_URL: base64_url_decode,
+    Encoding.BASE32: b64.b32decode,
+    Encoding.BASE32_HEX: b32hex_decode,
+    Encoding.BASE16: b64.b16decode,
+    Encoding.BASE2_MSBF: base2_msbf_decode,
+    Encoding.BASE2_LSBF: base2_lsbf_decode,
+    Encoding.Z85: z85_decode,
+}
+
+# Number of input bytes that encode independently of their neighbours.
+ENCODE_QUANTUM_SIZES = {
+    Encoding.BASE64: 3,
+    Encoding.BASE64_URL: 3,
+    Encoding.BASE32: 5,
+    Encoding.BASE32_HEX: 5,
+    Encoding.BASE16: 1,
+    Encoding.BASE2_MSBF: 1,
+    Encoding.BASE2_LSBF: 1,
+    Encoding.Z85: 4,
+}
+
+# Number of encoded bytes that decode independently of their neighbours.
+QUANTUM_SIZES = {
+    Encoding.BASE64: 4,
+    Encoding.BASE64_URL: 4,
+    Encoding.BASE32: 8,
+    Encoding.BASE32_HEX: 8,
+    Encoding.BASE16: 2,
+    Encoding.BASE2_MSBF: 8,
+    Encoding.BASE2_LSBF: 8,
+    Encoding.Z85: 5,
+}
+
+GARBAGE_BYTES = {
+    Encoding.BASE64: garbage_bytes(BASE64_VALID),
+    Encoding.BASE64_URL: garbage_bytes(BASE64_URL_VALID),
+    Encoding.BASE32: garbage_bytes(BASE32_VALID),
+    Encoding.BASE32_HEX: garbage_bytes(BASE32_HEX_VALID),
+    Encoding.BASE16: garbage_bytes(BASE16_VALID),
+    Encoding.BASE2_MSBF: garbage_bytes(BASE2_VALID),
+    Encoding.BASE2_LSBF: garbage_bytes(BASE2_VALID),
+    Encoding.Z85: garbage_bytes(Z85_VALID),
+}
+
+
+def wrap_lines(buffer, wrap_column, current_column=0):
+    """ Break `buffer`, starting at `current_column`, into lines. Return the wrapped data and the column it ends at. """
+    if not wrap_column:
+        return buffer, 0
+
+    # The first line completes the line already started.
+    first_line_end = (wrap_column - current_column) % wrap_column
+    if len(buffer) < first_line_end:
+        return buffer, current_column + len(buffer)
+    full_lines_end = len(buffer) - (len(buffer) - first_line_end) % wrap_column
+    lines = [buffer[:first_line_end]] if current_column else []
+    lines.extend([buffer[i:i + wrap_column] for i in range(first_line_end, full_lines_end, wrap_column)])
+    lines.append(buffer[full_lines_end:])
+    return b'\n'.join(lines), len(buffer) - full_lines_end
+
+
+def _checked_encode(base_encode, data):
+    try:
+        return base_encode(data)
+    except ValueError as e:
+        raise BasencEncodeError from e
+
+
+def _encode_block(encoding, data, wrap_column, current_column):
+    # Runs in the worker processes of parallel runs, everything it uses has to be picklable or module level.
+    return wrap_lines(_checked_encode(BASE_ENCODES[encoding], data), wrap_column, current_column)[0]
+
+
+def _decode_block(encoding, data):
+    try:
+        return BASE_DECODES[encoding](data)
+    except (ValueError, struct.error) as e:
+        raise BasencDecodeError from e
+
+
+class IncrementalDecoder:
+    """
+    Decode `encoding` data fed in chunks of any size.
+
+    Line breaks (or all garbage, with `ignore_garbage`) are deleted from every chunk, the aligned part of what is left
+    is decoded in one call and the trailing partial quantum is kept for the next chunk.
+    """
+
+    def __init__(self, encoding=Encoding.BASE64, ignore_garbage=False):
+        self.base_decode = BASE_DECODES[encoding]
+        self.quantum_size = QUANTUM_SIZES[encoding]
+        self.delete = GARBAGE_BYTES[encoding] if ignore_garbage else b'\n'
+        self.pending = b''
+
+    def decode(self, data, final=False):
+        """ Decode the complete quanta of the data fed so far, `final` marks the end of the input. """
+        data = self.split(data, final)
+        if not data:
+            return b''
+        try:
+            return self.base_decode(data)
+        except (ValueError, struct.error) as e:
+            raise BasencDecodeError from e
+
+    def split(self, data, final=False):
+        """ Like `decode`, but return the complete quanta without decoding them. """
+        # bytes() of a bytes object is the object itself, other buffers (like views of a read buffer) are copied once.
+        data = bytes(data).translate(None, self.delete)
+        if self.pending:
+            data = self.pending + data
+        end = len(data) if final else len(data) - len(data) % self.quantum_size
+        self.pending = data[end:]
+        return data[:end] if end != len(data) else data
+
+    def reset(self):
+        self.pending = b''
+
+
+def encoded_size(size, encoding=Encoding.BASE64, wrap_column=0):
+    """ Size of the encoding of `size` bytes, line breaks included, to allocate the buffers of `encode_into`. """
+    quantum_size = ENCODE_QUANTUM_SIZES[encoding]
+    size = -(-size // quantum_size) * QUANTUM_SIZES[encoding]
+    return size + -(-size // wrap_column) if wrap_column else size
+
+
+def encode(data, encoding=Encoding.BASE64, wrap_column=0):
+    """
+    Encode the bytes-like `data`, with `wrap_column` the result is the same as the output of basenc. Raise
+    BasencEncodeError if the encoding doesn't accept its length (Z85 data must be a multiple of 4 bytes).
+    """
+    encoded, current_column = wrap_lines(_checked_encode(BASE_ENCODES[encoding], data), wrap_column)
+    return encoded + b'\n' if current_column else encoded
+
+
+def decode(data, encoding=Encoding.BASE64, ignore_garbage=False):
+    """ Decode the bytes-like `data`, raise BasencDecodeError if it is invalid. """
+    return IncrementalDecoder(encoding, ignore_garbage).decode(data, final=True)
+
+
+def _slices(data, block_size):
+    data = memoryview(data)
+    return (data[i:i + block_size] for i in range(0, len(data), block_size))
+
+
+def _write_into(chunks, buffer):
+    """ Write the successive `chunks` into `buffer`, return the number of bytes written. """
+    out = memoryview(buffer)
+    position = 0
+    for chunk in chunks:
+        end = position + len(chunk)
+        if end > len(out):
+            raise ValueError(f'buffer too small, more than {len(out)} bytes needed')
+        out[position:end] = chunk
+        position = end
+    return position
+
+
+def encode_into(data, buffer, encoding=Encoding.BASE64, wrap_column=0):
+    """
+    Like `encode`, but write into the writable bytes-like `buffer`, return the number of bytes written. The data is
+    encoded block by block straight into the buffer, which must hold `encoded_size` bytes.
+    """
+    size = encoded_size(len(data), encoding, wrap_column)
+    if size > len(memoryview(buffer)):
+        raise ValueError(f'buffer too small, {size} bytes needed')
+    return _write_into(iterencode(_slices(data, ENC_BLOCKSIZE), encoding, wrap_column), buffer)
+
+
+def decode_into(data, buffer, encoding=Encoding.BASE64, ignore_garbage=False):
+    """
+    Like `decode`, but write into the writable bytes-like `buffer`, return the number of bytes written. The data is
+    decoded block by block straight into the buffer, raise ValueError if it doesn't fit.
+    """
+    return _write_into(iterdecode(_slices(data, DEC_BLOCKSIZE), encoding, ignore_garbage), buffer)
+
+
+def iterencode(chunks, encoding=Encoding.BASE64, wrap_column=0):
+    """ Encode an iterable of bytes-like chunks of any size, yielding the encoded data as it becomes available. """
+    base_encode = BASE_ENCODES[encoding]
+    quantum_size = ENCODE_QUANTUM_SIZES[encoding]
+    pending = b''
+    current_column = 0
+    for chunk in chunks:
+        data = pending + chunk if pending else bytes(chunk)
+        end = len(data) - len(data) % quantum_size
+        pending = data[end:]
+        if end:
+            encoded, current_column = wrap_lines(_checked_encode(base_encode, data[:end]), wrap_column, current_column)
+            yield encoded
+    encoded = b''
+    if pending:
+        encoded, current_column = wrap_lines(_checked_encode(base_encode, pending), wrap_column, current_column)
+    if current_column:
+        encoded += b'\n'
+    if encoded:
+        yield encoded
+
+
+def iterdecode(chunks, encoding=Encoding.BASE64, ignore_garbage=False):
+    """ Decode an iterable of bytes-like chunks of any size, yielding the decoded data as it becomes available. """
+    decoder = IncrementalDecoder(encoding, ignore_garbage)
+    for chunk in chunks:
+        decoded = decoder.decode(chunk)
+        if decoded:
+            yield decoded
+    decoded = decoder.decode(b'', final=True)
+    if decoded:
+        yield decoded
+
+
 class BasencStub:
     @property
     def stdin_buffer(self):
@@ -101,6 +390,19 @@ class BasencStub:
     def close(self, fd):
         fd.close()
 
+    def mmap(self, fd):
+        """ Map the regular file `fd` read only, return None if it can't be mapped (pipes, ttys, empty files). """
+        try:
+            if not S_ISREG(os.fstat(fd.fileno()).st_mode):
+                return None
+            return mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, io.UnsupportedOperation):
+            return None
+
+    def executor(self, max_workers):
+        """ Pool running the blocks of parallel runs, binascii holds the GIL so threads wouldn't run them in parallel. """
+        return ProcessPoolExecutor(max_workers)
+
 
 @dataclass
 class BasencConfig:
@@ -108,127 +410,161 @@ class BasencConfig:
     decode: bool = False
     ignore_garbage: bool = False
     wrap_column: int = 76
+    # Encoding blocks are rounded down to a multiple of the encoding quantum.
+    encode_block_size: int = ENC_BLOCKSIZE
+    decode_block_size: int = DEC_BLOCKSIZE
+    # Regular files are mapped to memory and processed in blocks of this size, 0 always reads them instead.
+    mmap_block_size: int = MMAP_BLOCKSIZE
+    # Number of processes encoding or decoding blocks of parallel_block_size bytes, 0 for one per CPU, 1 to not use any.
+    # This process still reads, pickles and writes every block (and splits decoded input on quanta), which bounds the
+    # speedup.
+    jobs: int = 1
+    parallel_block_size: int = PARALLEL_BLOCKSIZE
 
 
 class Basenc:
-    DEC_BLOCKSIZE = 4200
-    ENC_BLOCKSIZE = 1024 * 3 * 10
+    DEC_BLOCKSIZE = DEC_BLOCKSIZE
+    ENC_BLOCKSIZE = ENC_BLOCKSIZE
 
     def __init__(self, stub=None):
         self.stub = BasencStub() if stub is None else stub
         self.config = BasencConfig()
-        self.base_encodes = {
-            Encoding.BASE64: b64.standard_b64encode,
-            Encoding.BASE64_URL: b64.urlsafe_b64encode,
-            Encoding.BASE32: b64.b32encode,
-            Encoding.BASE32_HEX: b32hex_encode,
-            Encoding.BASE16: b64.b16encode,
-            Encoding.BASE2_MSBF: base2_msbf_encode,
-            Encoding.BASE2_LSBF: base2_lsbf_encode,
-            Encoding.Z85: z85_encode,
-        }
-        self.is_bases = {
-            Encoding.BASE64: lambda char: char in BASE64_VALID,
-            Encoding.BASE64_URL: lambda char: char in BASE64_URL_VALID,
-            Encoding.BASE32: lambda char: char in BASE32_VALID,
-            Encoding.BASE32_HEX: lambda char: char in BASE32_HEX_VALID,
-            Encoding.BASE16: lambda char: char in BASE16_VALID,
-            Encoding.BASE2_MSBF: lambda char: char in BASE2_VALID,
-            Encoding.BASE2_LSBF: lambda char: char in BASE2_VALID,
-            Encoding.Z85: lambda char: char in Z85_VALID,
-        }
-        self.base_decodes = {
-            Encoding.BASE64: lambda s: b64.b64decode(s, validate=True),
-            Encoding.BASE64_URL: base64_url_decode,
-            Encoding.BASE32: b64.b32decode,
-            Encoding.BASE32_HEX: b32hex_decode,
-            Encoding.BASE16: b64.b16decode,
-            Encoding.BASE2_MSBF: base2_msbf_decode,
-            Encoding.BASE2_LSBF: base2_lsbf_decode,
-            Encoding.Z85: z85_decode,
-        }
+        self.base_encodes = dict(BASE_ENCODES)
 
     def run(self, file, config=None):
         if config is not None:
             self.config = config
+        if self.config.jobs < 0:
+            raise ValueError(f'invalid number of jobs: {self.config.jobs}')
         if file == '-':
             input_fd = self.stub.stdin_buffer
         else:
             input_fd = self.stub.open(file, 'rb')
 
-        if self.config.decode:
-            self._do_decode(input_fd)
-        else:
-            self._do_encode(input_fd)
-
-        if file != '-':
-            self.stub.close(input_fd)
-
-    def _do_decode(self, input_fd):
-        while True:
-            prev_in_buf_len = 0
-            in_buf = input_fd.read(self.DEC_BLOCKSIZE)
-            if self.config.ignore_garbage:
-                in_buf = bytes([b for b in in_buf if chr(b) == '=' or self._is_base(b.to_bytes(1, 'big'))])
-            while len(in_buf) != prev_in_buf_len and len(in_buf) != self.DEC_BLOCKSIZE:
-                prev_in_buf_len = len(in_buf)
-                in_buf += input_fd.read(self.DEC_BLOCKSIZE - prev_in_buf_len)
-
+        mapping = None
+        if file != '-' and self.config.mmap_block_size:
+            mapping = self.stub.mmap(input_fd)
+        try:
+            if self.config.jobs != 1:
+                self._do_parallel(input_fd, mapping)
+            elif self.config.decode:
+                self._do_decode(input_fd, mapping)
+            else:
+                self._do_encode(input_fd, mapping)
+        finally:
             try:
-                self.stub.stdout_buffer.write(self._base_decode(in_buf))
-            except (ValueError, struct.error) as e:
-                raise BasencDecodeError from e
-
-            if len(in_buf) != self.DEC_BLOCKSIZE:
-                break
-
-    def _do_encode(self, input_fd):
+                # The block generators are closed by now, so no view of the mapping is left.
+                if mapping is not None:
+                    mapping.close()
+            finally:
+                if file != '-':
+                    self.stub.close(input_fd)
+
+    def _do_decode(self, input_fd, mapping=None):
+        decoder = IncrementalDecoder(self.config.encoding, self.config.ignore_garbage)
+        block_size = self.config.decode_block_size if mapping is None else self.config.mmap_block_size
+        with closing(self._read_blocks(input_fd, block_size, mapping)) as blocks:
+            for in_buf in blocks:
+                self.stub.stdout_buffer.write(decoder.decode(in_buf))
+        self.stub.stdout_buffer.write(decoder.decode(b'', final=True))
+
+    def _do_encode(self, input_fd, mapping=None):
         current_column = 0
-        while True:
-            prev_in_buf_len = 0
-            in_buf = input_fd.read(self.ENC_BLOCKSIZE)
-            while len(in_buf) != prev_in_buf_len and len(in_buf) != self.ENC_BLOCKSIZE:
-                prev_in_buf_len = len(in_buf)
-                in_buf += input_fd.read(self.ENC_BLOCKSIZE - prev_in_buf_len)
-            current_column = self._wrap_write(self._base_encode(in_buf), current_column)
-            if len(in_buf) != self.ENC_BLOCKSIZE:
-                break
+        quantum_size = ENCODE_QUANTUM_SIZES[self.config.encoding]
+        block_size = self.config.encode_block_size if mapping is None else self.config.mmap_block_size
+        block_size = max(block_size - block_size % quantum_size, quantum_size)
+        with closing(self._read_blocks(input_fd, block_size, mapping)) as blocks:
+            for in_buf in blocks:
+                current_column = self._wrap_write(self._base_encode(in_buf), current_column)
 
         if self.config.wrap_column and current_column:
             self.stub.stdout_buffer.write(b'\n')
 
-    def _base_encode(self, in_buf):
-        return self.base_encodes[self.config.encoding](in_buf)
+    def _do_parallel(self, input_fd, mapping=None):
+        jobs = self.config.jobs or os.cpu_count() or 1
+        last_output = b''
+        with self.stub.executor(jobs) as executor:
+            # Keep every worker busy while bounding the blocks held in memory.
+            pending = deque()
+            with closing(self._parallel_calls(input_fd, mapping)) as calls:
+                for call in calls:
+                    pending.append(executor.submit(*call))
+                    if len(pending) > 2 * jobs:
+                        last_output = self._write_result(pending.popleft(), last_output)
+            while pending:
+                last_output = self._write_result(pending.popleft(), last_output)
+
+        if not self.config.decode and self.config.wrap_column and last_output and not last_output.endswith(b'\n'):
+            self.stub.stdout_buffer.write(b'\n')
 
-    def _is_base(self, char):
-        return self.is_bases[self.config.encoding](char)
+    def _write_result(self, future, last_output):
+        output = future.result()
+        self.stub.stdout_buffer.write(output)
+        return output or last_output
 
-    def _base_decode(self, in_buf):
-        return self.base_decodes[self.config.encoding](in_buf)
+    def _parallel_calls(self, input_fd, mapping=None):
+        """ Yield the calls of every block of the input, aligned on quanta so blocks are processed independently. """
+        encoding = self.config.encoding
+        block_size = self.config.parallel_block_size
+        if self.config.decode:
+            decoder = IncrementalDecoder(encoding, self.config.ignore_garbage)
+            with closing(self._read_blocks(input_fd, block_size, mapping)) as blocks:
+                for in_buf in blocks:
+                    yield _decode_block, encoding, decoder.split(in_buf)
+            yield _decode_block, encoding, decoder.split(b'', final=True)
+            return
+
+        wrap_column = self.config.wrap_column
+        quantum_size = ENCODE_QUANTUM_SIZES[encoding]
+        block_size = max(block_size - block_size % quantum_size, quantum_size)
+        # Only the last block can be partial, the others encode to the same length, which gives the column every block
+        # starts at.
+        encoded_block_size = block_size // quantum_size * QUANTUM_SIZES[encoding]
+        with closing(self._read_blocks(input_fd, block_size, mapping)) as blocks:
+            for i, in_buf in enumerate(blocks):
+                current_column = i * encoded_block_size % wrap_column if wrap_column else 0
+                yield _encode_block, encoding, bytes(in_buf), wrap_column, current_column
+
+    def _read_blocks(self, input_fd, block_size, mapping=None):
+        """
+        Yield views of the successive blocks of the input, straight from `mapping` if the file is mapped. Views of the
+        mapping are released once the next block is requested or the generator is closed.
+        """
+        if mapping is not None:
+            with memoryview(mapping) as view:
+                for i in range(0, len(view), block_size):
+                    with view[i:i + block_size] as block:
+                        yield block
+            return
+        in_buf = memoryview(bytearray(block_size))
+        while True:
+            size = self._read_block(input_fd, in_buf)
+            yield in_buf[:size]
+            if size != block_size:
+                break
 
-    def _wrap_write(self, buffer, current_column):
-        if not self.config.wrap_column:
-            self.stub.stdout_buffer.write(buffer)
-            return 0
+    @staticmethod
+    def _read_block(input_fd, in_buf):
+        """ Fill the `in_buf` view in place, short reads (from pipes) included. Return the number of bytes read. """
+        size = 0
+        while size != len(in_buf):
+            count = input_fd.readinto(in_buf[size:])
+            if not count:
+                break
+            size += count
+        return size
 
-        if current_column:
-            self.stub.stdout_buffer.write(buffer[:self.config.wrap_column - current_column])
-            self.stub.stdout_buffer.write(b'\n')
-            buffer = buffer[self.config.wrap_column - current_column:]
+    def _base_encode(self, in_buf):
+        return _checked_encode(self.base_encodes[self.config.encoding], in_buf)
 
-        i = 0
-        for i in range(0, len(buffer), self.config.wrap_column):
-            if i + self.config.wrap_column > len(buffer):
-                break
-            self.stub.stdout_buffer.write(buffer[i:i + self.config.wrap_column])
-            self.stub.stdout_buffer.write(b'\n')
-        if i < len(buffer):
-            self.stub.stdout_buffer.write(buffer[i:])
-            return len(buffer) % self.config.wrap_column
-        return 0
+    def _wrap_write(self, buffer, current_column):
+        """ Write `buffer` starting at `current_column`, in a single write, and return the column it ends at. """
+        data, current_column = wrap_lines(buffer, self.config.wrap_column, current_column)
+        self.stub.stdout_buffer.write(data)
+        return current_column
 
     def __call__(self, file='-', base64=False, base64url=False, base32=False, base32hex=False, base16=False,
-                 base2msbf=False, base2lsbf=False, decode=False, ignore_garbage=False, wrap=76, z85=False):
+                 base2msbf=False, base2lsbf=False, decode=False, ignore_garbage=False, wrap=76, z85=False, jobs=1):
         encoding = Encoding.BASE64
         if base64url:
             encoding = Encoding.BASE64_URL
@@ -249,5 +585,6 @@ class Basenc:
             decode=decode,
             ignore_garbage=ignore_garbage,
             wrap_column=wrap,
+            jobs=jobs,
         )
         self.run(file, config)
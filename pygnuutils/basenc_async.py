@@ -0,0 +1,93 @@
+import asyncio
+from functools import partial
+
+from pygnuutils.basenc import ENCODE_QUANTUM_SIZES, QUANTUM_SIZES, Encoding, IncrementalDecoder, _decode_block, \
+    _encode_block, encoded_size
+
+ASYNC_BLOCKSIZE = 1 << 16
+OFFLOAD_SIZE = 1 << 14
+
+
+async def _blocks(reader, block_size):
+    """ Iterate over blocks of at most `block_size` bytes of a StreamReader-like object or an async byte iterable. """
+    if hasattr(reader, 'read'):
+        while True:
+            block = await reader.read(block_size)
+            if not block:
+                return
+            yield block
+    else:
+        async for chunk in reader:
+            chunk = memoryview(chunk)
+            for i in range(0, len(chunk), block_size):
+                yield chunk[i:i + block_size]
+
+
+class _StreamCodec:
+    def __init__(self, writer, executor, offload_size):
+        self.writer = writer
+        self.executor = executor
+        self.offload_size = offload_size
+
+    async def run(self, function, *args, size):
+        """
+        Call `function` on a block of `size` bytes, in the executor if it is large enough, and write the result.
+
+        Blocks processed on the event loop are at most a block size long, control goes back to the loop after each of
+        them even if the writer doesn't need draining.
+        """
+        if self.executor is not None and size >= self.offload_size:
+            output = await asyncio.get_running_loop().run_in_executor(self.executor, partial(function, *args))
+        else:
+            output = function(*args)
+            await asyncio.sleep(0)
+        await self.write(output)
+
+    async def write(self, data):
+        if data:
+            self.writer.write(data)
+            await self.writer.drain()
+
+
+async def encode_stream(reader, writer, encoding=Encoding.BASE64, wrap_column=0, block_size=ASYNC_BLOCKSIZE,
+                        executor=None, offload_size=OFFLOAD_SIZE):
+    """
+    Encode everything read from `reader`, a StreamReader or any async iterable of bytes-like chunks, to the
+    StreamWriter-like `writer`, waiting for its `drain` after every write.
+
+    Blocks of at least `offload_size` bytes are encoded in `executor` (threads or processes) when one is given.
+    """
+    codec = _StreamCodec(writer, executor, offload_size)
+    quantum_size = ENCODE_QUANTUM_SIZES[encoding]
+    pending = b''
+    current_column = 0
+    async for block in _blocks(reader, block_size):
+        data = pending + block if pending else bytes(block)
+        end = len(data) - len(data) % quantum_size
+        pending = data[end:]
+        if end:
+            await codec.run(_encode_block, encoding, data[:end], wrap_column, current_column, size=end)
+            if wrap_column:
+                current_column = (current_column + end // quantum_size * QUANTUM_SIZES[encoding]) % wrap_column
+    if pending:
+        await codec.run(_encode_block, encoding, pending, wrap_column, current_column, size=len(pending))
+        if wrap_column:
+            current_column = (current_column + encoded_size(len(pending), encoding)) % wrap_column
+    if current_column:
+        await codec.write(b'\n')
+
+
+async def decode_stream(reader, writer, encoding=Encoding.BASE64, ignore_garbage=False, block_size=ASYNC_BLOCKSIZE,
+                        executor=None, offload_size=OFFLOAD_SIZE):
+    """
+    Decode everything read from `reader` to `writer` like `encode_stream`, raise BasencDecodeError on invalid input.
+    """
+    codec = _StreamCodec(writer, executor, offload_size)
+    decoder = IncrementalDecoder(encoding, ignore_garbage)
+    async for block in _blocks(reader, block_size):
+        data = decoder.split(block)
+        if data:
+            await codec.run(_decode_block, encoding, data, size=len(data))
+    data = decoder.split(b'', final=True)
+    if data:
+        await codec.run(_decode_block, encoding, data, size=len(data))
@@ -21,7 +21,10 @@ def cli():
 @click.option('-i', '--ignore-garbage', is_flag=True)
 @click.option('-w', '--wrap', type=click.INT, default=76)
 @click.option('--z85', is_flag=True)
-def basenc(file, base64, base64url, base32, base32hex, base16, base2msbf, base2lsbf, decode, ignore_garbage, wrap, z85):
+@click.option('-j', '--jobs', type=click.IntRange(min=0), default=1,
+              help='encode or decode blocks with N worker processes (0: one per CPU)')
+def basenc(file, base64, base64url, base32, base32hex, base16, base2msbf, base2lsbf, decode, ignore_garbage, wrap, z85,
+           jobs):
     Basenc()(
         file=file,
         base64=base64,
@@ -35,4 +38,5 @@ def basenc(file, base64, base64url, base32, base32hex, base16, base2msbf, base2l
         ignore_garbage=ignore_garbage,
         wrap=wrap,
         z85=z85,
+        jobs=jobs,
     )
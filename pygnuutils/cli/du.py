@@ -0,0 +1,54 @@
+import click
+
+from pygnuutils.du import Du
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option('-a', '--all', 'all_', is_flag=True, help='write counts for all files, not just directories')
+@click.option('--apparent-size', is_flag=True, help='print apparent sizes rather than disk usage')
+@click.option('-B', '--block-size', help='scale sizes by SIZE before printing them')
+@click.option('-b', '--bytes', 'bytes_', is_flag=True, help='equivalent to \'--apparent-size --block-size=1\'')
+@click.option('-c', '--total', is_flag=True, help='produce a grand total')
+@click.option('-D', '-H', '--dereference-args', is_flag=True,
+              help='dereference only symlinks that are listed on the command line')
+@click.option('-h', '--human-readable', is_flag=True, help='print sizes in human readable format (e.g., 1K 234M 2G)')
+@click.option('--si', is_flag=True, help='like -h, but use powers of 1000 not 1024')
+@click.option('-j', '--jobs', type=click.INT, default=0,
+              help='scan subtrees with N worker threads (default: chosen by the executor)')
+@click.option('-k', 'kilobytes', is_flag=True, help='like --block-size=1K')
+@click.option('-l', '--count-links', is_flag=True, help='count sizes many times if hard linked')
+@click.option('-L', '--dereference', is_flag=True, help='dereference all symbolic links')
+@click.option('-P', '--no-dereference', is_flag=True, help='don\'t follow any symbolic links (this is the default)')
+@click.option('-d', '--max-depth', type=click.INT, default=-1,
+              help='print the total for a directory only if it is N or fewer levels below the command line argument')
+@click.option('-m', 'megabytes', is_flag=True, help='like --block-size=1M')
+@click.option('-s', '--summarize', is_flag=True, help='display only a total for each argument')
+@click.option('--exclude', multiple=True, help='exclude files that match PATTERN')
+@click.argument('files', nargs=-1)
+def du(files, all_, apparent_size, block_size, bytes_, total, dereference_args, human_readable, si, jobs, kilobytes,
+       count_links, dereference, no_dereference, max_depth, megabytes, summarize, exclude):
+    Du()(
+        *files,
+        all_=all_,
+        apparent_size=apparent_size,
+        block_size=block_size,
+        bytes_=bytes_,
+        total=total,
+        dereference_args=dereference_args,
+        human_readable=human_readable,
+        si=si,
+        kilobytes=kilobytes,
+        count_links=count_links,
+        dereference=dereference,
+        no_dereference=no_dereference,
+        max_depth=max_depth,
+        megabytes=megabytes,
+        summarize=summarize,
+        exclude=exclude,
+        jobs=jobs,
+    )
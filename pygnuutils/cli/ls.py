@@ -1,6 +1,9 @@
+import os
+
 import click
 
-from pygnuutils.ls import Ls, Formats, IndicatorStyle, SortType, TimeType, TimeStyle
+from pygnuutils.instrumentation import InstrumentedStub, Report
+from pygnuutils.ls import Ls, LsStub, Formats, IndicatorStyle, SortType, TimeType, TimeStyle, WhenType
 
 FORMAT_NAMES = {
     'verbose': Formats.LONG_FORMAT,
@@ -35,6 +38,18 @@ SORT_TYPE_NAMES = {
     'width': SortType.WIDTH,
 }
 
+WHEN_NAMES = {
+    'always': WhenType.ALWAYS,
+    'yes': WhenType.ALWAYS,
+    'force': WhenType.ALWAYS,
+    'never': WhenType.NEVER,
+    'no': WhenType.NEVER,
+    'none': WhenType.NEVER,
+    'auto': WhenType.IF_TTY,
+    'tty': WhenType.IF_TTY,
+    'if-tty': WhenType.IF_TTY,
+}
+
 TIME_TYPE_NAMES = {
     'atime': TimeType.ATIME,
     'access': TimeType.ATIME,
@@ -46,12 +61,32 @@ TIME_TYPE_NAMES = {
 }
 
 
+class LsCommand(click.Command):
+    def parse_args(self, ctx, args):
+        # Like GNU ls, a bare --color means always and WHEN is only given as --color=WHEN, so --color never takes the
+        # next argument as its value.
+        parsed = []
+        for i, arg in enumerate(args):
+            if arg == '--':
+                parsed.extend(args[i:])
+                break
+            parsed.append('--color-when=' + arg[len('--color='):] if arg.startswith('--color=') else arg)
+        return super().parse_args(ctx, parsed)
+
+
+def _color_when(ctx, param, value):
+    if value is not None and value not in WHEN_NAMES:
+        choices = ', '.join(repr(name) for name in WHEN_NAMES)
+        raise click.BadParameter(f'{value!r} is not one of {choices}.', ctx, param_hint="'--color'")
+    return value
+
+
 @click.group()
 def cli():
     pass
 
 
-@cli.command()
+@cli.command(cls=LsCommand)
 @click.option('-a', '--all', 'all_', is_flag=True, help='do not ignore entries starting with .')
 @click.option('-A', '--almost-all', is_flag=True, help='do not list implied . and ..')
 @click.option('--author', is_flag=True, help='with -l, print the author of each file')
@@ -64,7 +99,13 @@ def cli():
               ctime and sort by name; otherwise: sort by ctime, newest
               first''')
 @click.option('-C', 'columns_format', is_flag=True, help='list entries by columns')
+@click.option('--color', is_flag=True,
+              help='colorize the output; --color=WHEN can be \'always\' (default if omitted), \'auto\', or \'never\'')
+@click.option('--color-when', hidden=True, callback=_color_when)
 @click.option('-d', 'directory', is_flag=True, help='list directories themselves, not their contents')
+@click.option('--diff-index', type=click.Path(dir_okay=False),
+              help='instead of listing entries, print those added (A), removed (D) or modified (M) since the index '
+                   'FILE was written with --write-index')
 @click.option('-f', 'fast', is_flag=True, help='do not sort, enable -aU, disable -ls --color')
 @click.option('-F', '--classify', is_flag=True, help='append indicator (one of */=>@|) to entries')
 @click.option('--file-type', is_flag=True, help='likewise, except do not append \'*\'')
@@ -94,6 +135,8 @@ def cli():
 @click.option('-I', '--ignore', multiple=True, help='do not list implied entries matching shell PATTERN')
 # Add kibibytes
 @click.option('-l', 'long', is_flag=True, help='use a long listing format')
+@click.option('--max-depth', type=click.INT, default=-1,
+              help='with -R, do not descend more than N levels below the command line arguments')
 @click.option('-L', '--dereference', is_flag=True,
               help='when showing file information for a symbolic link, show information for the file the link '
                    'references rather than for the link itself')
@@ -102,6 +145,8 @@ def cli():
 @click.option('-N', '--literal', is_flag=True, help='print entry names without quoting')
 @click.option('-o', 'owner_only', is_flag=True, help='like -l, but do not list group information')
 @click.option('-p', 'indicator_slash', is_flag=True, help='append / indicator to directories')
+@click.option('--prune', multiple=True,
+              help='with -R, do not descend into directories matching shell PATTERN')
 # Add hide-control-chars
 # Add show-control-chars
 # Add quote-name
@@ -110,6 +155,8 @@ def cli():
 @click.option('-R', '--recursive', is_flag=True, help='list subdirectories recursively')
 @click.option('-s', '--size', is_flag=True, help='print the allocated size of each file, in blocks')
 @click.option('-S', 'size_sort', is_flag=True, help='sort by file size, largest first')
+@click.option('--summary', is_flag=True,
+              help='instead of listing entries, print entry counts and sizes by file type and by extension')
 @click.option('--sort', type=click.Choice(list(SORT_TYPE_NAMES.keys())),
               callback=lambda ctx, param, value: SORT_TYPE_NAMES.get(value),
               help='sort by WORD instead of name: none (-U), size (-S), time (-t), version (-v), extension (-X)')
@@ -128,6 +175,8 @@ def cli():
 @click.option('-U', 'unsort', is_flag=True, help='do not sort; list entries in directory order')
 @click.option('-v', 'version_sort', is_flag=True, help='natural sort of (version) numbers within text')
 @click.option('-w', '--width', type=click.INT, default=-1, help='set output width to COLS.  0 means no limit')
+@click.option('--write-index', type=click.Path(dir_okay=False),
+              help='write a sorted binary index of the listed entries to FILE, for --diff-index')
 @click.option('-x', 'horizontal', is_flag=True, help='list entries by lines instead of by columns')
 @click.option('-X', 'extension_sort', is_flag=True, help='sort alphabetically by entry extension')
 # Add security context
@@ -138,8 +187,11 @@ def ls(files, all_, almost_all, author, block_size, ignore_backups, ctime, colum
        dereference_command_line, dereference_command_line_symlink_to_dir, hide, indicator_style, inode, ignore, long,
        dereference, comma, numeric_uid_gid, literal, owner_only, indicator_slash, reverse, recursive, size, size_sort,
        sort, time, time_style, time_sort, tabsize, atime, unsort, version_sort, width, horizontal, extension_sort,
-       one_per_line):
-    Ls()(
+       one_per_line, max_depth, prune, summary, color, color_when, diff_index, write_index):
+    # Set PYGNUUTILS_LS_REPORT to print the timing of the listing phases and of the file system calls to stderr.
+    report = Report() if os.getenv('PYGNUUTILS_LS_REPORT') else None
+    ls_ = Ls() if report is None else Ls(InstrumentedStub(LsStub(), report), report)
+    ls_(
         *files,
         all_=all_,
         almost_all=almost_all,
@@ -188,4 +240,12 @@ def ls(files, all_, almost_all, author, block_size, ignore_backups, ctime, colum
         horizontal=horizontal,
         extension_sort=extension_sort,
         one_per_line=one_per_line,
+        max_depth=max_depth,
+        prune=prune,
+        summary=summary,
+        color=WHEN_NAMES[color_when] if color_when else WhenType.ALWAYS if color else None,
+        write_index=write_index,
+        diff_index=diff_index,
     )
+    if report is not None:
+        click.echo(report.format(), err=True)
@@ -0,0 +1,215 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from stat import S_ISDIR
+
+from pygnuutils.human_readable import parse_specs, human_readable as human_size, HumanReadableOption
+from pygnuutils.traversal import DereferenceSymlink, IgnoreMode, Traversal, TraversalStub
+
+
+class DuStub(TraversalStub):
+    def getenv(self, key, default=None):
+        return os.getenv(key, default)
+
+    def print(self, *objects, sep=' ', end='\n', file=sys.stdout, flush=False):
+        print(*objects, sep=sep, end=end, file=file, flush=flush)
+
+
+@dataclass
+class DuConfig:
+    all_files: bool = False
+    apparent_size: bool = False
+    output_block_size: int = 1024
+    human_output_opts: HumanReadableOption = HumanReadableOption(0)
+    dereference: DereferenceSymlink = DereferenceSymlink.NEVER
+    count_links: bool = False
+    exclude_patterns: list = field(default_factory=list)
+    max_depth: int = -1
+    print_grand_total: bool = False
+    jobs: int = 0
+
+    @staticmethod
+    def from_cli_params(stub: DuStub, all_=False, apparent_size=False, block_size='', bytes_=False, total=False,
+                        dereference_args=False, human_readable=False, si=False, kilobytes=False, count_links=False,
+                        dereference=False, no_dereference=False, max_depth=-1, megabytes=False, summarize=False,
+                        exclude=None, jobs=0):
+        config = DuConfig()
+        config.all_files = all_
+        config.apparent_size = apparent_size
+        if block_size:
+            config.output_block_size, config.human_output_opts = parse_specs(block_size)
+            if not config.output_block_size:
+                config.output_block_size = 512 if stub.getenv('POSIXLY_CORRECT') else 1024
+        if bytes_:
+            config.apparent_size = True
+            config.output_block_size = 1
+        config.print_grand_total = total
+        if dereference_args:
+            config.dereference = DereferenceSymlink.COMMAND_LINE_ARGUMENTS
+        if human_readable:
+            config.human_output_opts = (
+                    HumanReadableOption.AUTOSCALE | HumanReadableOption.SI | HumanReadableOption.BASE_1024
+            )
+            config.output_block_size = 1
+        if si:
+            config.human_output_opts = HumanReadableOption.AUTOSCALE | HumanReadableOption.SI
+            config.output_block_size = 1
+        if kilobytes:
+            config.human_output_opts = HumanReadableOption(0)
+            config.output_block_size = 1024
+        config.count_links = count_links
+        if dereference:
+            config.dereference = DereferenceSymlink.ALWAYS
+        if no_dereference:
+            config.dereference = DereferenceSymlink.NEVER
+        config.max_depth = max_depth
+        if megabytes:
+            config.human_output_opts = HumanReadableOption(0)
+            config.output_block_size = 1024 * 1024
+        if summarize:
+            config.max_depth = 0
+        if exclude is not None:
+            config.exclude_patterns.extend(exclude)
+        config.jobs = jobs
+        return config
+
+
+class Du:
+    def __init__(self, stub=None):
+        self.stub = DuStub() if stub is None else stub
+        self.config = DuConfig()
+        self.seen_dev_ino = set()
+        self.seen_lock = threading.Lock()
+
+    def run(self, *files, config=None):
+        if config is not None:
+            self.config = config
+        self.seen_dev_ino = set()
+        traversal = Traversal(
+            self.stub, dereference=self.config.dereference, ignore_mode=IgnoreMode.MINIMAL,
+            ignore_patterns=self.config.exclude_patterns, detect_cycles=True,
+        )
+        grand_total = 0
+        with ThreadPoolExecutor(self.config.jobs or None) as executor:
+            for file in files or ('.',):
+                grand_total += self._du_argument(executor, traversal, file)
+        if self.config.print_grand_total:
+            self._print_size(grand_total, 'total')
+
+    def _du_argument(self, executor, traversal, file):
+        try:
+            stat = traversal.stat(file, True)
+        except OSError as e:
+            self.stub.print(f'du: cannot access \'{file}\': {e.strerror}', file=sys.stderr)
+            return 0
+        if not S_ISDIR(stat.st_mode):
+            lines = []
+            size = self._du_entry(traversal, file, stat, 0, lines)
+            self._print_lines(lines)
+            return size
+        if not self._first_visit(stat) or not traversal.enter_dir(stat):
+            return 0
+        size = self._size(stat)
+        # Every subtree of a command line argument is scanned by a different worker, the results are printed in
+        # directory order.
+        futures = [
+            executor.submit(self._du_subtree, traversal.fork(), self.stub.join(file, name))
+            for name in self._list_dir(traversal, file)
+        ]
+        for future in futures:
+            subtree_size, lines = future.result()
+            size += subtree_size
+            self._print_lines(lines)
+        traversal.leave_dir()
+        self._print_size(size, file)
+        return size
+
+    def _du_subtree(self, traversal, path):
+        lines = []
+        try:
+            stat = traversal.stat(path, False)
+        except OSError as e:
+            self.stub.print(f'du: cannot access \'{path}\': {e.strerror}', file=sys.stderr)
+            return 0, lines
+        return self._du_entry(traversal, path, stat, 1, lines), lines
+
+    def _du_entry(self, traversal, path, stat, depth, lines):
+        if not self._first_visit(stat):
+            return 0
+        size = self._size(stat)
+        is_dir = S_ISDIR(stat.st_mode)
+        if is_dir:
+            if not traversal.enter_dir(stat):
+                self.stub.print(f'du: WARNING: Circular directory structure at \'{path}\'', file=sys.stderr)
+                return 0
+            for name in self._list_dir(traversal, path):
+                entry_path = self.stub.join(path, name)
+                try:
+                    entry_stat = traversal.stat(entry_path, False)
+                except OSError as e:
+                    self.stub.print(f'du: cannot access \'{entry_path}\': {e.strerror}', file=sys.stderr)
+                    continue
+                size += self._du_entry(traversal, entry_path, entry_stat, depth + 1, lines)
+            traversal.leave_dir()
+        if (is_dir or self.config.all_files or not depth) and (self.config.max_depth < 0 or
+                                                               depth <= self.config.max_depth):
+            lines.append((size, path))
+        return size
+
+    def _list_dir(self, traversal, path):
+        try:
+            names = self.stub.listdir(path)
+        except OSError as e:
+            self.stub.print(f'du: cannot read directory \'{path}\': {e.strerror}', file=sys.stderr)
+            return []
+        return [name for name in names if not traversal.ignored(name)]
+
+    def _first_visit(self, stat):
+        if self.config.count_links or (not S_ISDIR(stat.st_mode) and stat.st_nlink <= 1):
+            return True
+        dev_ino = (stat.st_dev, stat.st_ino)
+        with self.seen_lock:
+            if dev_ino in self.seen_dev_ino:
+                return False
+            self.seen_dev_ino.add(dev_ino)
+            return True
+
+    def _size(self, stat):
+        return stat.st_size if self.config.apparent_size else self.stub.st_nblocks(stat)
+
+    def _print_size(self, size, path):
+        from_block_size = 1 if self.config.apparent_size else self.stub.st_nblocksize
+        size = human_size(size, self.config.human_output_opts, from_block_size, self.config.output_block_size)
+        self.stub.print(f'{size}\t{path}')
+
+    def _print_lines(self, lines):
+        for size, path in lines:
+            self._print_size(size, path)
+
+    def __call__(self, *files, all_=False, apparent_size=False, block_size='', bytes_=False, total=False,
+                 dereference_args=False, human_readable=False, si=False, kilobytes=False, count_links=False,
+                 dereference=False, no_dereference=False, max_depth=-1, megabytes=False, summarize=False, exclude=None,
+                 jobs=0):
+        config = DuConfig.from_cli_params(
+            self.stub,
+            all_=all_,
+            apparent_size=apparent_size,
+            block_size=block_size,
+            bytes_=bytes_,
+            total=total,
+            dereference_args=dereference_args,
+            human_readable=human_readable,
+            si=si,
+            kilobytes=kilobytes,
+            count_links=count_links,
+            dereference=dereference,
+            no_dereference=no_dereference,
+            max_depth=max_depth,
+            megabytes=megabytes,
+            summarize=summarize,
+            exclude=exclude,
+            jobs=jobs,
+        )
+        self.run(*files, config=config)
@@ -6,3 +6,8 @@ class PygnuutilsException(Exception):
 class BasencDecodeError(PygnuutilsException):
     """ Raise when basenc decoding fails. """
     pass
+
+
+class BasencEncodeError(PygnuutilsException):
+    """ Raise when basenc encoding fails. """
+    pass
@@ -0,0 +1,89 @@
+import threading
+import time
+from functools import wraps
+
+
+class CallStats:
+    """ Call count, cumulative latency and a power of two latency histogram (in microseconds). """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.histogram = {}
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        bucket = int(elapsed * 1000000).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def format_histogram(self):
+        return ' '.join(f'<{1 << bucket}us:{count}' for bucket, count in sorted(self.histogram.items()))
+
+
+class Report:
+    """ Statistics of the internal phases of a run and of the calls made to its stub. """
+
+    def __init__(self):
+        self.phases = {}
+        self.stub_calls = {}
+        self.lock = threading.Lock()
+
+    def record_phase(self, name, elapsed):
+        with self.lock:
+            self.phases.setdefault(name, CallStats()).add(elapsed)
+
+    def record_stub_call(self, name, elapsed):
+        with self.lock:
+            self.stub_calls.setdefault(name, CallStats()).add(elapsed)
+
+    def format(self):
+        lines = []
+        for title, table in (('phases', self.phases), ('stub calls', self.stub_calls)):
+            lines.append(f'{title}:')
+            for name, stats in sorted(table.items(), key=lambda item: item[1].total, reverse=True):
+                lines.append(f'  {name:<24} calls {stats.count:<8} total {stats.total:.6f}s  '
+                             f'mean {stats.total / stats.count * 1000000:.1f}us')
+                lines.append(f'    {stats.format_histogram()}')
+        return '\n'.join(lines)
+
+
+def timed_phase(method):
+    """ Record the duration of a method in `self.report`, if there is one. """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.report is None:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.report.record_phase(method.__name__.lstrip('_'), time.perf_counter() - start)
+
+    return wrapper
+
+
+class InstrumentedStub:
+    """ Wrap a stub and record the count and latency of every method call into `report`. """
+
+    def __init__(self, stub, report):
+        self.stub = stub
+        self.report = report
+
+    def __getattr__(self, name):
+        attribute = getattr(self.stub, name)
+        if not callable(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self.report.record_stub_call(name, time.perf_counter() - start)
+
+        # Cache the wrapper so the next lookups skip __getattr__.
+        self.__dict__[name] = timed
+        return timed
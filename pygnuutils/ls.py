@@ -1,17 +1,20 @@
-import fnmatch
+import copy
 import locale
 import math
 import os
 import platform
+import re
 import struct
 import sys
-from dataclasses import dataclass, field
+import threading
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
 from enum import Enum, auto
-from functools import cmp_to_key
+from functools import cmp_to_key, lru_cache
 from itertools import chain
+from operator import attrgetter
 from stat import filemode, S_ISCHR, S_ISBLK, S_ISREG, S_IXUSR, S_IXGRP, S_IXOTH, S_ISDIR, S_ISLNK, S_ISFIFO, S_ISSOCK, \
-    S_ISDOOR
+    S_ISDOOR, S_ISUID, S_ISGID, S_ISVTX, S_IWOTH
 
 try:
 
@@ -28,11 +31,31 @@ except ImportError:
 
 from pygnuutils.filevercmp import filevercmp
 from pygnuutils.human_readable import parse_specs, human_readable as human_size, HumanReadableOption
+from pygnuutils.instrumentation import timed_phase
+from pygnuutils.ls_colors import LsColors
+from pygnuutils.ls_index import IndexWriter, diff_records, read_records, write_records
+from pygnuutils.traversal import DereferenceSymlink, IgnoreMode, Traversal, TraversalStub
 
 SIX_MONTH_DELTA = timedelta(seconds=365.2425 * 24 * 60 * 60 / 2)
+LONG_FORMAT_RECENT = '{0:%b} {0.day:2d} {0:%H:%M}'
+LONG_FORMAT_NOT_RECENT = '{0:%b} {0.day:2d}  {0:%Y}'
+FULL_ISO_FORMAT = '{0:%Y-%m-%d %H:%M:%S.%f %z}'
+LONG_ISO_FORMAT = '{0:%Y-%m-%d %H:%M}'
+ISO_FORMAT_RECENT = '{0:%m-%d %H:%M}'
+ISO_FORMAT_NOT_RECENT = '{0:%Y-%m-%d} '
+# Formats that never show anything finer than a minute, their results can be shared by all the times of a minute.
+MINUTE_TIME_FORMATS = (LONG_FORMAT_RECENT, LONG_FORMAT_NOT_RECENT, LONG_ISO_FORMAT, ISO_FORMAT_RECENT,
+                       ISO_FORMAT_NOT_RECENT)
+TIME_CACHE_SIZE = 4096
+COLLATION_CACHE_SIZE = 65536
 MIN_COLUMN_WIDTH = 3
 
 
+def get_extension(name):
+    dot = b'.' if isinstance(name, bytes) else '.'
+    return name.rsplit(dot, 1)[-1] if dot in name else name[:0]
+
+
 class FileType(Enum):
     UNKNOWN = 0
     FIFO = auto()
@@ -80,6 +103,21 @@ class FileInfo:
         return self.stat is not None
 
 
+# LS_COLORS codes of entries that could not be stat'ed, by the file type found in their directory.
+FILE_TYPE_COLORS = {
+    FileType.UNKNOWN: 'or',
+    FileType.FIFO: 'pi',
+    FileType.CHARDEV: 'cd',
+    FileType.DIRECTORY: 'di',
+    FileType.BLOCKDEV: 'bd',
+    FileType.NORMAL: 'fi',
+    FileType.SYMBOLIC_LINK: 'ln',
+    FileType.SOCK: 'so',
+    FileType.WHITEOUT: 'fi',
+    FileType.ARG_DIRECTORY: 'di',
+}
+
+
 class Formats(Enum):
     LONG_FORMAT = 0
     ONE_PER_LINE = auto()
@@ -125,52 +163,91 @@ class WhenType(Enum):
     IF_TTY = auto()
 
 
-class DereferenceSymlink(Enum):
-    UNDEFINED = 0
-    NEVER = auto()
-    COMMAND_LINE_ARGUMENTS = auto()
-    COMMAND_LINE_SYMLINK_TO_DIR = auto()
-    ALWAYS = auto()
-
-
-class IgnoreMode(Enum):
-    DEFAULT = 0
-    DOT_AND_DOTDOT = auto()
-    MINIMAL = auto()
-
+@dataclass
+class LsFilter:
+    """
+    Predicates an entry must satisfy in order to be listed.
+
+    Sizes are inclusive bounds in bytes, times are exclusive bounds in seconds since the epoch and are checked against
+    the listing's `time_type`. Command line arguments are never filtered.
+    """
+    file_types: set = None
+    min_size: int = None
+    max_size: int = None
+    newer_than: float = None
+    older_than: float = None
+    name_regex: str = None
+
+    def __post_init__(self):
+        self._name_pattern = None
+        if self.name_regex is not None:
+            self._get_name_pattern()
+
+    def _get_name_pattern(self):
+        """ Compiled `name_regex`, compiled again if it was assigned another regex since. """
+        if self._name_pattern is None or self._name_pattern.pattern != self.name_regex:
+            self._name_pattern = re.compile(self.name_regex)
+        return self._name_pattern
 
-class LsStub:
     @property
-    def sep(self):
-        return os.path.sep
-
-    def join(self, path, *paths):
-        return os.path.join(path, *paths)
-
-    def abspath(self, path):
-        return os.path.abspath(path)
-
-    def stat(self, path, dir_fd=None, follow_symlinks=True):
-        return os.stat(path, dir_fd=dir_fd, follow_symlinks=follow_symlinks)
-
-    def readlink(self, path, dir_fd=None):
-        return os.readlink(path, dir_fd=dir_fd)
-
-    def isabs(self, path):
-        return os.path.isabs(path)
-
-    def dirname(self, path):
-        return os.path.dirname(path)
+    def filters_time(self):
+        return self.newer_than is not None or self.older_than is not None
 
+    def matches(self, file_info, timestamp=None):
+        if self.file_types is not None and file_info.filetype not in self.file_types:
+            return False
+        if self.min_size is not None and file_info.stat.st_size < self.min_size:
+            return False
+        if self.max_size is not None and file_info.stat.st_size > self.max_size:
+            return False
+        if self.newer_than is not None and timestamp <= self.newer_than:
+            return False
+        if self.older_than is not None and timestamp >= self.older_than:
+            return False
+        if self.name_regex is not None and self._get_name_pattern().search(os.fsdecode(file_info.name)) is None:
+            return False
+        return True
+
+
+class LsSummary:
+    """ Entry count, apparent size and allocated blocks of listed entries, grouped by file type and by extension. """
+
+    def __init__(self):
+        self.count = 0
+        self.size = 0
+        self.blocks = 0
+        self.by_type = {}
+        self.by_extension = {}
+
+    def add(self, filetype, extension, size, blocks):
+        self.count += 1
+        self.size += size
+        self.blocks += blocks
+        for totals in (self.by_type.setdefault(filetype, [0, 0, 0]),
+                       self.by_extension.setdefault(extension, [0, 0, 0])):
+            totals[0] += 1
+            totals[1] += size
+            totals[2] += blocks
+
+    def update(self, other):
+        self.count += other.count
+        self.size += other.size
+        self.blocks += other.blocks
+        for totals, other_totals in ((self.by_type, other.by_type), (self.by_extension, other.by_extension)):
+            for key, (count, size, blocks) in other_totals.items():
+                current = totals.setdefault(key, [0, 0, 0])
+                current[0] += count
+                current[1] += size
+                current[2] += blocks
+
+
+class LsStub(TraversalStub):
     def major(self, device):
         return os.major(device)
 
     def minor(self, device):
         return os.minor(device)
 
-    def basename(self, path):
-        return os.path.basename(path)
-
     def getgroup(self, st_gid):
         if grp is None:
             return '?'
@@ -184,9 +261,6 @@ class LsStub:
     def now(self):
         return datetime.now()
 
-    def listdir(self, path='.'):
-        return os.listdir(path)
-
     def system(self):
         return platform.system()
 
@@ -205,19 +279,19 @@ class LsStub:
     def setlocale(self, locale_setting=''):
         locale.setlocale(locale.LC_ALL, locale_setting)
 
-    def print(self, *objects, sep=' ', end='\n', file=sys.stdout, flush=False):
+    def get_collation_locale(self):
+        return locale.setlocale(locale.LC_COLLATE)
+
+    def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
         print(*objects, sep=sep, end=end, file=file, flush=flush)
 
-    @property
-    def st_nblocksize(self):
-        return 4096
+    def write(self, data):
+        """ Write the output of a listing of bytes paths. """
+        sys.stdout.buffer.write(data)
 
-    def st_nblocks(self, stat):
-        if hasattr(stat, 'st_blocks') and hasattr(stat, 'st_blksize'):
-            size = stat.st_blocks * 512
-        else:
-            size = stat.st_size
-        return size // self.st_nblocksize + int(size % self.st_nblocksize != 0)
+    def open(self, path, mode='rb'):
+        """ Open a listing index file. """
+        return open(path, mode)
 
 
 @dataclass
@@ -246,9 +320,20 @@ class LsConfig:
     recursive: bool = False
     print_scontext: bool = False
     tabsize: int = 0
-    long_format_recent: str = '{0:%b} {0.day:2d} {0:%H:%M}'
-    long_format_not_recent: str = '{0:%b} {0.day:2d}  {0:%Y}'
+    long_format_recent: str = LONG_FORMAT_RECENT
+    long_format_not_recent: str = LONG_FORMAT_NOT_RECENT
     line_length: int = 0
+    max_depth: int = -1
+    prune_patterns: list = field(default_factory=list)
+    file_filter: LsFilter = None
+    summary: bool = False
+    colors: LsColors = None
+    # Write a sorted index of the listed entries to this file.
+    write_index: str = None
+    # Print the differences between the listed entries and this index instead of listing them.
+    diff_index: str = None
+    # Locale to set before the first listing, the environment's by default. None leaves the process locale untouched.
+    locale_setting: str = ''
 
     @staticmethod
     def from_cli_params(stub: LsStub, all_=False, almost_all=False, author=False, block_size='', ignore_backups=False,
@@ -261,7 +346,8 @@ class LsConfig:
                         reverse=False, recursive=False, size=False, size_sort=False, sort: SortType = None,
                         time: TimeType = None, time_style: TimeStyle = None, time_sort=False, tabsize=0, atime=False,
                         unsort=False, version_sort=False, width=-1, horizontal=False, extension_sort=False,
-                        one_per_line=False):
+                        one_per_line=False, max_depth=-1, prune=None, summary=False, color: WhenType = None,
+                        write_index=None, diff_index=None):
         config = LsConfig()
         config.format = None
         config.print_author = author
@@ -372,12 +458,27 @@ class LsConfig:
             config.sort_type = SortType.EXTENSION
         if one_per_line:
             config.format = Formats.ONE_PER_LINE
+        config.max_depth = max_depth
+        if summary:
+            config.summary = True
+        if prune is not None:
+            config.prune_patterns.extend(prune)
+        config.write_index = write_index
+        config.diff_index = diff_index
+        if not fast and (color == WhenType.ALWAYS or (color == WhenType.IF_TTY and stub.isatty())):
+            try:
+                config.colors = LsColors.parse(stub.getenv('LS_COLORS', ''))
+            except ValueError:
+                stub.print('ls: unparsable value for LS_COLORS environment variable', file=sys.stderr)
 
         if config.format is None:
             config.format = Formats.MANY_PER_LINE if stub.isatty() else Formats.ONE_PER_LINE
 
         if config.format in (Formats.MANY_PER_LINE, Formats.HORIZONTAL, Formats.WITH_COMMAS) and not config.tabsize:
             config.tabsize = 8
+        if config.colors is not None:
+            # Some terminal emulators can't handle tabs and color codes on the same line.
+            config.tabsize = 0
 
         if config.sort_type is None:
             config.sort_type = (
@@ -395,17 +496,20 @@ class LsConfig:
     def load_time_style(config, time_style):
         if time_style is not None and config.format == Formats.LONG_FORMAT:
             if time_style == TimeStyle.FULL_ISO:
-                config.long_format_not_recent = config.long_format_recent = '{0:%Y-%m-%d %H:%M:%S.%f %z}'
+                config.long_format_not_recent = config.long_format_recent = FULL_ISO_FORMAT
             if time_style == TimeStyle.LONG_ISO:
-                config.long_format_not_recent = config.long_format_recent = '{0:%Y-%m-%d %H:%M}'
+                config.long_format_not_recent = config.long_format_recent = LONG_ISO_FORMAT
             if time_style == TimeStyle.ISO:
-                config.long_format_not_recent = '{0:%Y-%m-%d} '
-                config.long_format_recent = '{0:%m-%d %H:%M}'
+                config.long_format_not_recent = ISO_FORMAT_NOT_RECENT
+                config.long_format_recent = ISO_FORMAT_RECENT
 
 
 class Ls:
-    def __init__(self, stub=None):
+    def __init__(self, stub=None, report=None):
         self.stub = LsStub() if stub is None else stub
+        # An `instrumentation.Report` to time the listing phases into, wrap the stub with
+        # `instrumentation.InstrumentedStub` to time its calls into the same report.
+        self.report = report
         self.config = LsConfig()
         self.inode_number_width = 0
         self.block_size_width = 0
@@ -417,79 +521,187 @@ class Ls:
         self.major_device_number_width = 0
         self.minor_device_number_width = 0
         self.file_size_width = 0
-        self.print_with_color = False
         self.check_symlink_mode = False
+        self.used_color = False
+        self.print_listing = True
+        self.index_writer = None
         self.print_dir_name = True
         self.files = []
+        self.filtered_dirs = []
         self.pending_dirs = []
-        self.active_dir_set = None
+        self.traversal = None
+        self.bytes_mode = False
+        self.sep = self.stub.sep
+        self.dot_entries = ('.', '..')
+        self.long_format_plan = []
+        self.time_getter = None
+        self.long_time_formatter = None
+        self.locale_lock = threading.Lock()
+        self.locale_condition = threading.Condition(self.locale_lock)
+        self.active_runs = 0
+        self.applied_locale = None
+        self.collation_locale = None
+        self.collation_key = None
         self.max_idx = 0
-        self.dev_ino_stack = []
         self.first_print_dir = True
+        self.dir_summary = LsSummary()
+        self.tree_summary = LsSummary()
 
     def run(self, *files, config=None):
-        if config is not None:
-            self.config = config
+        """
+        List `files`. The state of the listing lives on a per-run copy of this instance, so a single instance (and its
+        caches) can serve concurrent runs.
+
+        The locale is process wide and read while sorting and formatting, so runs only overlap when they use the same
+        one: a run with another `locale_setting` waits for the active runs to finish before applying it.
+        """
+        if config is None:
+            config = self.config
+        with self.locale_condition:
+            while self.active_runs and config.locale_setting not in (None, self.applied_locale):
+                self.locale_condition.wait()
+            self._apply_locale(config)
+            self.active_runs += 1
+            context = copy.copy(self)
+        try:
+            context.config = replace(config)
+            context._run(files)
+        finally:
+            with self.locale_condition:
+                self.active_runs -= 1
+                self.locale_condition.notify_all()
+
+    def _run(self, files):
+        # Bytes paths are listed as bytes all the way to the output, without ever being decoded.
+        self.bytes_mode = bool(files) and isinstance(files[0], bytes)
         self._reset_run_variables()
         self._run_on_input_files(files)
 
         if self.files:
             self._sort_files()
             if not self.config.immediate_dirs:
-                self._extract_dirs_from_files('', True)
+                self._extract_dirs_from_files('', True, 0)
 
-        if self.files:
+        if self.files or self.dir_summary.count:
             self._print_current_files()
-            if self.pending_dirs:
-                self.stub.print('')
+            if self.pending_dirs and self.print_listing:
+                self._print('')
         elif len(self.pending_dirs) == 1 and len(files) <= 1:
             self.print_dir_name = False
 
         self._run_on_dirs()
+        if self.config.summary and self.print_listing:
+            self._print('')
+            self._print('grand total:')
+            self._print_summary_lines(self.tree_summary)
+        if self.index_writer is not None:
+            self._finish_index()
+        if self.used_color and not self.config.colors.uses_default_delimiters:
+            self._print(self.config.colors.indicators['lc'] + self.config.colors.indicators['rc'], end='')
 
     # Methods related to the current run.
 
     def _reset_run_variables(self):
-        self.stub.setlocale('')
         self.print_dir_name = True
-        self.check_symlink_mode = self.config.directories_first
+        colors = self.config.colors
+        # Only these colors depend on the type of the files symbolic links point to.
+        self.check_symlink_mode = self.config.directories_first or colors is not None and (
+            colors.is_colored('or') or (colors.is_colored('ex') and colors.link_as_target) or
+            (colors.is_colored('mi') and self.config.format == Formats.LONG_FORMAT)
+        )
+        self.used_color = False
+        self.print_listing = self.config.diff_index is None
+        self.index_writer = (
+            IndexWriter() if self.config.write_index is not None or self.config.diff_index is not None else None
+        )
         self.files = []
+        self.filtered_dirs = []
         self.pending_dirs = []
-        self.active_dir_set = set() if self.config.recursive else None
         self.max_idx = math.ceil(self.config.line_length / MIN_COLUMN_WIDTH)
-        self.dev_ino_stack = []
         self.first_print_dir = True
+        self.dir_summary = LsSummary()
+        self.tree_summary = LsSummary()
         if self.config.dereference == DereferenceSymlink.UNDEFINED:
             if (self.config.immediate_dirs or self.config.indicator_style == IndicatorStyle.CLASSIFY or
                     self.config.format == Formats.LONG_FORMAT):
                 self.config.dereference = DereferenceSymlink.NEVER
             else:
                 self.config.dereference = DereferenceSymlink.COMMAND_LINE_SYMLINK_TO_DIR
+        encode = (lambda patterns: [os.fsencode(pattern) for pattern in patterns]) if self.bytes_mode else list
+        self.sep = os.fsencode(self.stub.sep) if self.bytes_mode else self.stub.sep
+        self.dot_entries = (b'.', b'..') if self.bytes_mode else ('.', '..')
+        self.traversal = Traversal(
+            self.stub, dereference=self.config.dereference, ignore_mode=self.config.ignore_mode,
+            ignore_patterns=encode(self.config.ignore_patterns), hide_patterns=encode(self.config.hide_patterns),
+            max_depth=self.config.max_depth, prune_patterns=encode(self.config.prune_patterns),
+            detect_cycles=self.config.recursive,
+        )
+        self.time_getter = self._compile_time_getter()
+        if self.config.format == Formats.LONG_FORMAT:
+            self.long_format_plan = self._compile_long_format_plan()
+            self.long_time_formatter = self._compile_long_time_formatter()
+
+    def _apply_locale(self, config):
+        if config.locale_setting is not None and config.locale_setting != self.applied_locale:
+            self.stub.setlocale(config.locale_setting)
+            self.applied_locale = config.locale_setting
+        collation_locale = self.stub.get_collation_locale()
+        if collation_locale != self.collation_locale:
+            self.collation_locale = collation_locale
+            if collation_locale in ('C', 'POSIX') or collation_locale.startswith('C.'):
+                # These locales collate by codepoint, which is the order of plain strings.
+                self.collation_key = None
+            else:
+                self.collation_key = lru_cache(maxsize=COLLATION_CACHE_SIZE)(locale.strxfrm)
 
     def _run_on_input_files(self, files):
         if not files:
             if self.config.immediate_dirs:
                 self._gobble_file('.', FileType.DIRECTORY, True, '')
             else:
-                self.pending_dirs.append(('.', '', True))
+                self.pending_dirs.append(('.', '', True, 0))
         else:
             for file in files:
                 self._gobble_file(file, FileType.UNKNOWN, True, '')
 
     def _run_on_dirs(self):
         while self.pending_dirs:
-            name, real_name, command_line_arg = self.pending_dirs.pop()
-            if self.active_dir_set is not None and not name:
-                di = self.dev_ino_stack.pop()
-                self.active_dir_set.remove(di)
+            name, real_name, command_line_arg, depth = self.pending_dirs.pop()
+            if self.traversal.detect_cycles and not name:
+                self.traversal.leave_dir()
                 continue
-            self._print_dir(name, real_name, command_line_arg)
+            self._print_dir(name, real_name, command_line_arg, depth)
             self.print_dir_name = True
 
+    @timed_phase
+    def _finish_index(self):
+        try:
+            if self.config.diff_index is not None:
+                with self.stub.open(self.config.diff_index, 'rb') as index_file:
+                    for status, record in diff_records(read_records(index_file), self.index_writer.records()):
+                        self._print(f'{status} {os.fsdecode(record.path)}')
+            if self.config.write_index is not None:
+                with self.stub.open(self.config.write_index, 'wb') as index_file:
+                    write_records(index_file, self.index_writer.records())
+        except OSError as e:
+            self._print(f'ls: cannot use index \'{os.fsdecode(e.filename)}\': {e.strerror}')
+        except ValueError as e:
+            self._print(f'ls: cannot use index \'{self.config.diff_index}\': {e}')
+        finally:
+            self.index_writer.close()
+
+    def _print(self, data, end='\n'):
+        if self.bytes_mode:
+            self.stub.write(os.fsencode(data) + os.fsencode(end))
+        else:
+            self.stub.print(data, end=end)
+
     # Methods related to iterating the current directory.
 
     def _clear_current_dir_files(self):
         self.files = []
+        self.filtered_dirs = []
+        self.dir_summary = LsSummary()
         self.inode_number_width = 0
         self.block_size_width = 0
         self.nlink_width = 0
@@ -501,43 +713,41 @@ class Ls:
         self.minor_device_number_width = 0
         self.file_size_width = 0
 
-    def _print_dir(self, name, realname, command_line_arg):
+    @timed_phase
+    def _print_dir(self, name, realname, command_line_arg, depth):
         if self._stop_if_dir_visited(name):
             return
         self._clear_current_dir_files()
-        if self.config.recursive or self.print_dir_name:
+        if self.print_listing and (self.config.recursive or self.print_dir_name):
             if not self.first_print_dir:
-                self.stub.print('')
+                self._print('')
             self.first_print_dir = False
-            self.stub.print(f'{realname if realname else name}:')
+            self._print(f'{os.fsdecode(realname if realname else name)}:')
         total_blocks = 0
-        for entry_name in chain(('.', '..'), self.stub.listdir(name)):
+        for entry_name in chain(self.dot_entries, self.stub.listdir(name)):
             total_blocks += self._handle_current_dir_entry(entry_name, name)
         self._sort_files()
         if self.config.recursive:
-            self._extract_dirs_from_files(name, False)
-        if self.config.format == Formats.LONG_FORMAT or self.config.print_block_size:
+            self._extract_dirs_from_files(name, False, depth + 1)
+        if self.print_listing and not self.config.summary and (
+                self.config.format == Formats.LONG_FORMAT or self.config.print_block_size):
             size = human_size(
                 total_blocks, self.config.human_output_opts, self.stub.st_nblocksize, self.config.output_block_size
             )
-            self.stub.print(f'total {size}')
-        if self.files:
+            self._print(f'total {size}')
+        if self.files or self.config.summary:
             self._print_current_files()
 
     def _stop_if_dir_visited(self, name):
-        if self.active_dir_set is None:
+        if not self.traversal.detect_cycles:
             return False
-        dir_stat = self.stub.stat(name, follow_symlinks=True)
-        if (dir_stat.st_dev, dir_stat.st_ino) in self.active_dir_set:
-            self.stub.print(f'ls: {name}: not listing already-listed directory')
+        if not self.traversal.enter_dir(self.stub.stat(name, follow_symlinks=True)):
+            self._print(f'ls: {os.fsdecode(name)}: not listing already-listed directory')
             return True
-        else:
-            self.active_dir_set.add((dir_stat.st_dev, dir_stat.st_ino))
-            self.dev_ino_stack.append((dir_stat.st_dev, dir_stat.st_ino))
-            return False
+        return False
 
     def _handle_current_dir_entry(self, entry_name, dir_name):
-        if self._file_ignored(entry_name):
+        if self.traversal.ignored(entry_name):
             return 0
         try:
             entry_stat = self.stub.stat(self.stub.join(dir_name, entry_name), follow_symlinks=False)
@@ -546,26 +756,35 @@ class Ls:
             d_type = FileType.UNKNOWN
         total_blocks = self._gobble_file(entry_name, d_type, False, dir_name)
         if (self.config.format == Formats.ONE_PER_LINE and self.config.sort_type == SortType.NONE
-                and not self.config.print_block_size and not self.config.recursive):
+                and not self.config.print_block_size and not self.config.recursive and not self.config.summary
+                and self.print_listing):
             self._print_current_files()
             self._clear_current_dir_files()
         return total_blocks
 
-    def _extract_dirs_from_files(self, dirname, command_line_arg):
-        if dirname and self.active_dir_set is not None:
-            self.pending_dirs.append(('', dirname, False))
-        for i in range(len(self.files) - 1, -1, -1):
-            file = self.files[i]
-            if file.is_directory() and (not dirname or not self.stub.basename(file.name) in ('.', '..')):
-                if not dirname or file.name[0] == self.stub.sep:
-                    self.pending_dirs.append((file.name, file.linkname, command_line_arg))
+    def _extract_dirs_from_files(self, dirname, command_line_arg, depth):
+        if dirname and self.traversal.detect_cycles:
+            self.pending_dirs.append(('', dirname, False, depth))
+        files = self.files
+        if self.filtered_dirs:
+            # Directories hidden by the filter are not listed but still have to be traversed, in listing order.
+            files = self.files + self.filtered_dirs
+            self._sort_files(files)
+        for i in range(len(files) - 1, -1, -1):
+            file = files[i]
+            if file.is_directory() and (not dirname or not self.stub.basename(file.name) in self.dot_entries):
+                if not dirname or file.name[:1] == self.sep:
+                    name = file.name
                 else:
                     name = self.stub.join(dirname, file.name)
-                    self.pending_dirs.append((name, file.linkname, command_line_arg))
+                if not dirname or not self.traversal.pruned(file.name, name, depth):
+                    self.pending_dirs.append((name, file.linkname, command_line_arg, depth))
                 if file.filetype == FileType.ARG_DIRECTORY:
-                    del self.files[i]
+                    del files[i]
 
-    def _sort_files(self):
+    @timed_phase
+    def _sort_files(self, files=None):
+        files = self.files if files is None else files
         if self.config.sort_type == SortType.NONE:
             return
         if self.config.sort_type == SortType.TIME:
@@ -575,38 +794,57 @@ class Ls:
                 TimeType.ATIME: lambda file: -file.stat.st_atime if file.stat is not None else 0,
                 TimeType.BTIME: lambda file: -self._get_btime(file.stat) if file.stat is not None else 0,
             }[self.config.time_type]
+        elif self.config.sort_type == SortType.NAME:
+            collation_key = self.collation_key
+            if collation_key is None:
+                sort_function = attrgetter('name')
+            elif self.bytes_mode:
+                sort_function = lambda file: collation_key(os.fsdecode(file.name))  # noqa: E731
+            else:
+                sort_function = lambda file: collation_key(file.name)  # noqa: E731
         else:
             sort_function = {
-                SortType.NAME: lambda file: locale.strxfrm(file.name),
-                SortType.EXTENSION: lambda file: file.name.split('.')[-1] if '.' in file.name else '',
+                SortType.EXTENSION: lambda file: get_extension(file.name),
                 SortType.WIDTH: lambda file: -len(file.name),
                 SortType.SIZE: lambda file: -file.stat.st_size if file.stat is not None else 0,
-                SortType.VERSION: cmp_to_key(lambda file1, file2: filevercmp(file1.name, file2.name)),
+                SortType.VERSION: cmp_to_key(
+                    lambda file1, file2: filevercmp(os.fsdecode(file1.name), os.fsdecode(file2.name))
+                ),
             }[self.config.sort_type]
-        self.files.sort(key=sort_function, reverse=self.config.sort_reverse)
+        files.sort(key=sort_function, reverse=self.config.sort_reverse)
         if self.config.directories_first:
-            self.files.sort(key=lambda file: file.is_linked_directory(), reverse=True)
+            files.sort(key=lambda file: file.is_linked_directory(), reverse=True)
 
     # Methods related to iterating a specific file.
 
     def _gobble_file(self, name: str, type_: FileType, command_line_arg: bool, dirname: str):
         file_info = FileInfo(name)
         file_info.filetype = type_
-        if name[0] != self.stub.sep and dirname:
+        if name[:1] != self.sep and dirname:
             name = self.stub.join(dirname, name)
 
         file_info.absolute_name = self.stub.abspath(name)
 
         try:
-            file_info.stat = self._stat_with_dereference_config(name, command_line_arg)
+            file_info.stat = self.traversal.stat(name, command_line_arg)
         except OSError as e:
-            self.stub.print(f'ls: cannot access \'{name}\': {e.strerror}')
+            self._print(f'ls: cannot access \'{os.fsdecode(name)}\': {e.strerror}')
             if not command_line_arg:
                 self.files.append(file_info)
             return 0
 
-        self._add_symlink_mode(file_info, name)
         self._add_file_type(file_info, command_line_arg)
+        if not command_line_arg and self._file_filtered(file_info):
+            if self.config.recursive and file_info.is_directory():
+                self.filtered_dirs.append(file_info)
+            return 0
+        # The . and .. entries of -a listings are the directory itself, already indexed, and its parent, which changes
+        # with every sibling.
+        if self.index_writer is not None and (command_line_arg or file_info.name not in ('.', '..', b'.', b'..')):
+            self.index_writer.add(os.fsencode(name), file_info.stat)
+        if self.config.summary:
+            return self._gobble_summary(file_info, command_line_arg)
+        self._add_symlink_mode(file_info, name)
 
         if self.config.format == Formats.LONG_FORMAT or self.config.print_block_size:
             size = human_size(self.stub.st_nblocks(file_info.stat), self.config.human_output_opts,
@@ -620,16 +858,17 @@ class Ls:
         self.files.append(file_info)
         return self.stub.st_nblocks(file_info.stat)
 
-    def _stat_with_dereference_config(self, name, command_line_arg):
-        if self.config.dereference == DereferenceSymlink.ALWAYS:
-            do_deref = True
-        elif self.config.dereference == DereferenceSymlink.COMMAND_LINE_ARGUMENTS:
-            do_deref = command_line_arg
-        elif self.config.dereference == DereferenceSymlink.COMMAND_LINE_SYMLINK_TO_DIR:
-            do_deref = command_line_arg and S_ISDIR(self.stub.stat(name).st_mode)
-        else:
-            do_deref = False
-        return self.stub.stat(name, follow_symlinks=do_deref)
+    def _gobble_summary(self, file_info, command_line_arg):
+        blocks = self.stub.st_nblocks(file_info.stat)
+        if file_info.filetype == FileType.ARG_DIRECTORY:
+            self.files.append(file_info)
+            return blocks
+        name = self.stub.basename(file_info.name) if command_line_arg else file_info.name
+        self.dir_summary.add(file_info.filetype, get_extension(name), file_info.stat.st_size, blocks)
+        # Only directories that are about to be traversed are retained.
+        if self.config.recursive and file_info.is_directory():
+            self.files.append(file_info)
+        return blocks
 
     def _add_symlink_mode(self, file_info, name):
         if S_ISLNK(file_info.stat.st_mode) and (self.config.format == Formats.LONG_FORMAT or self.check_symlink_mode):
@@ -638,7 +877,11 @@ class Ls:
             if not self.stub.isabs(file_info.linkname):
                 link_name = self.stub.join(self.stub.dirname(name), file_info.linkname)
             if link_name and (self.check_symlink_mode or self.config.indicator_style != IndicatorStyle.NONE):
-                file_info.linkmode = self.stub.stat(link_name).st_mode
+                try:
+                    file_info.linkmode = self.stub.stat(link_name).st_mode
+                except OSError:
+                    # A dangling link, its mode stays 0.
+                    pass
 
     def _add_file_type(self, file_info, command_line_arg):
         if S_ISLNK(file_info.stat.st_mode):
@@ -650,6 +893,13 @@ class Ls:
         else:
             file_info.filetype = FileType.NORMAL
 
+    def _file_filtered(self, file_info):
+        file_filter = self.config.file_filter
+        if file_filter is None:
+            return False
+        timestamp = self._get_time(file_info.stat) if file_filter.filters_time else None
+        return not file_filter.matches(file_info, timestamp)
+
     def _gobble_long_format(self, file_info):
         if self.config.print_owner:
             self.owner_width = max(self.owner_width, len(self._format_user(file_info.stat)))
@@ -675,22 +925,17 @@ class Ls:
             ))
             self.file_size_width = max(self.file_size_width, size_length)
 
-    def _file_ignored(self, name: str):
-        for pattern in self.config.ignore_patterns:
-            if fnmatch.fnmatch(name, pattern):
-                return True
-
-        if self.config.ignore_mode == IgnoreMode.DEFAULT:
-            for pattern in self.config.hide_patterns:
-                if fnmatch.fnmatch(name, pattern):
-                    return True
+    def _get_time(self, stat):
+        return self.time_getter(stat)
 
-        if self.config.ignore_mode == IgnoreMode.MINIMAL:
-            return False
-        if self.config.ignore_mode == IgnoreMode.DOT_AND_DOTDOT:
-            return name in ('.', '..')
-        if self.config.ignore_mode == IgnoreMode.DEFAULT:
-            return name.startswith('.')
+    def _compile_time_getter(self):
+        if self.config.time_type == TimeType.CTIME:
+            return attrgetter('st_ctime')
+        if self.config.time_type == TimeType.MTIME:
+            return attrgetter('st_mtime')
+        if self.config.time_type == TimeType.ATIME:
+            return attrgetter('st_atime')
+        return self._get_btime
 
     def _get_btime(self, stat):
         if hasattr(stat, 'st_birthtime'):
@@ -701,10 +946,16 @@ class Ls:
 
     # Methods related to formatting and printing.
 
+    @timed_phase
     def _print_current_files(self):
-        if self.config.format == Formats.ONE_PER_LINE:
+        if not self.print_listing:
+            return
+        if self.config.summary:
+            self._print_summary_lines(self.dir_summary)
+            self.tree_summary.update(self.dir_summary)
+        elif self.config.format == Formats.ONE_PER_LINE:
             for file in self.files:
-                self.stub.print(self._format_file_name_and_frills(file))
+                self._print(self._format_file_name_and_frills(file))
         elif self.config.format == Formats.MANY_PER_LINE:
             if not self.config.line_length:
                 self._print_with_separator(' ')
@@ -718,24 +969,47 @@ class Ls:
         elif self.config.format == Formats.WITH_COMMAS:
             self._print_with_separator(',')
         elif self.config.format == Formats.LONG_FORMAT:
-            for file in self.files:
-                self._print_long_format(file)
+            renderers = [bind() for bind in self.long_format_plan]
+            if self.bytes_mode:
+                # Only the last field, the name, is bytes.
+                *renderers, render_name = renderers
+                for file in self.files:
+                    self._print(os.fsencode(''.join([render(file) for render in renderers])) + render_name(file))
+            else:
+                for file in self.files:
+                    self.stub.print(''.join([render(file) for render in renderers]))
+
+    def _print_summary_lines(self, summary):
+        self._print(self._format_summary_line('total', summary.count, summary.size, summary.blocks))
+        for filetype, (count, size, blocks) in sorted(summary.by_type.items(), key=lambda item: item[0].value):
+            self._print(self._format_summary_line(f'type {filetype.name.lower()}', count, size, blocks))
+        for extension, (count, size, blocks) in sorted(summary.by_extension.items()):
+            extension = os.fsdecode(extension) or '(none)'
+            self._print(self._format_summary_line(f'extension {extension}', count, size, blocks))
+
+    def _format_summary_line(self, label, count, size, blocks):
+        size = human_size(size, self.config.file_human_output_opts, to_block_size=self.config.file_output_block_size)
+        blocks = human_size(blocks, self.config.human_output_opts, self.stub.st_nblocksize, self.config.output_block_size)
+        return f'{label}: {count} entries, size {size}, blocks {blocks}'
 
     def _print_with_separator(self, sep):
         pos = 0
-        data = ''
+        parts = []
+        line_break, separator = f'{sep}\n', f'{sep} '
+        if self.bytes_mode:
+            line_break, separator = line_break.encode(), separator.encode()
         for file in self.files:
-            formatted = self._format_file_name_and_frills(file)
-            if not data:
-                data = formatted
-                pos = len(formatted)
-            elif self.config.line_length and (pos + len(formatted) + 2) >= self.config.line_length:
-                data += f'{sep}\n{formatted}'
-                pos = len(formatted)
+            formatted, width = self._format_file_name_and_frills_with_width(file)
+            if not parts:
+                pos = width
+            elif self.config.line_length and (pos + width + 2) >= self.config.line_length:
+                parts.append(line_break)
+                pos = width
             else:
-                data += f'{sep} {formatted}'
-                pos += len(formatted) + 2
-        self.stub.print(data)
+                parts.append(separator)
+                pos += width + 2
+            parts.append(formatted)
+        self._print(b''.join(parts) if self.bytes_mode else ''.join(parts))
 
     def _print_many_per_line(self):
         cols, column_info = self._calculate_columns(True)
@@ -745,66 +1019,31 @@ class Ls:
             i = 0
             from_ = 0
             while f < len(self.files):
-                file = self.files[f]
-                self.stub.print(
-                    self._indent(self._format_file_name_and_frills(file), from_, from_ + column_info[i]), end=''
-                )
+                formatted, width = self._format_file_name_and_frills_with_width(self.files[f])
+                self._print(self._indent(formatted, width, from_, from_ + column_info[i]), end='')
                 from_ += column_info[i]
                 f += rows
                 i += 1
-            self.stub.print('')
+            self._print('')
 
     def _print_horizontal(self):
         cols, column_info = self._calculate_columns(False)
         pos = 0
         for filesno, file in enumerate(self.files):
             col = filesno % cols
-            indented = self._indent(self._format_file_name_and_frills(file), pos, pos + column_info[col])
+            formatted, width = self._format_file_name_and_frills_with_width(file)
+            indented = self._indent(formatted, width, pos, pos + column_info[col])
             if col == cols - 1 and filesno != len(self.files) - 1:
-                self.stub.print(indented)
+                self._print(indented)
                 pos = 0
             else:
-                self.stub.print(indented, end='')
+                self._print(indented, end='')
                 pos += column_info[col]
-        self.stub.print('')
-
-    def _print_long_format(self, file: FileInfo):
-        stat = file.stat
-        modebuf = filemode(stat.st_mode) if stat is not None else '?pcdb-lswd'[file.filetype.value].ljust(10, '?')
-        print_buf = self._format_inode(stat)
-        print_buf += self._format_block_size(stat)
-        print_buf += f'''{modebuf} {stat.st_nlink if stat is not None else '?':>{self.nlink_width}} '''
-        # print_owner || print_group || print_author || print_scontext
-        fill_direction = '>' if self.config.numeric_ids and stat is not None else '<'
-        if self.config.print_owner:
-            print_buf += f'{self._format_user(stat):{fill_direction}{self.owner_width}s} '
-        if self.config.print_group:
-            print_buf += f'{self._format_group(stat):{fill_direction}{self.group_width}s} '
-        if self.config.print_author:
-            print_buf += f'{self._format_user(stat):{fill_direction}{self.author_width}s} '
-        if stat is not None and (S_ISCHR(stat.st_mode) or S_ISBLK(stat.st_mode)):
-            blanks_width = self.file_size_width - self.major_device_number_width - self.minor_device_number_width - 2
-            major_pad = self.major_device_number_width + max(0, blanks_width)
-            print_buf += (f'{self.stub.major(stat.st_rdev):>{major_pad}d}, '
-                          f'{self.stub.minor(stat.st_rdev):>{self.minor_device_number_width}d} ')
-        else:
-            size = '?' if stat is None else human_size(file.stat.st_size, self.config.file_human_output_opts,
-                                                       to_block_size=self.config.file_output_block_size)
-            print_buf += f'{size:>{self.file_size_width}s} '
-        print_buf += self._format_long_time(stat)
-        # TODO: quotes
-        print_buf += file.name
-        if file.filetype == FileType.SYMBOLIC_LINK and file.linkname:
-            print_buf += f' -> {file.linkname}{self._format_type_indicator(True, file.linkmode, FileType.UNKNOWN)}'
-        else:
-            print_buf += self._format_type_indicator(
-                stat is not None,
-                stat.st_mode if stat is not None else 0, file.filetype)
-        self.stub.print(print_buf)
+        self._print('')
 
-    def _indent(self, formatted_data, from_, to):
+    def _indent(self, formatted_data, width, from_, to):
         pad = ''
-        from_ += len(formatted_data)
+        from_ += width
         while from_ < to:
             if self.config.tabsize and to // self.config.tabsize > (from_ + 1) // self.config.tabsize:
                 pad += '\t'
@@ -812,15 +1051,16 @@ class Ls:
             else:
                 pad += ' '
                 from_ += 1
-        return formatted_data + pad
+        return formatted_data + (pad.encode() if self.bytes_mode else pad)
 
+    @timed_phase
     def _calculate_columns(self, by_columns):
         max_cols = self.max_idx if self.max_idx and self.max_idx < len(self.files) else len(self.files)
         column_info = [[MIN_COLUMN_WIDTH for _ in range(self.max_idx * (self.max_idx + 1) // 2)] for _ in
                        range(max_cols)]
         line_lengths = [(i + 1) * MIN_COLUMN_WIDTH for i in range(max_cols)]
         for f, file in enumerate(self.files):
-            name_length = len(self._format_file_name_and_frills(file))
+            name_length = len(self._format_file_name_and_frills(file, color=False))
             for i in range(max_cols):
                 idx = (f // ((len(self.files) + 1) // (i + 1))) if by_columns else f % (i + 1)
                 real_length = name_length
@@ -838,6 +1078,154 @@ class Ls:
 
         return cols, column_info[cols if by_columns else cols - 1]
 
+    # Methods related to the long format row plan.
+
+    def _compile_long_format_plan(self):
+        """
+        Pick the fields of a long format row once per run. Each field is a binder returning a renderer of that field
+        specialized for the widths of the current directory.
+        """
+        plan = []
+        if self.config.colors is not None and self.config.colors.is_colored('no'):
+            plan.append(lambda: lambda file: self._normal_color())
+        if self.config.print_inode:
+            plan.append(self._bind_inode_field)
+        if self.config.print_block_size:
+            plan.append(self._bind_block_size_field)
+        plan.append(self._bind_mode_field)
+        if self.config.print_owner:
+            plan.append(lambda: self._bind_id_field(self.owner_width, attrgetter('st_uid'), self.stub.getuser))
+        if self.config.print_group:
+            plan.append(lambda: self._bind_id_field(self.group_width, attrgetter('st_gid'), self.stub.getgroup))
+        if self.config.print_author:
+            # Use st_uid since there isn't ant st_author in python.
+            plan.append(lambda: self._bind_id_field(self.author_width, attrgetter('st_uid'), self.stub.getuser))
+        plan.append(self._bind_size_field)
+        plan.append(self._bind_time_field)
+        plan.append(self._bind_name_field)
+        return plan
+
+    def _bind_inode_field(self):
+        width = self.inode_number_width
+
+        def render(file):
+            stat = file.stat
+            return (str(stat.st_ino) if stat is not None and stat.st_ino else '?').rjust(width) + ' '
+
+        return render
+
+    def _bind_block_size_field(self):
+        width = self.block_size_width
+        st_nblocks = self.stub.st_nblocks
+        opts, from_block_size, to_block_size = (
+            self.config.human_output_opts, self.stub.st_nblocksize, self.config.output_block_size
+        )
+
+        def render(file):
+            stat = file.stat
+            size = '?' if stat is None else human_size(st_nblocks(stat), opts, from_block_size, to_block_size)
+            return size.rjust(width) + ' '
+
+        return render
+
+    def _bind_mode_field(self):
+        width = self.nlink_width
+
+        def render(file):
+            stat = file.stat
+            if stat is None:
+                return '?pcdb-lswd'[file.filetype.value].ljust(10, '?') + ' ' + '?'.rjust(width) + ' '
+            return f'{filemode(stat.st_mode)} {str(stat.st_nlink).rjust(width)} '
+
+        return render
+
+    def _bind_id_field(self, width, get_id, get_name):
+        if self.config.numeric_ids:
+            def render(file):
+                stat = file.stat
+                return ('?'.ljust(width) if stat is None else str(get_id(stat)).rjust(width)) + ' '
+        else:
+            def render(file):
+                stat = file.stat
+                return ('?' if stat is None else get_name(get_id(stat))).ljust(width) + ' '
+        return render
+
+    def _bind_size_field(self):
+        width = self.file_size_width
+        minor_width = self.minor_device_number_width
+        major_width = self.major_device_number_width + max(0, width - self.major_device_number_width - minor_width - 2)
+        major, minor = self.stub.major, self.stub.minor
+        opts, block_size = self.config.file_human_output_opts, self.config.file_output_block_size
+        plain = not opts and block_size == 1
+
+        def render(file):
+            stat = file.stat
+            if stat is None:
+                return '?'.rjust(width) + ' '
+            if S_ISCHR(stat.st_mode) or S_ISBLK(stat.st_mode):
+                return f'{str(major(stat.st_rdev)).rjust(major_width)}, {str(minor(stat.st_rdev)).rjust(minor_width)} '
+            size = str(stat.st_size) if plain else human_size(stat.st_size, opts, to_block_size=block_size)
+            return size.rjust(width) + ' '
+
+        return render
+
+    def _bind_time_field(self):
+        format_long_time = self.long_time_formatter
+        return lambda file: format_long_time(file.stat)
+
+    def _bind_name_field(self):
+        if self.config.colors is not None:
+            return self._bind_colored_name_field()
+        if self.bytes_mode:
+            return self._bind_bytes_name_field()
+        if self.config.indicator_style == IndicatorStyle.NONE:
+            def render(file):
+                # TODO: quotes
+                if file.filetype == FileType.SYMBOLIC_LINK and file.linkname:
+                    return f'{file.name} -> {file.linkname}'
+                return file.name
+            return render
+
+        format_type_indicator = self._format_type_indicator
+
+        def render(file):
+            if file.filetype == FileType.SYMBOLIC_LINK and file.linkname:
+                return f'{file.name} -> {file.linkname}{format_type_indicator(True, file.linkmode, FileType.UNKNOWN)}'
+            stat = file.stat
+            if stat is None:
+                return file.name + format_type_indicator(False, 0, file.filetype)
+            return file.name + format_type_indicator(True, stat.st_mode, file.filetype)
+
+        return render
+
+    def _bind_bytes_name_field(self):
+        format_type_indicator = self._format_type_indicator
+
+        def render(file):
+            if file.filetype == FileType.SYMBOLIC_LINK and file.linkname:
+                indicator = format_type_indicator(True, file.linkmode, FileType.UNKNOWN)
+                return file.name + b' -> ' + file.linkname + indicator.encode()
+            stat = file.stat
+            indicator = format_type_indicator(stat is not None, 0 if stat is None else stat.st_mode, file.filetype)
+            return file.name + indicator.encode()
+
+        return render
+
+    def _bind_colored_name_field(self):
+        format_type_indicator = self._format_type_indicator
+        color_name = self._color_name
+        convert, arrow = (str.encode, b' -> ') if self.bytes_mode else (str, ' -> ')
+
+        def render(file):
+            if file.filetype == FileType.SYMBOLIC_LINK and file.linkname:
+                indicator = format_type_indicator(True, file.linkmode, FileType.UNKNOWN)
+                return color_name(file) + arrow + color_name(file, True) + convert(indicator)
+            stat = file.stat
+            indicator = format_type_indicator(stat is not None, 0 if stat is None else stat.st_mode, file.filetype)
+            return color_name(file) + convert(indicator)
+
+        return render
+
     def _format_group(self, stat):
         if stat is None:
             return '?'
@@ -848,12 +1236,103 @@ class Ls:
             return '?'
         return str(stat.st_uid) if self.config.numeric_ids else self.stub.getuser(stat.st_uid)
 
-    def _format_file_name_and_frills(self, file: FileInfo):
-        print_buf = self._format_inode(file.stat)
+    def _format_file_name_and_frills(self, file: FileInfo, color=True):
+        print_buf = self._normal_color() if color else ''
+        print_buf += self._format_inode(file.stat)
         print_buf += self._format_block_size(file.stat)
-        print_buf += file.name
-        print_buf += self._format_type_indicator(file.stat_ok, file.stat.st_mode if file.stat_ok else 0, file.filetype)
-        return print_buf
+        name = self._color_name(file) if color and self.config.colors is not None else file.name
+        indicator = self._format_type_indicator(file.stat_ok, file.stat.st_mode if file.stat_ok else 0, file.filetype)
+        if self.bytes_mode:
+            return print_buf.encode() + name + indicator.encode()
+        return print_buf + name + indicator
+
+    def _format_file_name_and_frills_with_width(self, file: FileInfo):
+        formatted = self._format_file_name_and_frills(file)
+        if self.config.colors is None:
+            return formatted, len(formatted)
+        # Escape sequences take no room on the terminal.
+        return formatted, len(self._format_file_name_and_frills(file, color=False))
+
+    def _color_name(self, file: FileInfo, target=False):
+        """ Wrap the name of `file`, or of its link target, with the escape sequences of its color. """
+        name = file.linkname if target else file.name
+        color = self._get_color(file, name, target)
+        colors = self.config.colors
+        if color is not None:
+            start = self._put_color_sequence(colors.sequence(color))
+        elif colors.is_colored('no'):
+            start = ''
+        else:
+            return name
+        if self.bytes_mode:
+            return os.fsencode(start) + name + os.fsencode(colors.end_sequence)
+        return start + name + colors.end_sequence
+
+    def _normal_color(self):
+        colors = self.config.colors
+        if colors is None or not colors.is_colored('no'):
+            return ''
+        return self._put_color_sequence(colors.normal_sequence)
+
+    def _put_color_sequence(self, sequence):
+        if not self.used_color:
+            # Start from the normal color before the first escape sequence.
+            self.used_color = True
+            return self.config.colors.end_sequence + sequence
+        return sequence
+
+    def _get_color(self, file, name, target):
+        colors = self.config.colors
+        stat = file.stat
+        link_ok = file.filetype == FileType.SYMBOLIC_LINK and bool(file.linkmode)
+        if target:
+            mode = file.linkmode
+        else:
+            mode = file.linkmode if colors.link_as_target and link_ok else (0 if stat is None else stat.st_mode)
+        if target and not file.linkmode and colors.is_colored('mi'):
+            code = 'mi'
+        elif stat is None:
+            code = FILE_TYPE_COLORS[file.filetype]
+        elif S_ISREG(mode):
+            code = 'fi'
+            if mode & S_ISUID and colors.is_colored('su'):
+                code = 'su'
+            elif mode & S_ISGID and colors.is_colored('sg'):
+                code = 'sg'
+            elif mode & (S_IXUSR | S_IXGRP | S_IXOTH) and colors.is_colored('ex'):
+                code = 'ex'
+            elif stat.st_nlink > 1 and colors.is_colored('mh'):
+                code = 'mh'
+        elif S_ISDIR(mode):
+            code = 'di'
+            if mode & S_ISVTX and mode & S_IWOTH and colors.is_colored('tw'):
+                code = 'tw'
+            elif mode & S_IWOTH and colors.is_colored('ow'):
+                code = 'ow'
+            elif mode & S_ISVTX and colors.is_colored('st'):
+                code = 'st'
+        elif S_ISLNK(mode):
+            code = 'ln'
+        elif S_ISFIFO(mode):
+            code = 'pi'
+        elif S_ISSOCK(mode):
+            code = 'so'
+        elif S_ISBLK(mode):
+            code = 'bd'
+        elif S_ISCHR(mode):
+            code = 'cd'
+        elif S_ISDOOR(mode):
+            code = 'do'
+        else:
+            code = 'or'
+
+        if code == 'fi':
+            suffix_color = colors.suffix_color(os.fsdecode(name))
+            if suffix_color is not None:
+                return suffix_color
+        if code == 'ln' and not link_ok and (colors.link_as_target or colors.is_colored('or')):
+            code = 'or'
+        return colors.indicators[code]
 
     def _format_inode(self, stat):
         if not self.config.print_inode:
@@ -871,22 +1350,63 @@ class Ls:
         return f'{size:>{length}s} '
 
     def _format_long_time(self, stat):
-        if stat is None:
-            return '?'.rjust(len(self.stub.now().strftime(self.config.long_format_recent))) + ' '
-        if self.config.time_type == TimeType.CTIME:
-            when_timespec = datetime.fromtimestamp(stat.st_ctime)
-        elif self.config.time_type == TimeType.MTIME:
-            when_timespec = datetime.fromtimestamp(stat.st_mtime)
-        elif self.config.time_type == TimeType.ATIME:
-            when_timespec = datetime.fromtimestamp(stat.st_atime)
-        elif self.config.time_type == TimeType.BTIME and self._get_btime(stat):
-            when_timespec = datetime.fromtimestamp(self._get_btime(stat))
-        else:
-            raise ValueError()
-        recent = when_timespec > self.stub.now() - SIX_MONTH_DELTA
-        time_format = self.config.long_format_recent if recent else self.config.long_format_not_recent
-        time_str = time_format.format(when_timespec)
-        return f'{time_str} '
+        return self.long_time_formatter(stat)
+
+    def _compile_long_time_formatter(self):
+        """
+        Choose how times are formatted for this run. The current time is fixed once, and formatted times are cached by
+        the finest unit the time style shows.
+        """
+        recent_format, not_recent_format = self.config.long_format_recent, self.config.long_format_not_recent
+        current_time = self.stub.now()
+        recent_cutoff = (current_time - SIX_MONTH_DELTA).timestamp()
+        empty_time = '?'.rjust(len(recent_format.format(current_time))) + ' '
+        get_time = self.time_getter
+        check_btime = self.config.time_type == TimeType.BTIME
+        cache = {}
+
+        if recent_format == not_recent_format == FULL_ISO_FORMAT and not check_btime:
+            time_ns_name = f'st_{self.config.time_type.name[0].lower()}time_ns'
+
+            def format_time(stat):
+                if stat is None:
+                    return empty_time
+                time_ns = getattr(stat, time_ns_name, None)
+                if time_ns is None:
+                    # Stubs may only provide the float times.
+                    time_ns = int(get_time(stat) * 1000000000)
+                seconds, nanoseconds = divmod(time_ns, 1000000000)
+                prefix = cache.get(seconds)
+                if prefix is None:
+                    if len(cache) >= TIME_CACHE_SIZE:
+                        cache.clear()
+                    # `%z` is empty for the naive datetimes returned by `fromtimestamp`.
+                    prefix = cache[seconds] = f'{datetime.fromtimestamp(seconds):%Y-%m-%d %H:%M:%S}.'
+                return f'{prefix}{nanoseconds // 1000:06d}  '
+
+            return format_time
+
+        cache_by_minute = recent_format in MINUTE_TIME_FORMATS and not_recent_format in MINUTE_TIME_FORMATS
+
+        def format_time(stat):
+            if stat is None:
+                return empty_time
+            timestamp = get_time(stat)
+            if check_btime and not timestamp:
+                raise ValueError()
+            recent = timestamp > recent_cutoff
+            if not cache_by_minute:
+                return (recent_format if recent else not_recent_format).format(datetime.fromtimestamp(timestamp)) + ' '
+            key = (timestamp // 60, recent)
+            time_str = cache.get(key)
+            if time_str is None:
+                if len(cache) >= TIME_CACHE_SIZE:
+                    cache.clear()
+                time_format = recent_format if recent else not_recent_format
+                time_str = cache[key] = time_format.format(datetime.fromtimestamp(timestamp)) + ' '
+            return time_str
+
+        return format_time
 
     def _format_type_indicator(self, stat_ok, mode, filetype):
         if self.config.indicator_style == IndicatorStyle.NONE:
@@ -920,7 +1440,8 @@ class Ls:
                  literal=False, owner_only=False, indicator_slash=False, reverse=False, recursive=False, size=False,
                  size_sort=False, sort: SortType = None, time: TimeType = None, time_style: TimeStyle = None,
                  time_sort=False, tabsize=0, atime=False, unsort=False, version_sort=False, width=-1, horizontal=False,
-                 extension_sort=False, one_per_line=False):
+                 extension_sort=False, one_per_line=False, max_depth=-1, prune=None, summary=False,
+                 color: WhenType = None, write_index=None, diff_index=None):
         config = LsConfig.from_cli_params(
             self.stub,
             all_=all_,
@@ -970,5 +1491,11 @@ class Ls:
             horizontal=horizontal,
             extension_sort=extension_sort,
             one_per_line=one_per_line,
+            max_depth=max_depth,
+            prune=prune,
+            summary=summary,
+            color=color,
+            write_index=write_index,
+            diff_index=diff_index,
         )
         self.run(*files, config=config)
@@ -0,0 +1,153 @@
+DEFAULT_INDICATORS = {
+    'lc': '\033[',  # Left of color sequence
+    'rc': 'm',  # Right of color sequence
+    'ec': None,  # End color (replaces lc+rs+rc)
+    'rs': '0',  # Reset to ordinary colors
+    'no': None,  # Normal
+    'fi': None,  # File: default
+    'di': '01;34',  # Directory: bright blue
+    'ln': '01;36',  # Symlink: bright cyan
+    'pi': '33',  # Pipe: yellow/brown
+    'so': '01;35',  # Socket: bright magenta
+    'bd': '01;33',  # Block device: bright yellow
+    'cd': '01;33',  # Char device: bright yellow
+    'mi': None,  # Missing file: undefined
+    'or': None,  # Orphaned symlink: undefined
+    'ex': '01;32',  # Executable: bright green
+    'do': '01;35',  # Door: bright magenta
+    'su': '37;41',  # setuid: white on red
+    'sg': '30;43',  # setgid: black on yellow
+    'st': '37;44',  # sticky: black on blue
+    'ow': '34;42',  # other-writable: blue on green
+    'tw': '30;42',  # ow w/ sticky: black on green
+    'ca': None,  # disabled by default
+    'mh': None,  # disabled by default
+    'cl': '\033[K',  # clear to end of line
+}
+
+SIMPLE_ESCAPES = {
+    'a': '\a', 'b': '\b', 'e': '\033', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v', '?': '\177', '_': ' ',
+}
+
+
+def _unescape(value):
+    """ Decode the backslash and caret escapes of an LS_COLORS value. """
+    result = []
+    i = 0
+    while i < len(value):
+        char = value[i]
+        i += 1
+        if char == '\\':
+            if i == len(value):
+                raise ValueError(f'unterminated escape in {value!r}')
+            char = value[i]
+            i += 1
+            if char in '01234567':
+                digits = char
+                while i < len(value) and len(digits) < 3 and value[i] in '01234567':
+                    digits += value[i]
+                    i += 1
+                result.append(chr(int(digits, 8) & 0xff))
+            elif char in 'xX':
+                digits = ''
+                while i < len(value) and len(digits) < 2 and value[i] in '0123456789abcdefABCDEF':
+                    digits += value[i]
+                    i += 1
+                result.append(chr(int(digits or '0', 16)))
+            else:
+                result.append(SIMPLE_ESCAPES.get(char, char))
+        elif char == '^':
+            if i == len(value):
+                raise ValueError(f'unterminated escape in {value!r}')
+            char = value[i]
+            i += 1
+            if char == '?':
+                result.append('\177')
+            elif '@' <= char <= '~':
+                result.append(chr(ord(char) & 0x1f))
+            else:
+                raise ValueError(f'invalid caret escape in {value!r}')
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+class LsColors:
+    """
+    Colors of `ls` entries, parsed once from an LS_COLORS specification.
+
+    File type indicators are kept by their two letter codes, and `*SUFFIX` entries are kept in a trie of reversed
+    suffixes, so finding the color of a name costs at most one step per character of the longest suffix.
+    """
+
+    def __init__(self, indicators=None, link_as_target=False):
+        self.indicators = dict(DEFAULT_INDICATORS if indicators is None else indicators)
+        self.link_as_target = link_as_target
+        self.suffixes = {}
+        self.suffix_count = 0
+
+    @classmethod
+    def parse(cls, ls_colors):
+        """ Parse an LS_COLORS value, raise ValueError if it is unparsable. """
+        colors = cls()
+        for entry in ls_colors.split(':'):
+            if not entry:
+                continue
+            key, sep, value = entry.partition('=')
+            if not sep:
+                raise ValueError(f'missing value in {entry!r}')
+            if key.startswith('*'):
+                colors.add_suffix(_unescape(key[1:]), _unescape(value))
+            elif key == 'ln' and value == 'target':
+                colors.link_as_target = True
+            elif key in colors.indicators:
+                colors.indicators[key] = _unescape(value)
+            else:
+                raise ValueError(f'unrecognized prefix: {key}')
+        return colors
+
+    def add_suffix(self, suffix, code):
+        node = self.suffixes
+        for char in reversed(suffix):
+            node = node.setdefault(char, {})
+        # Like GNU ls, when several suffixes match a name the last defined one wins.
+        self.suffix_count += 1
+        node[None] = (self.suffix_count, code)
+
+    def suffix_color(self, name):
+        """ Return the color of the last defined suffix `name` ends with, or None. """
+        node = self.suffixes
+        best = None
+        for i in range(len(name) - 1, -1, -1):
+            node = node.get(name[i])
+            if node is None:
+                break
+            match = node.get(None)
+            if match is not None and (best is None or match[0] > best[0]):
+                best = match
+        return None if best is None else best[1]
+
+    def is_colored(self, code):
+        value = self.indicators[code]
+        return bool(value) and value not in ('0', '00')
+
+    def sequence(self, color):
+        """ The escape sequence switching to `color`. """
+        prefix = self.indicators['lc'] + self.indicators['rc'] if self.is_colored('no') else ''
+        return f'{prefix}{self.indicators["lc"]}{color}{self.indicators["rc"]}'
+
+    @property
+    def normal_sequence(self):
+        """ The escape sequence switching to the color of non-filename text. """
+        return f'{self.indicators["lc"]}{self.indicators["no"]}{self.indicators["rc"]}'
+
+    @property
+    def end_sequence(self):
+        """ The escape sequence switching back to the normal color. """
+        if self.indicators['ec'] is not None:
+            return self.indicators['ec']
+        return f'{self.indicators["lc"]}{self.indicators["rs"]}{self.indicators["rc"]}'
+
+    @property
+    def uses_default_delimiters(self):
+        return self.indicators['lc'] == DEFAULT_INDICATORS['lc'] and self.indicators['rc'] == DEFAULT_INDICATORS['rc']
@@ -0,0 +1,107 @@
+import heapq
+import os
+import struct
+import tempfile
+from collections import namedtuple
+
+INDEX_MAGIC = b'PGLSIDX\x01'
+# Shared prefix length with the previous path, length of the rest of the path, size, mtime_ns, mode, inode.
+RECORD = struct.Struct('<IIQqIQ')
+RUN_SIZE = 65536
+
+IndexRecord = namedtuple('IndexRecord', 'path size mtime_ns mode ino')
+
+
+def write_records(fileobj, records):
+    """ Write sorted `records` to `fileobj`, each path stored as its difference from the previous one. """
+    fileobj.write(INDEX_MAGIC)
+    previous = b''
+    for record in records:
+        path = record.path
+        shared = len(os.path.commonprefix((previous, path)))
+        fileobj.write(RECORD.pack(shared, len(path) - shared, record.size, record.mtime_ns, record.mode, record.ino))
+        fileobj.write(path[shared:])
+        previous = path
+
+
+def read_records(fileobj):
+    """ Iterate over the records of an index written by `write_records`, raise ValueError if it is not one. """
+    if fileobj.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+        raise ValueError('not an ls index')
+    path = b''
+    while True:
+        header = fileobj.read(RECORD.size)
+        if not header:
+            return
+        if len(header) != RECORD.size:
+            raise ValueError('truncated ls index')
+        shared, rest, size, mtime_ns, mode, ino = RECORD.unpack(header)
+        suffix = fileobj.read(rest)
+        if len(suffix) != rest:
+            raise ValueError('truncated ls index')
+        path = path[:shared] + suffix
+        yield IndexRecord(path, size, mtime_ns, mode, ino)
+
+
+def diff_records(old, new):
+    """
+    Merge two sorted record iterables, yielding ('A', record) for added paths, ('D', record) for removed paths and
+    ('M', record) for paths whose size, modification time, mode or inode changed.
+    """
+    old = iter(old)
+    new = iter(new)
+    old_record = next(old, None)
+    new_record = next(new, None)
+    while old_record is not None or new_record is not None:
+        if new_record is None or (old_record is not None and old_record.path < new_record.path):
+            yield 'D', old_record
+            old_record = next(old, None)
+        elif old_record is None or new_record.path < old_record.path:
+            yield 'A', new_record
+            new_record = next(new, None)
+        else:
+            if old_record != new_record:
+                yield 'M', new_record
+            old_record = next(old, None)
+            new_record = next(new, None)
+
+
+class IndexWriter:
+    """
+    Collect index records in any order and give them back sorted by path.
+
+    At most `run_size` records are held in memory, larger indexes are sorted in runs spilled to temporary files and
+    merged back, so memory stays bounded whatever the size of the tree.
+    """
+
+    def __init__(self, run_size=RUN_SIZE):
+        self.run_size = run_size
+        self.buffer = []
+        self.runs = []
+
+    def add(self, path, stat):
+        self.buffer.append(IndexRecord(path, stat.st_size, stat.st_mtime_ns, stat.st_mode, stat.st_ino))
+        if len(self.buffer) >= self.run_size:
+            self._spill()
+
+    def records(self):
+        """ Iterate over the collected records sorted by path, can be called more than once. """
+        self.buffer.sort()
+        iterables = [self.buffer]
+        for run in self.runs:
+            run.seek(0)
+            iterables.append(read_records(run))
+        return heapq.merge(*iterables)
+
+    def close(self):
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.buffer = []
+
+    def _spill(self):
+        self.buffer.sort()
+        run = tempfile.TemporaryFile()
+        write_records(run, self.buffer)
+        self.runs.append(run)
+        self.buffer = []
@@ -0,0 +1,199 @@
+import errno
+import mmap
+import os
+import struct
+import zlib
+from datetime import datetime
+
+from pygnuutils.ls import LsStub
+
+SNAPSHOT_MAGIC = b'PGUSNAP1'
+HEADER = struct.Struct('<8sQQ')
+SLOT = struct.Struct('<QQ')
+LENGTH = struct.Struct('<I')
+STAT = struct.Struct('<QQQQIIqqqqqqQ')
+ERROR = struct.Struct('<i')
+
+RESULT_OK = 0
+RESULT_OS_ERROR = 1
+
+
+def _stat_key(path, follow_symlinks):
+    return (b'S' if follow_symlinks else b's') + os.fsencode(path)
+
+
+def _pack_stat(stat):
+    blocks = stat.st_blocks if hasattr(stat, 'st_blocks') else (stat.st_size + 511) // 512
+    return STAT.pack(
+        stat.st_mode, stat.st_ino, stat.st_dev, stat.st_nlink, stat.st_uid, stat.st_gid, stat.st_size,
+        stat.st_atime_ns, stat.st_mtime_ns, stat.st_ctime_ns, blocks, getattr(stat, 'st_blksize', 4096),
+        getattr(stat, 'st_rdev', 0),
+    )
+
+
+def _unpack_stat(data):
+    (mode, ino, dev, nlink, uid, gid, size, atime_ns, mtime_ns, ctime_ns, blocks, blksize,
+     rdev) = STAT.unpack(data)
+    return os.stat_result(
+        (mode, ino, dev, nlink, uid, gid, size, atime_ns // 10 ** 9, mtime_ns // 10 ** 9, ctime_ns // 10 ** 9),
+        {
+            'st_atime': atime_ns / 10 ** 9, 'st_mtime': mtime_ns / 10 ** 9, 'st_ctime': ctime_ns / 10 ** 9,
+            'st_atime_ns': atime_ns, 'st_mtime_ns': mtime_ns, 'st_ctime_ns': ctime_ns,
+            'st_blocks': blocks, 'st_blksize': blksize, 'st_rdev': rdev,
+        }
+    )
+
+
+def _pack_names(names):
+    return b'\0'.join(map(os.fsencode, names))
+
+
+def _unpack_names(data, as_bytes=False):
+    """ Names are str, or bytes for a bytes path like `os.listdir` returns them. """
+    names = data.split(b'\0') if data else []
+    return names if as_bytes else [os.fsdecode(name) for name in names]
+
+
+class RecordingLsStub:
+    """
+    Wrap a stub and record every listdir, stat, readlink, getuser, getgroup and now answer, so that the same
+    listing can later be replayed by `ReplayLsStub` from the file written by `save`.
+    """
+
+    def __init__(self, stub=None):
+        self.stub = LsStub() if stub is None else stub
+        self.records = {}
+
+    def __getattr__(self, name):
+        return getattr(self.stub, name)
+
+    def stat(self, path, dir_fd=None, follow_symlinks=True):
+        return self._record(_stat_key(path, follow_symlinks), _pack_stat, self.stub.stat, path, dir_fd=dir_fd,
+                            follow_symlinks=follow_symlinks)
+
+    def listdir(self, path='.'):
+        return self._record(b'D' + os.fsencode(path), _pack_names, self.stub.listdir, path)
+
+    def readlink(self, path, dir_fd=None):
+        return self._record(b'L' + os.fsencode(path), os.fsencode, self.stub.readlink, path, dir_fd=dir_fd)
+
+    def getuser(self, st_uid):
+        return self._record(b'U' + str(st_uid).encode(), str.encode, self.stub.getuser, st_uid)
+
+    def getgroup(self, st_gid):
+        return self._record(b'G' + str(st_gid).encode(), str.encode, self.stub.getgroup, st_gid)
+
+    def now(self):
+        if b'N' not in self.records:
+            return self._record(b'N', lambda now: now.isoformat().encode(), self.stub.now)
+        return datetime.fromisoformat(self.records[b'N'][1:].decode())
+
+    def save(self, path):
+        slot_count = 1
+        while slot_count < 2 * len(self.records):
+            slot_count *= 2
+        slots = [(0, 0)] * slot_count
+        with open(path, 'wb') as fd:
+            fd.write(HEADER.pack(SNAPSHOT_MAGIC, 0, 0))
+            offset = HEADER.size
+            for key, value in self.records.items():
+                key_hash = zlib.crc32(key)
+                slot = key_hash % slot_count
+                while slots[slot][1]:
+                    slot = (slot + 1) % slot_count
+                slots[slot] = (key_hash, offset)
+                record = LENGTH.pack(len(key)) + key + LENGTH.pack(len(value)) + value
+                fd.write(record)
+                offset += len(record)
+            fd.write(b''.join(SLOT.pack(*slot) for slot in slots))
+            fd.seek(0)
+            fd.write(HEADER.pack(SNAPSHOT_MAGIC, slot_count, offset))
+
+    def _record(self, key, pack, method, *args, **kwargs):
+        try:
+            result = method(*args, **kwargs)
+        except OSError as e:
+            self.records[key] = bytes([RESULT_OS_ERROR]) + ERROR.pack(e.errno or 0) + (e.strerror or '').encode()
+            raise
+        self.records[key] = bytes([RESULT_OK]) + pack(result)
+        return result
+
+
+class ReplayLsStub(LsStub):
+    """
+    Answer listdir, stat, readlink, getuser, getgroup and now from a snapshot written by `RecordingLsStub`.
+
+    The snapshot is memory mapped and looked up through its on-disk hash table, so opening it does not depend on its
+    size.
+    """
+
+    def __init__(self, path):
+        self._fd = open(path, 'rb')
+        self._map = mmap.mmap(self._fd.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._slot_count, self._table_offset = HEADER.unpack_from(self._map)
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not an ls snapshot')
+
+    def close(self):
+        self._map.close()
+        self._fd.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def stat(self, path, dir_fd=None, follow_symlinks=True):
+        return _unpack_stat(self._replay(_stat_key(path, follow_symlinks), path))
+
+    def listdir(self, path='.'):
+        return _unpack_names(self._replay(b'D' + os.fsencode(path), path), isinstance(path, bytes))
+
+    def readlink(self, path, dir_fd=None):
+        target = self._replay(b'L' + os.fsencode(path), path)
+        return target if isinstance(path, bytes) else os.fsdecode(target)
+
+    def getuser(self, st_uid):
+        return self._replay_id(b'U', st_uid)
+
+    def getgroup(self, st_gid):
+        return self._replay_id(b'G', st_gid)
+
+    def now(self):
+        return datetime.fromisoformat(self._replay(b'N', 'now').decode())
+
+    def _replay(self, key, path):
+        value = self._lookup(key)
+        if value is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        if value[0] == RESULT_OS_ERROR:
+            error_number, = ERROR.unpack_from(value, 1)
+            raise OSError(error_number, value[1 + ERROR.size:].decode(), path)
+        return value[1:]
+
+    def _replay_id(self, kind, id_):
+        value = self._lookup(kind + str(id_).encode())
+        if value is None:
+            raise KeyError(id_)
+        return value[1:].decode()
+
+    def _lookup(self, key):
+        if not self._slot_count:
+            return None
+        key_hash = zlib.crc32(key)
+        slot = key_hash % self._slot_count
+        while True:
+            slot_hash, offset = SLOT.unpack_from(self._map, self._table_offset + slot * SLOT.size)
+            if not offset:
+                return None
+            if slot_hash == key_hash:
+                key_length, = LENGTH.unpack_from(self._map, offset)
+                offset += LENGTH.size
+                if self._map[offset:offset + key_length] == key:
+                    offset += key_length
+                    value_length, = LENGTH.unpack_from(self._map, offset)
+                    offset += LENGTH.size
+                    return self._map[offset:offset + value_length]
+            slot = (slot + 1) % self._slot_count
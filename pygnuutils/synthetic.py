@@ -0,0 +1,145 @@
+import errno
+import hashlib
+import math
+import os
+import posixpath
+import random
+import string
+from datetime import datetime
+from stat import S_IFDIR, S_IFLNK, S_IFREG
+
+from pygnuutils.ls import LsStub
+
+NAME_CHARACTERS = string.ascii_letters + string.digits + '_-.'
+NAME_POOL_SIZE = 1 << 12
+SYNTHETIC_NOW = 1700000000
+TWO_YEARS = 2 * 365 * 24 * 60 * 60
+
+
+class SyntheticLsStub(LsStub):
+    """
+    In-memory stub describing a deterministic synthetic tree below `root`.
+
+    Nothing is stored per entry: every answer is derived from the seed and the path, so trees of millions of entries
+    cost no memory. A random generator seeded once draws a pool of names and the key of the hash every entry's
+    attributes are taken from. Each directory holds `fanout` entries, of which `dir_ratio` are directories (until
+    `depth` levels below the root) and `symlink_ratio` are symbolic links to a sibling. Name lengths are sampled from
+    `name_lengths` and owners from `uid_count` users and `gid_count` groups.
+    """
+
+    def __init__(self, root='/synthetic', seed=0, fanout=10, depth=2, dir_ratio=0.2, symlink_ratio=0.05,
+                 name_lengths=(4, 8, 12, 16, 24), uid_count=1, gid_count=1):
+        self.root = root
+        self.seed = seed
+        self.fanout = fanout
+        self.depth = depth
+        self.dir_ratio = dir_ratio
+        self.symlink_ratio = symlink_ratio
+        self.name_lengths = name_lengths
+        self.uid_count = uid_count
+        self.gid_count = gid_count
+        rng = random.Random(seed)
+        self._key = rng.getrandbits(64).to_bytes(8, 'little')
+        self._names = [''.join(rng.choice(NAME_CHARACTERS) for _ in range(rng.choice(name_lengths)))
+                       for _ in range(NAME_POOL_SIZE)]
+
+    @property
+    def sep(self):
+        return posixpath.sep
+
+    def join(self, path, *paths):
+        return posixpath.join(path, *paths)
+
+    def abspath(self, path):
+        return posixpath.normpath(self.join(self.root, path))
+
+    def isabs(self, path):
+        return posixpath.isabs(path)
+
+    def dirname(self, path):
+        return posixpath.dirname(path)
+
+    def basename(self, path):
+        return posixpath.basename(path)
+
+    def listdir(self, path='.'):
+        relative = self._relative(path)
+        if self._kind(relative) != S_IFDIR:
+            raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+        return [self._name(relative, index) for index in range(self.fanout)]
+
+    def stat(self, path, dir_fd=None, follow_symlinks=True):
+        relative = self._relative(path)
+        kind = self._kind(relative)
+        if kind == S_IFLNK and follow_symlinks:
+            relative = posixpath.join(posixpath.dirname(relative), self._link_target(relative))
+            kind = self._kind(relative)
+            if kind == S_IFLNK:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        # Independent draws are successive digits of the hash, in mixed radix.
+        draws = self._hash('stat', relative, 16)
+        draws, mode_draw = divmod(draws, 10)
+        draws, size_draw = divmod(draws, 1 << 32)
+        draws, age = divmod(draws, TWO_YEARS)
+        draws, uid = divmod(draws, self.uid_count)
+        gid = draws % self.gid_count
+        if kind == S_IFDIR:
+            mode, size, nlink = S_IFDIR | 0o755, 4096, 2
+        elif kind == S_IFLNK:
+            mode, size, nlink = S_IFLNK | 0o777, len(self._link_target(relative)), 1
+        else:
+            # Exponentially distributed, with a mean of 8 KiB.
+            size = int(-8192 * math.log1p(-size_draw / (1 << 32)))
+            mode, nlink = S_IFREG | (0o755 if mode_draw == 0 else 0o644), 1
+        mtime = SYNTHETIC_NOW - age
+        ino = int.from_bytes(hashlib.blake2b(relative.encode(), digest_size=8).digest(), 'little')
+        return os.stat_result(
+            (mode, ino, 1, nlink, 1000 + uid, 1000 + gid, size, mtime, mtime, mtime),
+            {
+                'st_atime': float(mtime), 'st_mtime': float(mtime), 'st_ctime': float(mtime),
+                'st_atime_ns': mtime * 10 ** 9, 'st_mtime_ns': mtime * 10 ** 9, 'st_ctime_ns': mtime * 10 ** 9,
+                'st_blocks': (size + 4095) // 4096 * 8, 'st_blksize': 4096, 'st_rdev': 0,
+            }
+        )
+
+    def readlink(self, path, dir_fd=None):
+        relative = self._relative(path)
+        if self._kind(relative) != S_IFLNK:
+            raise OSError(errno.EINVAL, os.strerror(errno.EINVAL), path)
+        return self._link_target(relative)
+
+    def getuser(self, st_uid):
+        return f'user{st_uid}'
+
+    def getgroup(self, st_gid):
+        return f'group{st_gid}'
+
+    def now(self):
+        return datetime.fromtimestamp(SYNTHETIC_NOW)
+
+    def _relative(self, path):
+        path = self.abspath(path)
+        if path != self.root and not path.startswith(self.root + self.sep):
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        return path[len(self.root) + 1:]
+
+    def _hash(self, purpose, relative, size=8):
+        digest = hashlib.blake2b(f'{purpose}:{relative}'.encode(), digest_size=size, key=self._key).digest()
+        return int.from_bytes(digest, 'little')
+
+    def _kind(self, relative):
+        if not relative:
+            return S_IFDIR
+        chance = self._hash('kind', relative) / (1 << 64)
+        if chance < self.dir_ratio and relative.count(self.sep) + 1 < self.depth:
+            return S_IFDIR
+        if chance >= 1 - self.symlink_ratio:
+            return S_IFLNK
+        return S_IFREG
+
+    def _name(self, relative_dir, index):
+        # The index keeps the names of a directory unique.
+        return self._names[self._hash('name', f'{relative_dir}:{index}') % NAME_POOL_SIZE] + f'{index:x}'
+
+    def _link_target(self, relative):
+        return self._name(posixpath.dirname(relative), self._hash('link', relative) % self.fanout)
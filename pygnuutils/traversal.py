@@ -0,0 +1,147 @@
+import fnmatch
+import os
+from enum import Enum, auto
+from stat import S_ISDIR
+
+
+class DereferenceSymlink(Enum):
+    UNDEFINED = 0
+    NEVER = auto()
+    COMMAND_LINE_ARGUMENTS = auto()
+    COMMAND_LINE_SYMLINK_TO_DIR = auto()
+    ALWAYS = auto()
+
+
+class IgnoreMode(Enum):
+    DEFAULT = 0
+    DOT_AND_DOTDOT = auto()
+    MINIMAL = auto()
+
+
+class TraversalStub:
+    @property
+    def sep(self):
+        return os.path.sep
+
+    def join(self, path, *paths):
+        return os.path.join(path, *paths)
+
+    def abspath(self, path):
+        return os.path.abspath(path)
+
+    def stat(self, path, dir_fd=None, follow_symlinks=True):
+        return os.stat(path, dir_fd=dir_fd, follow_symlinks=follow_symlinks)
+
+    def readlink(self, path, dir_fd=None):
+        return os.readlink(path, dir_fd=dir_fd)
+
+    def isabs(self, path):
+        return os.path.isabs(path)
+
+    def dirname(self, path):
+        return os.path.dirname(path)
+
+    def basename(self, path):
+        return os.path.basename(path)
+
+    def listdir(self, path='.'):
+        return os.listdir(path)
+
+    def prune(self, path, depth):
+        """ Return True to stop a recursive traversal from descending into `path`. """
+        return False
+
+    @property
+    def st_nblocksize(self):
+        return 4096
+
+    def st_nblocks(self, stat):
+        if hasattr(stat, 'st_blocks') and hasattr(stat, 'st_blksize'):
+            size = stat.st_blocks * 512
+        else:
+            size = stat.st_size
+        return size // self.st_nblocksize + int(size % self.st_nblocksize != 0)
+
+
+class Traversal:
+    """
+    Policies shared by the utilities that walk directory trees: symlink dereferencing, ignore and prune patterns,
+    depth limits and detection of directories that are already being traversed.
+    """
+
+    def __init__(self, stub, dereference=DereferenceSymlink.NEVER, ignore_mode=IgnoreMode.MINIMAL,
+                 ignore_patterns=(), hide_patterns=(), max_depth=-1, prune_patterns=(), detect_cycles=False):
+        self.stub = stub
+        self.dereference = dereference
+        self.ignore_mode = ignore_mode
+        self.ignore_patterns = ignore_patterns
+        self.hide_patterns = hide_patterns
+        self.max_depth = max_depth
+        self.prune_patterns = prune_patterns
+        self.active_dir_set = set() if detect_cycles else None
+        self.dev_ino_stack = []
+
+    @property
+    def detect_cycles(self):
+        return self.active_dir_set is not None
+
+    def fork(self):
+        """ Create a traversal with the same policies and active directories, to be used by another worker. """
+        traversal = Traversal(self.stub, self.dereference, self.ignore_mode, self.ignore_patterns,
+                              self.hide_patterns, self.max_depth, self.prune_patterns, self.detect_cycles)
+        if self.detect_cycles:
+            traversal.active_dir_set.update(self.active_dir_set)
+            traversal.dev_ino_stack.extend(self.dev_ino_stack)
+        return traversal
+
+    def stat(self, name, command_line_arg):
+        if self.dereference == DereferenceSymlink.ALWAYS:
+            do_deref = True
+        elif self.dereference == DereferenceSymlink.COMMAND_LINE_ARGUMENTS:
+            do_deref = command_line_arg
+        elif self.dereference == DereferenceSymlink.COMMAND_LINE_SYMLINK_TO_DIR:
+            do_deref = command_line_arg and S_ISDIR(self.stub.stat(name).st_mode)
+        else:
+            do_deref = False
+        return self.stub.stat(name, follow_symlinks=do_deref)
+
+    def ignored(self, name):
+        for pattern in self.ignore_patterns:
+            if fnmatch.fnmatch(name, pattern):
+                return True
+
+        if self.ignore_mode == IgnoreMode.DEFAULT:
+            for pattern in self.hide_patterns:
+                if fnmatch.fnmatch(name, pattern):
+                    return True
+
+        if self.ignore_mode == IgnoreMode.MINIMAL:
+            return False
+        # Names may be str or bytes.
+        if self.ignore_mode == IgnoreMode.DOT_AND_DOTDOT:
+            return name in ('.', '..', b'.', b'..')
+        if self.ignore_mode == IgnoreMode.DEFAULT:
+            return name[:1] in ('.', b'.')
+
+    def pruned(self, name, path, depth):
+        if 0 <= self.max_depth < depth:
+            return True
+        for pattern in self.prune_patterns:
+            if fnmatch.fnmatch(name, pattern):
+                return True
+        return self.stub.prune(path, depth)
+
+    def enter_dir(self, dir_stat):
+        """ Mark a directory as being traversed, return False if it is already being traversed. """
+        if self.active_dir_set is None:
+            return True
+        dev_ino = (dir_stat.st_dev, dir_stat.st_ino)
+        if dev_ino in self.active_dir_set:
+            return False
+        self.active_dir_set.add(dev_ino)
+        self.dev_ino_stack.append(dev_ino)
+        return True
+
+    def leave_dir(self):
+        if self.active_dir_set is not None:
+            self.active_dir_set.remove(self.dev_ino_stack.pop())
@@ -0,0 +1,126 @@
+import io
+import tarfile
+import zipfile
+from io import StringIO
+from stat import S_IFLNK, S_ISDIR, S_ISLNK, S_ISREG
+
+import pytest
+
+from pygnuutils.archive import ArchiveLsStub, TarLsStub, ZipLsStub
+from pygnuutils.ls import Ls, LsConfig, Formats
+
+
+class ArchiveTestStubMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stdout = StringIO()
+
+    def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+        print(*objects, sep=sep, end=end, flush=flush, file=self.stdout)
+
+    def setlocale(self, locale_setting=''):
+        super().setlocale('C.UTF-8')
+
+
+class ZipTestStub(ArchiveTestStubMixin, ZipLsStub):
+    pass
+
+
+class TarTestStub(ArchiveTestStubMixin, TarLsStub):
+    pass
+
+
+def _create_zip(path):
+    with zipfile.ZipFile(path, 'w') as zip_file:
+        zip_file.writestr('top.txt', b'hello')
+        zip_file.writestr('dir/', b'')
+        zip_file.writestr('dir/sub/deep.txt', b'deep')
+        link = zipfile.ZipInfo('dir/link')
+        link.create_system = 3
+        link.external_attr = (S_IFLNK | 0o777) << 16
+        zip_file.writestr(link, b'sub')
+        broken = zipfile.ZipInfo('broken')
+        broken.create_system = 3
+        broken.external_attr = (S_IFLNK | 0o777) << 16
+        zip_file.writestr(broken, b'missing')
+
+
+def _create_tar(path):
+    with tarfile.open(path, 'w:gz') as tar_file:
+        for name, content in (('./top.txt', b'hello'), ('./dir/sub/deep.txt', b'deep')):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.uname = 'archiver'
+            info.uid = 4242
+            tar_file.addfile(info, io.BytesIO(content))
+        for name, type_, linkname in (('./dir/', tarfile.DIRTYPE, ''), ('./dir/link', tarfile.SYMTYPE, 'sub'),
+                                      ('./broken', tarfile.SYMTYPE, 'missing'), ('./hard', tarfile.LNKTYPE, 'top.txt')):
+            info = tarfile.TarInfo(name)
+            info.type = type_
+            info.linkname = linkname
+            tar_file.addfile(info)
+
+
+@pytest.fixture(params=['zip', 'tar'])
+def archive_stub(request, tmp_path):
+    if request.param == 'zip':
+        _create_zip(tmp_path / 'archive.zip')
+        return lambda: ZipTestStub(str(tmp_path / 'archive.zip'))
+    _create_tar(tmp_path / 'archive.tar.gz')
+    return lambda: TarTestStub(str(tmp_path / 'archive.tar.gz'))
+
+
+def test_archive_lookups(archive_stub):
+    stub = archive_stub()
+    assert {'top.txt', 'dir', 'broken'} <= set(stub.listdir('/'))
+    assert sorted(stub.listdir('/dir')) == ['link', 'sub']
+    assert stub.listdir('/dir/link') == ['deep.txt']
+    assert stub.stat('/top.txt').st_size == 5
+    assert S_ISREG(stub.stat('/dir/link/deep.txt').st_mode)
+    assert S_ISDIR(stub.stat('/dir/sub').st_mode)
+    assert S_ISDIR(stub.stat('/dir/link').st_mode)
+    assert S_ISLNK(stub.stat('/dir/link', follow_symlinks=False).st_mode)
+    assert stub.readlink('/dir/link') == 'sub'
+    assert stub.stat('/dir').st_nlink == 3
+    with pytest.raises(FileNotFoundError):
+        stub.stat('/broken')
+    with pytest.raises(FileNotFoundError):
+        stub.listdir('/nothing')
+    with pytest.raises(NotADirectoryError):
+        stub.listdir('/top.txt')
+    with pytest.raises(OSError):
+        stub.readlink('/top.txt')
+    assert stub.stat('/../dir/./link/../link/deep.txt').st_size == 4
+    with pytest.raises(NotADirectoryError):
+        stub.stat('/top.txt/deep.txt')
+    with pytest.raises(NotADirectoryError):
+        stub.stat('/top.txt/')
+
+
+def test_archive_index_cached(archive_stub):
+    assert archive_stub().index is archive_stub().index
+
+
+def test_tar_owners_and_hardlinks(tmp_path):
+    _create_tar(tmp_path / 'archive.tar.gz')
+    stub = TarTestStub(str(tmp_path / 'archive.tar.gz'))
+    assert stub.stat('/hard').st_ino == stub.stat('/top.txt').st_ino
+    assert stub.stat('/hard').st_nlink == 2
+    assert stub.getuser(stub.stat('/top.txt').st_uid) == 'archiver'
+
+
+def test_archive_recursive_listing(archive_stub):
+    stub = archive_stub()
+    Ls(stub).run('/', config=LsConfig(format=Formats.ONE_PER_LINE, recursive=True))
+    output = stub.stdout.getvalue()
+    assert output.startswith('/:\nbroken\ndir\n')
+    assert '\n/dir:\nlink\nsub\n\n/dir/sub:\ndeep.txt\n' in output
+
+
+def test_archive_stub_requires_build_index(tmp_path):
+    class IncompleteLsStub(ArchiveLsStub):
+        pass
+
+    _create_zip(tmp_path / 'archive.zip')
+    with pytest.raises(TypeError):
+        IncompleteLsStub(str(tmp_path / 'archive.zip'))
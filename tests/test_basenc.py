@@ -1,8 +1,14 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 import pytest
+from click.testing import CliRunner
 
-from pygnuutils.basenc import Basenc, BasencStub, BasencDecodeError
+from pygnuutils.basenc import Basenc, BasencStub, BasencConfig, BasencDecodeError, BasencEncodeError, Encoding, \
+    IncrementalDecoder, base2_lsbf_decode, base2_lsbf_encode, base2_msbf_decode, base2_msbf_encode, decode, \
+    decode_into, encode, encode_into, encoded_size, iterdecode, iterencode
+from pygnuutils.cli.basenc import basenc as basenc_command
 
 
 class BasencTestStub(BasencStub):
@@ -168,10 +174,10 @@ def test_encode_base2_lsbf(input_, output):
 @pytest.mark.parametrize('input_, output', [
     (b'test', b'By/Jn\n'),
     (
-            b'test,test,pytest,te\x00t,test,test,python,test,test,test,test,egg,test,~est,test,test,test,test,abcd',
+            b'test,test,pytest,te\x00t,test,test,python,test,test,test,test,egg,test,~est,test,test,test,test,abc',
             (
                     b'By/JneoCDABs.xRBy/JneoCC6Bs.JBB95%PwPI@AAcVLsz/daFwPI@ABy/JneoCDABs.JBB95%Ax\n'
-                    b'j&=qwPI@AER0OxeoCDABs.JBB95%PwPI@ABy/JnemA0$wb\n'
+                    b'j&=qwPI@AER0OxeoCDABs.JBB95%PwPI@ABy/JnemA0$\n'
             )
     ),
 ])
@@ -333,9 +339,9 @@ def test_decode_base2_lsbf(input_, output):
     (
             (
                     b'By/JneoCDABs.xRBy/JneoCC6Bs.JBB95%PwPI@AAcVLsz/daFwPI@ABy/JneoCDABs.JBB95%Ax'
-                    b'j&=qwPI@AER0OxeoCDABs.JBB95%PwPI@ABy/JnemA0$wb'
+                    b'j&=qwPI@AER0OxeoCDABs.JBB95%PwPI@ABy/JnemA0$'
             ),
-            b'test,test,pytest,te\x00t,test,test,python,test,test,test,test,egg,test,~est,test,test,test,test,abcd'
+            b'test,test,pytest,te\x00t,test,test,python,test,test,test,test,egg,test,~est,test,test,test,test,abc'
     ),
 ])
 def test_decode_z85(input_, output):
@@ -355,11 +361,14 @@ def test_decode_z85(input_, output):
     ),
 ])
 def test_decode_base64_ignore_garbage(input_, output):
+    # Line breaks are not garbage, NUL bytes are.
+    input_ = input_.replace(b'\n', b'\x00\n')
     stub = BasencTestStub()
     stub.input_file = BytesIO(input_)
     basenc = Basenc(stub)
     with pytest.raises(BasencDecodeError):
         basenc('placeholder', base64=True, decode=True)
+    stub.stdout = BytesIO()
     stub.input_file = BytesIO(input_)
     basenc('placeholder', base64=True, decode=True, ignore_garbage=True)
     assert stub.stdout.getvalue() == output
@@ -376,11 +385,14 @@ def test_decode_base64_ignore_garbage(input_, output):
     ),
 ])
 def test_decode_base64_url_ignore_garbage(input_, output):
+    # Line breaks are not garbage, NUL bytes are.
+    input_ = input_.replace(b'\n', b'\x00\n')
     stub = BasencTestStub()
     stub.input_file = BytesIO(input_)
     basenc = Basenc(stub)
     with pytest.raises(BasencDecodeError):
         basenc('placeholder', base64url=True, decode=True)
+    stub.stdout = BytesIO()
     stub.input_file = BytesIO(input_)
     basenc('placeholder', base64url=True, decode=True, ignore_garbage=True)
     assert stub.stdout.getvalue() == output
@@ -398,11 +410,14 @@ def test_decode_base64_url_ignore_garbage(input_, output):
     ),
 ])
 def test_decode_base32_ignore_garbage(input_, output):
+    # Line breaks are not garbage, NUL bytes are.
+    input_ = input_.replace(b'\n', b'\x00\n')
     stub = BasencTestStub()
     stub.input_file = BytesIO(input_)
     basenc = Basenc(stub)
     with pytest.raises(BasencDecodeError):
         basenc('placeholder', base32=True, decode=True)
+    stub.stdout = BytesIO()
     stub.input_file = BytesIO(input_)
     basenc('placeholder', base32=True, decode=True, ignore_garbage=True)
     assert stub.stdout.getvalue() == output
@@ -420,11 +435,14 @@ def test_decode_base32_ignore_garbage(input_, output):
     ),
 ])
 def test_decode_base32_hex_ignore_garbage(input_, output):
+    # Line breaks are not garbage, NUL bytes are.
+    input_ = input_.replace(b'\n', b'\x00\n')
     stub = BasencTestStub()
     stub.input_file = BytesIO(input_)
     basenc = Basenc(stub)
     with pytest.raises(BasencDecodeError):
         basenc('placeholder', base32hex=True, decode=True)
+    stub.stdout = BytesIO()
     stub.input_file = BytesIO(input_)
     basenc('placeholder', base32hex=True, decode=True, ignore_garbage=True)
     assert stub.stdout.getvalue() == output
@@ -442,11 +460,14 @@ def test_decode_base32_hex_ignore_garbage(input_, output):
     ),
 ])
 def test_decode_base16_ignore_garbage(input_, output):
+    # Line breaks are not garbage, NUL bytes are.
+    input_ = input_.replace(b'\n', b'\x00\n')
     stub = BasencTestStub()
     stub.input_file = BytesIO(input_)
     basenc = Basenc(stub)
     with pytest.raises(BasencDecodeError):
         basenc('placeholder', base16=True, decode=True)
+    stub.stdout = BytesIO()
     stub.input_file = BytesIO(input_)
     basenc('placeholder', base16=True, decode=True, ignore_garbage=True)
     assert stub.stdout.getvalue() == output
@@ -472,11 +493,14 @@ def test_decode_base16_ignore_garbage(input_, output):
     ),
 ])
 def test_decode_base2_msbf_ignore_garbage(input_, output):
+    # Line breaks are not garbage, NUL bytes are.
+    input_ = input_.replace(b'\n', b'\x00\n')
     stub = BasencTestStub()
     stub.input_file = BytesIO(input_)
     basenc = Basenc(stub)
     with pytest.raises(BasencDecodeError):
         basenc('placeholder', base2msbf=True, decode=True)
+    stub.stdout = BytesIO()
     stub.input_file = BytesIO(input_)
     basenc('placeholder', base2msbf=True, decode=True, ignore_garbage=True)
     assert stub.stdout.getvalue() == output
@@ -502,11 +526,14 @@ def test_decode_base2_msbf_ignore_garbage(input_, output):
     ),
 ])
 def test_decode_base2_lsbf_ignore_garbage(input_, output):
+    # Line breaks are not garbage, NUL bytes are.
+    input_ = input_.replace(b'\n', b'\x00\n')
     stub = BasencTestStub()
     stub.input_file = BytesIO(input_)
     basenc = Basenc(stub)
     with pytest.raises(BasencDecodeError):
         basenc('placeholder', base2lsbf=True, decode=True)
+    stub.stdout = BytesIO()
     stub.input_file = BytesIO(input_)
     basenc('placeholder', base2lsbf=True, decode=True, ignore_garbage=True)
     assert stub.stdout.getvalue() == output
@@ -517,17 +544,20 @@ def test_decode_base2_lsbf_ignore_garbage(input_, output):
     (
             (
                     b'By/JneoCDABs.xRBy/JneoCC6Bs.JBB95%PwPI@AAcVLsz/daFwPI@ABy/JneoCDABs.JBB95%Ax\n'
-                    b'j&=qwPI@AER0OxeoCDABs.JBB95%PwPI@ABy/JnemA0$wb\n'
+                    b'j&=qwPI@AER0OxeoCDABs.JBB95%PwPI@ABy/JnemA0$\n'
             ),
-            b'test,test,pytest,te\x00t,test,test,python,test,test,test,test,egg,test,~est,test,test,test,test,abcd'
+            b'test,test,pytest,te\x00t,test,test,python,test,test,test,test,egg,test,~est,test,test,test,test,abc'
     ),
 ])
 def test_decode_z85_ignore_garbage(input_, output):
+    # Line breaks are not garbage, NUL bytes are.
+    input_ = input_.replace(b'\n', b'\x00\n')
     stub = BasencTestStub()
     stub.input_file = BytesIO(input_)
     basenc = Basenc(stub)
     with pytest.raises(BasencDecodeError):
         basenc('placeholder', z85=True, decode=True)
+    stub.stdout = BytesIO()
     stub.input_file = BytesIO(input_)
     basenc('placeholder', z85=True, decode=True, ignore_garbage=True)
     assert stub.stdout.getvalue() == output
@@ -562,3 +592,345 @@ def test_encode_wrap(input_, output, wrap):
     basenc = Basenc(stub)
     basenc('placeholder', base64=True, wrap=wrap)
     assert stub.stdout.getvalue() == output
+
+
+@pytest.mark.parametrize('encode, decode', [
+    (base2_msbf_encode, base2_msbf_decode),
+    (base2_lsbf_encode, base2_lsbf_decode),
+])
+def test_base2_round_trip(encode, decode):
+    data = bytes(range(256)) * 3
+    encoded = encode(data)
+    assert len(encoded) == len(data) * 8
+    assert decode(encoded) == data
+    assert encode(b'') == decode(b'') == b''
+    assert encode(b'\x01\x80') == (b'0000000110000000' if encode is base2_msbf_encode else b'1000000000000001')
+
+
+@pytest.mark.parametrize('input_', [b'0110000', b'0b011000', b'0110_0001', b' 01100001', b'01100002'])
+def test_decode_base2_invalid(input_):
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(input_)
+    with pytest.raises(BasencDecodeError):
+        Basenc(stub)('placeholder', base2msbf=True, decode=True)
+
+
+def test_decode_ignore_garbage_across_blocks():
+    data = bytes(range(256)) * 40
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(data)
+    Basenc(stub)('placeholder', base64=True)
+    encoded = stub.stdout.getvalue()
+    garbled = b'*'.join(encoded[i:i + 10] for i in range(0, len(encoded), 10))
+    assert len(garbled) > 2 * Basenc.DEC_BLOCKSIZE
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(garbled)
+    Basenc(stub)('placeholder', base64=True, decode=True, ignore_garbage=True)
+    assert stub.stdout.getvalue() == data
+
+
+def test_encode_wrap_across_blocks():
+    # The second block starts at column 56 of its first line and the rest of it fills exactly one line.
+    data = bytes(range(256)) * 120 + bytes(60)
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(data)
+    Basenc(stub)('placeholder', base32=True)
+    lines = stub.stdout.getvalue().split(b'\n')
+    assert lines[-1] == b''
+    assert all(len(line) == 76 for line in lines[:-2])
+    assert base64.b32encode(data) == b''.join(lines)
+
+
+@pytest.mark.parametrize('encoding', list(Encoding))
+def test_decode_wrapped_round_trip(encoding):
+    data = bytes(range(256)) * 50
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(data)
+    Basenc(stub).run('placeholder', BasencConfig(encoding=encoding, wrap_column=75))
+    encoded = stub.stdout.getvalue()
+    assert encoded.count(b'\n') > 1
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(encoded)
+    Basenc(stub).run('placeholder', BasencConfig(encoding=encoding, decode=True))
+    assert stub.stdout.getvalue() == data
+
+    for chunk_size in (1, 7, 13, 4096):
+        decoder = IncrementalDecoder(encoding)
+        decoded = [decoder.decode(encoded[i:i + chunk_size]) for i in range(0, len(encoded), chunk_size)]
+        assert b''.join(decoded) + decoder.decode(b'', final=True) == data
+
+
+def test_incremental_decoder_partial_quantum():
+    decoder = IncrementalDecoder(Encoding.BASE64)
+    assert decoder.decode(b'dGVz\ndA') == b'tes'
+    assert decoder.pending == b'dA'
+    with pytest.raises(BasencDecodeError):
+        decoder.decode(b'', final=True)
+    decoder.reset()
+    assert decoder.decode(b'dA==', final=True) == b't'
+
+
+class ShortReadsBytesIO(BytesIO):
+    """ Return at most 7 bytes per read, like a slow pipe. """
+
+    def readinto(self, buffer):
+        return super().readinto(memoryview(buffer)[:7])
+
+
+@pytest.mark.parametrize('encoding', list(Encoding))
+def test_short_reads_and_block_sizes(encoding):
+    data = bytes(range(256)) * 10
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(data)
+    Basenc(stub).run('placeholder', BasencConfig(encoding=encoding))
+    expected = stub.stdout.getvalue()
+
+    stub = BasencTestStub()
+    stub.input_file = ShortReadsBytesIO(data)
+    Basenc(stub).run('placeholder', BasencConfig(encoding=encoding, encode_block_size=100))
+    assert stub.stdout.getvalue() == expected
+
+    stub = BasencTestStub()
+    stub.input_file = ShortReadsBytesIO(expected)
+    Basenc(stub).run('placeholder', BasencConfig(encoding=encoding, decode=True, decode_block_size=33))
+    assert stub.stdout.getvalue() == data
+
+
+@pytest.mark.parametrize('wrap', [1, 4, 7, 76, 1000])
+def test_encode_wrap_single_write_per_block(wrap):
+    class CountingBytesIO(BytesIO):
+        writes = 0
+
+        def write(self, data):
+            self.writes += 1
+            return super().write(data)
+
+    data = bytes(range(256)) * 4
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(data)
+    stub.stdout = CountingBytesIO()
+    Basenc(stub).run('placeholder', BasencConfig(wrap_column=wrap, encode_block_size=100))
+    encoded = base64.b64encode(data)
+    lines = [encoded[i:i + wrap] for i in range(0, len(encoded), wrap)]
+    assert stub.stdout.getvalue() == b'\n'.join(lines) + b'\n'
+    # One write per block of 99 bytes, and the final newline when the last line is partial.
+    assert stub.stdout.writes == len(data) // 99 + 1 + bool(len(encoded) % wrap)
+
+
+class FileTestStub(BasencStub):
+    """ Read real files, with the default stub `open` and `mmap`. """
+
+    def __init__(self):
+        self.stdout = BytesIO()
+
+    @property
+    def stdout_buffer(self):
+        return self.stdout
+
+
+@pytest.mark.parametrize('encoding', list(Encoding))
+def test_mmap_regular_file(tmp_path, encoding):
+    data = bytes(range(256)) * 10
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(data)
+    Basenc(stub).run('placeholder', BasencConfig(encoding=encoding))
+    expected = stub.stdout.getvalue()
+    (tmp_path / 'data').write_bytes(data)
+    (tmp_path / 'encoded').write_bytes(expected)
+
+    for mmap_block_size in (0, 100, 1 << 16):
+        stub = FileTestStub()
+        Basenc(stub).run(str(tmp_path / 'data'), BasencConfig(encoding=encoding, mmap_block_size=mmap_block_size))
+        assert stub.stdout.getvalue() == expected
+        stub = FileTestStub()
+        config = BasencConfig(encoding=encoding, decode=True, mmap_block_size=mmap_block_size)
+        Basenc(stub).run(str(tmp_path / 'encoded'), config)
+        assert stub.stdout.getvalue() == data
+
+
+def test_mmap_fallbacks(tmp_path):
+    (tmp_path / 'empty').write_bytes(b'')
+    (tmp_path / 'bad').write_bytes(b'dGVzdA==\n*')
+    stub = FileTestStub()
+    assert stub.mmap(BytesIO(b'data')) is None
+    with open(tmp_path / 'empty', 'rb') as empty:
+        assert stub.mmap(empty) is None
+    Basenc(stub).run(str(tmp_path / 'empty'), BasencConfig())
+    assert stub.stdout.getvalue() == b''
+    with pytest.raises(BasencDecodeError):
+        Basenc(stub).run(str(tmp_path / 'bad'), BasencConfig(decode=True))
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_mmap_closed_on_error(tmp_path, jobs):
+    class ClosingCheckStub(FileTestStub):
+        def open(self, file, mode):
+            self.input_file = super().open(file, mode)
+            return self.input_file
+
+        def mmap(self, fd):
+            self.mapping = super().mmap(fd)
+            return self.mapping
+
+        def executor(self, max_workers):
+            return ThreadPoolExecutor(max_workers)
+
+    (tmp_path / 'bad').write_bytes(b'dGVz\n' * 100 + b'*')
+    stub = ClosingCheckStub()
+    config = BasencConfig(decode=True, mmap_block_size=64, jobs=jobs, parallel_block_size=64)
+    with pytest.raises(BasencDecodeError):
+        Basenc(stub).run(str(tmp_path / 'bad'), config)
+    assert stub.mapping.closed
+    assert stub.input_file.closed
+    assert stub.stdout.getvalue() == b'tes' * 100
+
+
+class ThreadsTestStub(BasencTestStub):
+    def executor(self, max_workers):
+        return ThreadPoolExecutor(max_workers)
+
+
+@pytest.mark.parametrize('encoding', list(Encoding))
+@pytest.mark.parametrize('wrap', [0, 7, 76])
+def test_parallel_matches_serial(encoding, wrap):
+    data = bytes(range(256)) * 10 + bytes(12)
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(data)
+    Basenc(stub).run('placeholder', BasencConfig(encoding=encoding, wrap_column=wrap))
+    expected = stub.stdout.getvalue()
+
+    stub = ThreadsTestStub()
+    stub.input_file = BytesIO(data)
+    Basenc(stub).run('placeholder', BasencConfig(encoding=encoding, wrap_column=wrap, jobs=3, parallel_block_size=50))
+    assert stub.stdout.getvalue() == expected
+
+    stub = ThreadsTestStub()
+    stub.input_file = BytesIO(expected)
+    config = BasencConfig(encoding=encoding, decode=True, jobs=3, parallel_block_size=50)
+    Basenc(stub).run('placeholder', config)
+    assert stub.stdout.getvalue() == data
+
+
+def test_parallel_processes():
+    data = bytes(range(256)) * 40
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(data)
+    Basenc(stub).run('placeholder', BasencConfig(jobs=2, parallel_block_size=1000))
+    assert stub.stdout.getvalue().replace(b'\n', b'') == base64.b64encode(data)
+
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(base64.b64encode(data) + b'*')
+    with pytest.raises(BasencDecodeError):
+        Basenc(stub).run('placeholder', BasencConfig(decode=True, jobs=2, parallel_block_size=1000))
+    assert stub.stdout.getvalue() == data
+
+
+def test_negative_jobs(tmp_path):
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(b'data')
+    with pytest.raises(ValueError):
+        Basenc(stub).run('placeholder', BasencConfig(jobs=-1))
+    assert stub.stdout.getvalue() == b''
+
+    path = tmp_path / 'data'
+    path.write_bytes(b'data')
+    result = CliRunner().invoke(basenc_command, ['-j', '-1', str(path)])
+    assert result.exit_code == 2
+    assert 'Invalid value' in result.output
+
+
+@pytest.mark.parametrize('encoding', list(Encoding))
+@pytest.mark.parametrize('wrap', [0, 7, 76])
+def test_codec_api_matches_basenc(encoding, wrap):
+    data = bytes(range(256)) * 3 + bytes(4)
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(data)
+    Basenc(stub).run('placeholder', BasencConfig(encoding=encoding, wrap_column=wrap))
+    expected = stub.stdout.getvalue()
+
+    assert encode(data, encoding, wrap) == expected
+    assert encode(memoryview(data), encoding, wrap) == expected
+    assert decode(expected, encoding) == data
+    assert encoded_size(len(data), encoding, wrap) == len(expected)
+    chunks = [data[i:i + 11] for i in range(0, len(data), 11)]
+    assert b''.join(iterencode(chunks, encoding, wrap)) == expected
+    chunks = [expected[i:i + 13] for i in range(0, len(expected), 13)]
+    assert b''.join(iterdecode(chunks, encoding)) == data
+
+
+@pytest.mark.parametrize('size', range(9))
+def test_encoded_size_partial_quanta(size):
+    for encoding in Encoding:
+        if encoding == Encoding.Z85 and size % 4:
+            with pytest.raises(BasencEncodeError):
+                encode(bytes(size), encoding)
+            continue
+        assert encoded_size(size, encoding, 3) == len(encode(bytes(size), encoding, 3))
+
+
+def test_codec_api_into_buffers():
+    buffer = bytearray(10)
+    assert encode_into(b'test', buffer) == 8
+    assert buffer == b'dGVzdA==\x00\x00'
+    assert decode_into(b'dGVz\ndA==\n', buffer) == 4
+    assert buffer[:4] == b'test'
+    with pytest.raises(ValueError):
+        encode_into(b'test', bytearray(7))
+
+    # Several blocks, written one after the other.
+    data = bytes(range(256)) * 300
+    expected = encode(data, Encoding.BASE32, 76)
+    buffer = bytearray(encoded_size(len(data), Encoding.BASE32, 76))
+    assert encode_into(data, buffer, Encoding.BASE32, 76) == len(expected)
+    assert buffer == expected
+    buffer = bytearray(len(data))
+    assert decode_into(expected, buffer, Encoding.BASE32) == len(data)
+    assert buffer == data
+    with pytest.raises(ValueError):
+        decode_into(expected, bytearray(len(data) - 1), Encoding.BASE32)
+
+    assert list(iterencode([b'te', b'', b'st'], wrap_column=3)) == [b'dGV\nz', b'dA\n==\n']
+    assert list(iterencode([])) == []
+    assert decode(b'dG*Vz', ignore_garbage=True) == b'tes'
+    with pytest.raises(BasencDecodeError):
+        decode(b'dG*Vz')
+    with pytest.raises(BasencDecodeError):
+        list(iterdecode([b'dGVz', b'd']))
+
+
+@pytest.mark.parametrize('data, encoded', [
+    (b'\x86\x4f\xd2\x6f\xb5\x59\xf7\x5b', b'HelloWorld'),
+    (
+            bytes.fromhex('8e0bdd697628b91d8f245587ee95c5b04d48963f79259877b49cd9063aead3b7'),
+            b'JTKVSB%%)wK0E.X)V>+}o?pNmC{O&4W4b!Ni{Lh6'
+    ),
+    (b'\xff\xff\xff\xff\x00\x00\x00\x00', b'%nSc000000'),
+])
+def test_z85_spec_vectors(data, encoded):
+    assert encode(data, Encoding.Z85) == encoded
+    assert decode(encoded, Encoding.Z85) == data
+
+
+def test_z85_words_and_blocks():
+    words = [0, 1, 84, 85, 7224, 7225, 614124, 614125, 52200624, 52200625, 81 * 85 ** 4 - 1, 81 * 85 ** 4, 2 ** 32 - 1]
+    data = b''.join(word.to_bytes(4, 'big') for word in words)
+    data += bytes(range(256)) * 200
+    encoded = encode(data, Encoding.Z85)
+    assert encoded == base64.b85encode(data).translate(bytes.maketrans(
+        b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+-;<=>?@^_`{|}~',
+        b'0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ.-:+=^!/*?&<>()[]{}@%$#'
+    ))
+    assert decode(encoded, Encoding.Z85) == data
+
+
+@pytest.mark.parametrize('input_', [b'%nSc1', b'0000', b'0000"'])
+def test_decode_z85_invalid(input_):
+    with pytest.raises(BasencDecodeError):
+        decode(input_, Encoding.Z85)
+
+
+def test_encode_z85_partial_word():
+    stub = BasencTestStub()
+    stub.input_file = BytesIO(b'test,')
+    with pytest.raises(BasencEncodeError):
+        Basenc(stub)('placeholder', z85=True)
@@ -0,0 +1,78 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
+import pytest
+
+from pygnuutils.basenc import BasencDecodeError, Encoding, encode
+from pygnuutils.basenc_async import decode_stream, encode_stream
+
+
+class StreamWriterStub:
+    def __init__(self):
+        self.stdout = BytesIO()
+        self.drains = 0
+
+    def write(self, data):
+        self.stdout.write(data)
+
+    async def drain(self):
+        self.drains += 1
+
+
+def _stream_reader(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+async def _chunks(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.mark.parametrize('encoding', list(Encoding))
+@pytest.mark.parametrize('wrap', [0, 7, 76])
+def test_stream_round_trip(encoding, wrap):
+    data = bytes(range(256)) * 3 + bytes(4)
+    expected = encode(data, encoding, wrap)
+
+    async def main():
+        writer = StreamWriterStub()
+        await encode_stream(_stream_reader(data), writer, encoding, wrap, block_size=10)
+        assert writer.stdout.getvalue() == expected
+        assert writer.drains > 1
+
+        writer = StreamWriterStub()
+        await encode_stream(_chunks(data, 11), writer, encoding, wrap, block_size=4)
+        assert writer.stdout.getvalue() == expected
+
+        writer = StreamWriterStub()
+        await decode_stream(_chunks(expected, 13), writer, encoding, block_size=6)
+        assert writer.stdout.getvalue() == data
+
+    asyncio.run(main())
+
+
+def test_stream_executors():
+    data = bytes(range(256)) * 40
+    expected = encode(data, wrap_column=76)
+
+    async def main(executor):
+        writer = StreamWriterStub()
+        await encode_stream(_stream_reader(data), writer, wrap_column=76, block_size=1000, executor=executor,
+                            offload_size=500)
+        assert writer.stdout.getvalue() == expected
+
+        writer = StreamWriterStub()
+        await decode_stream(_stream_reader(expected), writer, block_size=1000, executor=executor, offload_size=500)
+        assert writer.stdout.getvalue() == data
+
+        with pytest.raises(BasencDecodeError):
+            await decode_stream(_stream_reader(b'*' + expected), StreamWriterStub(), executor=executor)
+
+    with ThreadPoolExecutor(2) as executor:
+        asyncio.run(main(executor))
+    with ProcessPoolExecutor(2) as executor:
+        asyncio.run(main(executor))
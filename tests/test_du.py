@@ -0,0 +1,74 @@
+import os
+from io import StringIO
+
+import pytest
+
+from pygnuutils.du import Du, DuStub, DuConfig
+
+
+class DuTestStub(DuStub):
+    def __init__(self):
+        self.stdout = StringIO()
+
+    def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+        print(*objects, sep=sep, end=end, flush=flush, file=self.stdout)
+
+
+def _create_tree(tmp_path):
+    for dir_index in range(3):
+        dir_path = tmp_path / f'dir_{dir_index}'
+        dir_path.mkdir()
+        (dir_path / 'data').write_bytes(b'a' * 100 * (dir_index + 1))
+
+
+def _sizes(stub):
+    return {path: int(size) for size, path in (line.split('\t') for line in stub.stdout.getvalue().splitlines())}
+
+
+@pytest.mark.parametrize('jobs', [1, 4])
+def test_apparent_size(tmp_path, jobs):
+    _create_tree(tmp_path)
+    stub = DuTestStub()
+    du = Du(stub)
+    du.run(str(tmp_path), config=DuConfig(apparent_size=True, output_block_size=1, all_files=True, jobs=jobs))
+    sizes = _sizes(stub)
+    dir_size = os.stat(tmp_path / 'dir_0').st_size
+    for dir_index in range(3):
+        assert sizes[str(tmp_path / f'dir_{dir_index}' / 'data')] == 100 * (dir_index + 1)
+        assert sizes[str(tmp_path / f'dir_{dir_index}')] == dir_size + 100 * (dir_index + 1)
+    assert sizes[str(tmp_path)] == os.stat(tmp_path).st_size + 3 * dir_size + 600
+    assert stub.stdout.getvalue().splitlines()[-1].endswith(f'\t{tmp_path}')
+
+
+def test_hard_links_counted_once(tmp_path):
+    (tmp_path / 'data').write_bytes(b'a' * 1000)
+    os.link(tmp_path / 'data', tmp_path / 'link')
+    stub = DuTestStub()
+    du = Du(stub)
+    du(str(tmp_path), bytes_=True)
+    assert _sizes(stub)[str(tmp_path)] == os.stat(tmp_path).st_size + 1000
+    stub.stdout = StringIO()
+    du(str(tmp_path), bytes_=True, count_links=True)
+    assert _sizes(stub)[str(tmp_path)] == os.stat(tmp_path).st_size + 2000
+
+
+def test_summarize_total_and_exclude(tmp_path):
+    _create_tree(tmp_path)
+    stub = DuTestStub()
+    du = Du(stub)
+    du(str(tmp_path / 'dir_0'), str(tmp_path / 'dir_1'), bytes_=True, summarize=True, total=True, exclude=['data'])
+    dir_size = os.stat(tmp_path / 'dir_0').st_size
+    assert stub.stdout.getvalue() == (
+        f'{dir_size}\t{tmp_path / "dir_0"}\n'
+        f'{dir_size}\t{tmp_path / "dir_1"}\n'
+        f'{2 * dir_size}\ttotal\n'
+    )
+
+
+def test_max_depth(tmp_path):
+    _create_tree(tmp_path)
+    (tmp_path / 'dir_0' / 'sub').mkdir()
+    stub = DuTestStub()
+    du = Du(stub)
+    du(str(tmp_path), max_depth=1)
+    assert sorted(_sizes(stub)) == sorted([str(tmp_path)] + [str(tmp_path / f'dir_{i}') for i in range(3)])
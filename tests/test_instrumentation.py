@@ -0,0 +1,55 @@
+from io import StringIO
+
+from pygnuutils.instrumentation import CallStats, InstrumentedStub, Report
+from pygnuutils.ls import Ls, LsConfig, Formats
+from pygnuutils.synthetic import SyntheticLsStub
+
+
+class InstrumentationTestStub(SyntheticLsStub):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.stdout = StringIO()
+
+    def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+        print(*objects, sep=sep, end=end, flush=flush, file=self.stdout)
+
+    def setlocale(self, locale_setting=''):
+        super().setlocale('C.UTF-8')
+
+
+def test_call_stats_histogram():
+    stats = CallStats()
+    for elapsed in (0.0000001, 0.0000015, 0.0000019, 0.001):
+        stats.add(elapsed)
+    assert stats.count == 4
+    assert stats.histogram == {0: 1, 1: 2, 10: 1}
+    assert stats.format_histogram() == '<1us:1 <2us:2 <1024us:1'
+
+
+def test_report_after_run():
+    stub = InstrumentationTestStub(fanout=10, depth=2, dir_ratio=0.3)
+    report = Report()
+    Ls(InstrumentedStub(stub, report), report).run(
+        stub.root, config=LsConfig(format=Formats.MANY_PER_LINE, recursive=True, line_length=80)
+    )
+    directories = stub.stdout.getvalue().count(':\n')
+    assert report.phases['print_dir'].count == directories
+    assert report.phases['print_current_files'].count == directories
+    assert report.phases['calculate_columns'].count == directories
+    assert report.phases['sort_files'].count >= directories
+    assert report.stub_calls['listdir'].count == directories
+    assert report.stub_calls['stat'].count > report.stub_calls['listdir'].count
+    assert report.stub_calls['setlocale'].count == 1
+    for stats in report.stub_calls.values():
+        assert sum(stats.histogram.values()) == stats.count
+    formatted = report.format()
+    assert formatted.startswith('phases:\n')
+    assert '\nstub calls:\n' in formatted
+
+
+def test_no_report():
+    stub = InstrumentationTestStub(fanout=5, depth=1)
+    ls = Ls(stub)
+    ls.run(stub.root, config=LsConfig(format=Formats.ONE_PER_LINE))
+    assert ls.report is None
+    assert len(stub.stdout.getvalue().splitlines()) == 5
@@ -1,11 +1,16 @@
 import datetime
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from getpass import getuser
-from io import StringIO
+from io import BytesIO, StringIO
 
 import pytest
 
-from pygnuutils.ls import Ls, LsStub, LsConfig, Formats
+from pygnuutils.ls import Ls, LsStub, LsConfig, Formats, LsFilter, FileType, IndicatorStyle, TimeStyle, \
+    DereferenceSymlink
 
 
 class LsTestStub(LsStub):
@@ -383,3 +388,380 @@ def test_recursive_dir_short(tmp_path, format_, result):
     ls = Ls(stub)
     ls.run(str(tmp_path), config=LsConfig(format=format_, recursive=True))
     assert stub.stdout.getvalue() == result(tmp_path)
+
+
+def _create_recursive_tree(tmp_path):
+    for dir_index in range(2):
+        dir_path = tmp_path / f'test_dir_{dir_index}'
+        dir_path.mkdir()
+        for sub_dir_index in range(2):
+            sub_dir_path = dir_path / f'test_sub_dir_{sub_dir_index}'
+            sub_dir_path.mkdir()
+            (sub_dir_path / 'hello.txt').write_text('hello')
+
+
+def test_recursive_max_depth(tmp_path):
+    _create_recursive_tree(tmp_path)
+    stub = LsTestStub()
+    ls = Ls(stub)
+    ls.run(str(tmp_path), config=LsConfig(format=Formats.ONE_PER_LINE, recursive=True, max_depth=1))
+    assert stub.stdout.getvalue() == (
+        f'{tmp_path}:\n'
+        'test_dir_0\n'
+        'test_dir_1\n'
+        '\n'
+        f'{tmp_path}/test_dir_0:\n'
+        'test_sub_dir_0\n'
+        'test_sub_dir_1\n'
+        '\n'
+        f'{tmp_path}/test_dir_1:\n'
+        'test_sub_dir_0\n'
+        'test_sub_dir_1\n'
+    )
+
+
+def test_recursive_prune_patterns(tmp_path):
+    _create_recursive_tree(tmp_path)
+    stub = LsTestStub()
+    ls = Ls(stub)
+    ls.run(str(tmp_path), config=LsConfig(format=Formats.ONE_PER_LINE, recursive=True,
+                                          prune_patterns=['test_dir_1', '*_0']))
+    assert stub.stdout.getvalue() == (
+        f'{tmp_path}:\n'
+        'test_dir_0\n'
+        'test_dir_1\n'
+    )
+
+
+def test_recursive_prune_stub_hook(tmp_path):
+    _create_recursive_tree(tmp_path)
+    pruned = str(tmp_path / 'test_dir_0')
+
+    class PruneStub(LsTestStub):
+        def __init__(self):
+            super().__init__()
+            self.listed = []
+
+        def listdir(self, path='.'):
+            self.listed.append(path)
+            return super().listdir(path)
+
+        def prune(self, path, depth):
+            return path == pruned
+
+    stub = PruneStub()
+    ls = Ls(stub)
+    ls.run(str(tmp_path), config=LsConfig(format=Formats.ONE_PER_LINE, recursive=True))
+    assert not [path for path in stub.listed if path.startswith(pruned)]
+    assert f'{tmp_path}/test_dir_1/test_sub_dir_1:\nhello.txt\n' in stub.stdout.getvalue()
+
+
+def test_filter_size(tmp_path):
+    (tmp_path / 'big.txt').write_text('a' * 100000)
+    (tmp_path / 'small.txt').write_text('hello')
+    stub = LsTestStub()
+    ls = Ls(stub)
+    ls.run(str(tmp_path), config=LsConfig(format=Formats.LONG_FORMAT, file_filter=LsFilter(max_size=10)))
+    output = stub.stdout.getvalue().splitlines()
+    assert output[0] == f'total {stub.st_nblocks((tmp_path / "small.txt").stat()) * stub.st_nblocksize // 512}'
+    assert len(output) == 2
+    assert re.match(fr'-\S+ 1 {getuser()} \w* 5 .* small.txt', output[1])
+
+
+def test_filter_name_and_time(tmp_path):
+    for name in ('a.txt', 'b.txt', 'c.log'):
+        (tmp_path / name).write_text('hello')
+    stub = LsTestStub()
+    ls = Ls(stub)
+    config = LsConfig(format=Formats.ONE_PER_LINE, file_filter=LsFilter(name_regex=r'\.txt$', newer_than=0))
+    ls.run(str(tmp_path), config=config)
+    assert stub.stdout.getvalue() == 'a.txt\nb.txt\n'
+    stub.stdout = StringIO()
+    config.file_filter.name_regex = r'\.log$'
+    ls.run(str(tmp_path), config=config)
+    assert stub.stdout.getvalue() == 'c.log\n'
+    stub.stdout = StringIO()
+    config.file_filter.name_regex = None
+    ls.run(str(tmp_path), config=config)
+    assert stub.stdout.getvalue() == 'a.txt\nb.txt\nc.log\n'
+    stub.stdout = StringIO()
+    config = LsConfig(format=Formats.ONE_PER_LINE, file_filter=LsFilter(older_than=0))
+    ls.run(str(tmp_path), config=config)
+    assert stub.stdout.getvalue() == ''
+
+
+def test_filter_type_recursive(tmp_path):
+    _create_recursive_tree(tmp_path)
+    stub = LsTestStub()
+    ls = Ls(stub)
+    config = LsConfig(format=Formats.ONE_PER_LINE, recursive=True, file_filter=LsFilter(file_types={FileType.NORMAL}))
+    ls.run(str(tmp_path / 'test_dir_0'), config=config)
+    assert stub.stdout.getvalue() == (
+        f'{tmp_path}/test_dir_0:\n'
+        '\n'
+        f'{tmp_path}/test_dir_0/test_sub_dir_0:\n'
+        'hello.txt\n'
+        '\n'
+        f'{tmp_path}/test_dir_0/test_sub_dir_1:\n'
+        'hello.txt\n'
+    )
+
+
+def test_summary_recursive(tmp_path):
+    class RetainedFilesLs(Ls):
+        def __init__(self, stub):
+            super().__init__(stub)
+            # Shared with the per-run copies.
+            self.retained = []
+
+        def _print_current_files(self):
+            self.retained.extend(self.files)
+            super()._print_current_files()
+
+    _create_recursive_tree(tmp_path)
+    (tmp_path / 'test_dir_0' / 'notes.md').write_text('notes')
+    stub = LsTestStub()
+    ls = RetainedFilesLs(stub)
+    ls.run(str(tmp_path / 'test_dir_0'), config=LsConfig(recursive=True, summary=True))
+    sections = stub.stdout.getvalue().split('\n\n')
+    assert len(sections) == 4
+    assert sections[0].splitlines()[0] == f'{tmp_path}/test_dir_0:'
+    assert sections[0].splitlines()[1].startswith('total: 3 entries, ')
+    assert sections[0].splitlines()[5].startswith('extension md: 1 entries, size 5, ')
+    grand_total = sections[-1].splitlines()
+    assert grand_total[0] == 'grand total:'
+    assert grand_total[1].startswith('total: 5 entries, ')
+    assert grand_total[2].startswith('type directory: 2 entries, ')
+    assert grand_total[3].startswith('type normal: 3 entries, size 15, ')
+    assert grand_total[4].startswith('extension (none): 2 entries, ')
+    assert grand_total[5].startswith('extension md: 1 entries, size 5, ')
+    assert grand_total[6].startswith('extension txt: 2 entries, size 10, ')
+    # Only the directories about to be traversed are kept, not an entry per file.
+    assert ls.retained
+    assert all(file_info.is_directory() for file_info in ls.retained)
+
+
+def test_long_format_fields(tmp_path):
+    script = tmp_path / 'run.sh'
+    script.write_text('hello')
+    script.chmod(0o755)
+    (tmp_path / 'link').symlink_to('run.sh')
+    stub = LsTestStub()
+    ls = Ls(stub)
+    ls.run(str(tmp_path), config=LsConfig(format=Formats.LONG_FORMAT, print_inode=True, numeric_ids=True,
+                                          print_group=False, indicator_style=IndicatorStyle.CLASSIFY))
+    output = stub.stdout.getvalue().splitlines()
+    link_stat = (tmp_path / 'link').lstat()
+    script_stat = script.stat()
+    inode_width = max(len(str(link_stat.st_ino)), len(str(script_stat.st_ino)))
+    uid = str(script_stat.st_uid)
+    assert re.fullmatch(
+        fr'{link_stat.st_ino:>{inode_width}} lrwxrwxrwx 1 {uid} 6 .{{12}} link -> run.sh\*', output[1]
+    )
+    assert re.fullmatch(fr'{script_stat.st_ino:>{inode_width}} -rwxr-xr-x 1 {uid} 5 .{{12}} run.sh\*', output[2])
+
+
+def test_long_time_formatting(tmp_path):
+    class NowCountingStub(LsTestStub):
+        def __init__(self):
+            super().__init__()
+            self.now_calls = 0
+
+        def now(self):
+            self.now_calls += 1
+            return datetime.datetime(2024, 6, 1, 12, 0)
+
+    timestamps = {
+        'a': datetime.datetime(2024, 5, 31, 10, 15, 1),
+        'b': datetime.datetime(2024, 5, 31, 10, 15, 59),
+        'c': datetime.datetime(2023, 5, 31, 10, 15, 1),
+    }
+    for name, timestamp in timestamps.items():
+        (tmp_path / name).write_text('')
+        mtime_ns = int(timestamp.timestamp()) * 1000000000 + 123456789
+        os.utime(tmp_path / name, ns=(mtime_ns, mtime_ns))
+    (tmp_path / 'missing').symlink_to('nowhere')
+    stub = NowCountingStub()
+    ls = Ls(stub)
+    ls.run(str(tmp_path), config=LsConfig(format=Formats.LONG_FORMAT, dereference=DereferenceSymlink.ALWAYS))
+    output = stub.stdout.getvalue().splitlines()
+    assert stub.now_calls == 1
+    assert output[0].startswith('ls: cannot access ')
+    assert output[2].endswith(' May 31 10:15 a')
+    assert output[3].endswith(' May 31 10:15 b')
+    assert output[4].endswith(' May 31  2023 c')
+    assert output[5].endswith(' ' + '?'.rjust(len('Jun  1 12:00')) + ' missing')
+
+    stub = NowCountingStub()
+    config = LsConfig(format=Formats.LONG_FORMAT)
+    LsConfig.load_time_style(config, TimeStyle.FULL_ISO)
+    Ls(stub).run(str(tmp_path / 'a'), config=config)
+    assert stub.stdout.getvalue().endswith(' 2024-05-31 10:15:01.123456  ' + str(tmp_path / 'a') + '\n')
+
+    class SecondsStatStub(NowCountingStub):
+        def stat(self, path, dir_fd=None, follow_symlinks=True):
+            # Whole second times and no `_ns` ones, like the stat results built by archive stubs.
+            stat = super().stat(path, dir_fd=dir_fd, follow_symlinks=follow_symlinks)
+            return os.stat_result(tuple(stat), {name: getattr(stat, name) for name in ('st_blocks', 'st_blksize', 'st_rdev')})
+
+    stub = SecondsStatStub()
+    Ls(stub).run(str(tmp_path / 'a'), config=config)
+    assert stub.stdout.getvalue().endswith(' 2024-05-31 10:15:01.000000  ' + str(tmp_path / 'a') + '\n')
+
+
+def test_locale_set_once(tmp_path):
+    class SetlocaleCountingStub(LsTestStub):
+        def __init__(self):
+            super().__init__()
+            self.setlocale_calls = 0
+
+        def setlocale(self, locale_setting=''):
+            self.setlocale_calls += 1
+            super().setlocale(locale_setting)
+
+    for name in ('b', 'B', 'a', '_'):
+        (tmp_path / name).write_text('')
+    stub = SetlocaleCountingStub()
+    ls = Ls(stub)
+    for _ in range(3):
+        ls.run(str(tmp_path), config=LsConfig(format=Formats.ONE_PER_LINE))
+    assert stub.setlocale_calls == 1
+    assert ls.collation_key is None
+    assert stub.stdout.getvalue().splitlines()[:4] == ['B', '_', 'a', 'b']
+
+    stub = SetlocaleCountingStub()
+    Ls(stub).run(str(tmp_path), config=LsConfig(format=Formats.ONE_PER_LINE, locale_setting=None))
+    assert stub.setlocale_calls == 0
+
+
+def test_shared_instance_concurrent_runs(tmp_path):
+    class ThreadLocalOutputStub(LsTestStub):
+        def __init__(self):
+            super().__init__()
+            self.local = threading.local()
+
+        def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+            print(*objects, sep=sep, end=end, flush=flush, file=self.local.stdout)
+
+    _create_recursive_tree(tmp_path)
+    configs = [
+        lambda: LsConfig(format=Formats.LONG_FORMAT, recursive=True),
+        lambda: LsConfig(format=Formats.ONE_PER_LINE, recursive=True, sort_reverse=True),
+        lambda: LsConfig(format=Formats.MANY_PER_LINE, line_length=40, print_inode=True),
+        lambda: LsConfig(format=Formats.WITH_COMMAS, recursive=True, max_depth=1),
+        lambda: LsConfig(format=Formats.ONE_PER_LINE, recursive=True, summary=True),
+    ]
+    stub = ThreadLocalOutputStub()
+    ls = Ls(stub)
+
+    def run(config_index):
+        stub.local.stdout = StringIO()
+        config = configs[config_index]()
+        ls.run(str(tmp_path), config=config)
+        assert config.dereference == DereferenceSymlink.UNDEFINED
+        return stub.local.stdout.getvalue()
+
+    expected = [run(i) for i in range(len(configs))]
+    with ThreadPoolExecutor(16) as executor:
+        indices = [i % len(configs) for i in range(400)]
+        for config_index, output in zip(indices, executor.map(run, indices)):
+            assert output == expected[config_index]
+
+
+def test_run_snapshot_under_locale_lock(tmp_path):
+    class LockCheckingLs(Ls):
+        copies = 0
+
+        def __copy__(self):
+            # The collation of the run is copied while no other run can apply its locale.
+            assert self.locale_lock.locked()
+            LockCheckingLs.copies += 1
+            context = object.__new__(type(self))
+            context.__dict__.update(self.__dict__)
+            return context
+
+    _create_recursive_tree(tmp_path)
+    ls = LockCheckingLs(LsTestStub())
+    shared_config = ls.config
+    ls.run(str(tmp_path), config=LsConfig(format=Formats.ONE_PER_LINE, sort_reverse=True))
+    assert LockCheckingLs.copies == 1
+    # Runs never write their config to the shared instance.
+    assert ls.config is shared_config
+    assert ls.config == LsConfig()
+
+
+def test_concurrent_runs_with_different_locales(tmp_path):
+    class FakeLocaleStub(LsTestStub):
+        """ Keep a fake process wide locale, and count the listings made while another locale is applied. """
+
+        def __init__(self):
+            super().__init__()
+            self.local = threading.local()
+            self.current_locale = None
+            self.mismatches = 0
+
+        def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+            print(*objects, sep=sep, end=end, flush=flush, file=self.local.stdout)
+
+        def setlocale(self, locale_setting=''):
+            self.current_locale = locale_setting
+
+        def get_collation_locale(self):
+            return self.current_locale
+
+        def listdir(self, path='.'):
+            time.sleep(0.001)
+            if self.current_locale != self.local.locale_setting:
+                self.mismatches += 1
+            return super().listdir(path)
+
+    _create_recursive_tree(tmp_path)
+    stub = FakeLocaleStub()
+    ls = Ls(stub)
+
+    def run(locale_setting):
+        stub.local.stdout = StringIO()
+        stub.local.locale_setting = locale_setting
+        ls.run(str(tmp_path), config=LsConfig(format=Formats.ONE_PER_LINE, recursive=True,
+                                              locale_setting=locale_setting))
+        return stub.local.stdout.getvalue()
+
+    with ThreadPoolExecutor(8) as executor:
+        outputs = list(executor.map(run, ['C', 'POSIX'] * 20))
+    assert stub.mismatches == 0
+    assert len(set(outputs)) == 1
+    assert ls.active_runs == 0
+
+
+def test_bytes_paths(tmp_path):
+    class BytesOutputStub(LsTestStub):
+        def __init__(self):
+            super().__init__()
+            self.buffer = BytesIO()
+
+        def write(self, data):
+            self.buffer.write(data)
+
+    root = os.fsencode(tmp_path)
+    os.mkdir(os.path.join(root, b'caf\xe9'))
+    with open(os.path.join(root, b'caf\xe9', b'\xff.txt'), 'wb') as fd:
+        fd.write(b'hello')
+    os.symlink(b'caf\xe9', os.path.join(root, b'link'))
+    with open(os.path.join(root, b'.hidden'), 'wb'):
+        pass
+
+    stub = BytesOutputStub()
+    Ls(stub).run(root, config=LsConfig(format=Formats.ONE_PER_LINE, recursive=True, ignore_patterns=['*.txt']))
+    assert stub.stdout.getvalue() == ''
+    assert stub.buffer.getvalue() == root + b':\ncaf\xe9\nlink\n\n' + root + b'/caf\xe9:\n'
+
+    stub = BytesOutputStub()
+    Ls(stub).run(root, config=LsConfig(format=Formats.LONG_FORMAT, indicator_style=IndicatorStyle.CLASSIFY))
+    output = stub.buffer.getvalue().splitlines()
+    assert output[0].startswith(b'total ')
+    assert re.fullmatch(rb'drwx.* caf\xe9/', output[1])
+    assert re.fullmatch(rb'lrwx.* link -> caf\xe9/', output[2])
+
+    stub = BytesOutputStub()
+    Ls(stub).run(os.path.join(root, b'caf\xe9'), config=LsConfig(format=Formats.WITH_COMMAS, line_length=80))
+    assert stub.buffer.getvalue() == b'\xff.txt\n'
@@ -0,0 +1,111 @@
+import os
+import re
+from io import StringIO
+
+import pytest
+from click.testing import CliRunner
+
+from pygnuutils.cli.ls import ls as ls_command
+from pygnuutils.ls import Ls, LsStub, LsConfig, Formats
+from pygnuutils.ls_colors import LsColors
+
+ESCAPE = re.compile('\033\\[[0-9;]*m')
+
+
+class LsColorsTestStub(LsStub):
+    def __init__(self):
+        self.stdout = StringIO()
+
+    def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+        print(*objects, sep=sep, end=end, flush=flush, file=self.stdout)
+
+    def setlocale(self, locale_setting=''):
+        super().setlocale('C.UTF-8')
+
+
+def test_parse():
+    colors = LsColors.parse('di=01;34:ln=target:*.gz=31:ec=\\e[0m:lc=^[[:')
+    assert colors.indicators['di'] == '01;34'
+    assert colors.indicators['ec'] == '\033[0m'
+    assert colors.indicators['lc'] == '\033['
+    assert colors.link_as_target
+    assert colors.suffix_color('a.gz') == '31'
+    assert colors.suffix_color('a.bz') is None
+    assert colors.suffix_color('gz') is None
+    assert not colors.is_colored('fi')
+    assert colors.sequence('31') == '\033[31m'
+    assert colors.end_sequence == '\033[0m'
+
+
+@pytest.mark.parametrize('ls_colors', ['xx=31', 'di', 'di=\\', '*.gz=^1'])
+def test_parse_invalid(ls_colors):
+    with pytest.raises(ValueError):
+        LsColors.parse(ls_colors)
+
+
+def test_suffix_precedence():
+    assert LsColors.parse('*.gz=31:*.tar.gz=32').suffix_color('b.tar.gz') == '32'
+    assert LsColors.parse('*.tar.gz=32:*.gz=31').suffix_color('b.tar.gz') == '31'
+    assert LsColors.parse('*.tar.gz=32:*.gz=31').suffix_color('b.zip.gz') == '31'
+
+
+def _create_tree(tmp_path):
+    (tmp_path / 'dir').mkdir()
+    (tmp_path / 'plain').write_text('plain')
+    (tmp_path / 'run.sh').write_text('#!/bin/sh')
+    (tmp_path / 'run.sh').chmod(0o755)
+    (tmp_path / 'archive.gz').write_text('gz')
+    os.symlink('missing', tmp_path / 'broken')
+
+
+def test_colored_listing(tmp_path):
+    _create_tree(tmp_path)
+    stub = LsColorsTestStub()
+    colors = LsColors.parse('or=01;31:*.gz=31')
+    Ls(stub).run(str(tmp_path), config=LsConfig(format=Formats.ONE_PER_LINE, colors=colors))
+    assert stub.stdout.getvalue().splitlines() == [
+        '\033[0m\033[31marchive.gz\033[0m',
+        '\033[01;31mbroken\033[0m',
+        '\033[01;34mdir\033[0m',
+        'plain',
+        '\033[01;32mrun.sh\033[0m',
+    ]
+
+
+def test_colored_long_link_target(tmp_path):
+    _create_tree(tmp_path)
+    os.symlink('dir', tmp_path / 'link')
+    stub = LsColorsTestStub()
+    colors = LsColors.parse('ln=target:mi=05')
+    Ls(stub).run(str(tmp_path), config=LsConfig(format=Formats.LONG_FORMAT, colors=colors))
+    output = stub.stdout.getvalue().splitlines()
+    assert output[2].endswith(' broken -> \033[0m\033[05mmissing\033[0m')
+    assert output[4].endswith(' \033[01;34mlink\033[0m -> \033[01;34mdir\033[0m')
+
+
+def test_colored_columns_width(tmp_path):
+    _create_tree(tmp_path)
+    outputs = []
+    for colors in (None, LsColors()):
+        stub = LsColorsTestStub()
+        config = LsConfig(format=Formats.MANY_PER_LINE, line_length=30, tabsize=0, colors=colors)
+        Ls(stub).run(str(tmp_path), config=config)
+        outputs.append(stub.stdout.getvalue())
+    assert outputs[0] != outputs[1]
+    assert outputs[0] == ESCAPE.sub('', outputs[1])
+
+
+def test_cli_color_option(tmp_path, monkeypatch):
+    monkeypatch.delenv('LS_COLORS', raising=False)
+    (tmp_path / 'dir').mkdir()
+    runner = CliRunner()
+    # A bare --color doesn't take the next argument as its value.
+    result = runner.invoke(ls_command, ['--color', str(tmp_path)])
+    assert result.exit_code == 0
+    assert result.output == '\033[0m\033[01;34mdir\033[0m\n'
+    result = runner.invoke(ls_command, ['--color=never', str(tmp_path)])
+    assert result.exit_code == 0
+    assert result.output == 'dir\n'
+    result = runner.invoke(ls_command, ['--color=sometimes', str(tmp_path)])
+    assert result.exit_code == 2
+    assert "Invalid value for '--color'" in result.output
@@ -0,0 +1,102 @@
+import os
+import random
+from io import BytesIO, StringIO
+
+import pytest
+
+from pygnuutils.ls import Ls, LsStub, LsConfig, Formats, IgnoreMode
+from pygnuutils.ls_index import IndexRecord, IndexWriter, diff_records, read_records, write_records
+
+
+class LsIndexTestStub(LsStub):
+    def __init__(self):
+        self.stdout = StringIO()
+
+    def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+        print(*objects, sep=sep, end=end, flush=flush, file=self.stdout)
+
+    def setlocale(self, locale_setting=''):
+        super().setlocale('C.UTF-8')
+
+
+def _record(path, size=0):
+    return IndexRecord(path, size, 0, 0o100644, 1)
+
+
+def test_records_round_trip():
+    records = [_record(b'a'), _record(b'a/b', 5), _record(b'a/bc'), _record(b'b\xff/c')]
+    buffer = BytesIO()
+    write_records(buffer, records)
+    buffer.seek(0)
+    assert list(read_records(buffer)) == records
+    with pytest.raises(ValueError):
+        list(read_records(BytesIO(b'not an index')))
+    with pytest.raises(ValueError):
+        list(read_records(BytesIO(buffer.getvalue()[:-1])))
+
+
+def test_writer_spills_sorted_runs():
+    paths = [f'dir{i % 7}/file{i}'.encode() for i in range(1000)]
+    random.Random(0).shuffle(paths)
+    writer = IndexWriter(run_size=64)
+    for path in paths:
+        writer.add(path, os.stat_result((0o100644, 1, 0, 1, 0, 0, len(path), 0, 0, 0), {'st_mtime_ns': 0}))
+    assert len(writer.runs) == 1000 // 64
+    assert len(writer.buffer) < 64
+    assert [record.path for record in writer.records()] == sorted(paths)
+    assert [record.path for record in writer.records()] == sorted(paths)
+    writer.close()
+
+
+def test_diff_records():
+    old = [_record(b'a'), _record(b'b', 1), _record(b'c')]
+    new = [_record(b'b', 2), _record(b'c'), _record(b'd')]
+    assert [(status, record.path) for status, record in diff_records(old, new)] == [
+        ('D', b'a'), ('M', b'b'), ('A', b'd')
+    ]
+
+
+def test_ls_diff_index(tmp_path):
+    (tmp_path / 'dir').mkdir()
+    (tmp_path / 'dir' / 'kept').write_text('kept')
+    (tmp_path / 'dir' / 'changed').write_text('old')
+    (tmp_path / 'removed').write_text('removed')
+    index = str(tmp_path / 'index')
+    root = str(tmp_path / 'dir')
+
+    stub = LsIndexTestStub()
+    Ls(stub).run(root, str(tmp_path / 'removed'), config=LsConfig(format=Formats.ONE_PER_LINE, recursive=True,
+                                                                  write_index=index))
+    assert stub.stdout.getvalue().endswith(f'{root}:\nchanged\nkept\n')
+
+    (tmp_path / 'dir' / 'changed').write_text('new content')
+    (tmp_path / 'dir' / 'added').write_text('added')
+    (tmp_path / 'removed').unlink()
+    stub = LsIndexTestStub()
+    Ls(stub).run(root, config=LsConfig(format=Formats.ONE_PER_LINE, recursive=True, diff_index=index))
+    assert stub.stdout.getvalue().splitlines() == [
+        f'M {root}', f'A {root}/added', f'M {root}/changed', f'D {tmp_path}/removed'
+    ]
+
+    stub = LsIndexTestStub()
+    Ls(stub).run(root, config=LsConfig(format=Formats.ONE_PER_LINE, diff_index=str(tmp_path / 'missing')))
+    assert stub.stdout.getvalue() == f'ls: cannot use index \'{tmp_path}/missing\': No such file or directory\n'
+
+
+def test_ls_diff_index_all(tmp_path):
+    (tmp_path / 'dir' / 'sub').mkdir(parents=True)
+    (tmp_path / 'dir' / 'sub' / 'file').write_text('file')
+    index = str(tmp_path / 'index')
+    root = str(tmp_path / 'dir')
+    config = LsConfig(format=Formats.ONE_PER_LINE, recursive=True, ignore_mode=IgnoreMode.MINIMAL, write_index=index)
+    Ls(LsIndexTestStub()).run(root, config=config)
+    with open(index, 'rb') as index_file:
+        paths = [record.path for record in read_records(index_file)]
+    assert paths == [os.fsencode(path) for path in (root, f'{root}/sub', f'{root}/sub/file')]
+
+    # A sibling of the listed directory changes the mtime of its parent, which is not part of the index.
+    (tmp_path / 'sibling').write_text('sibling')
+    stub = LsIndexTestStub()
+    Ls(stub).run(root, config=LsConfig(format=Formats.ONE_PER_LINE, recursive=True, ignore_mode=IgnoreMode.MINIMAL,
+                                       diff_index=index))
+    assert stub.stdout.getvalue() == ''
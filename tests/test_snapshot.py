@@ -0,0 +1,97 @@
+import os
+from io import BytesIO, StringIO
+
+import pytest
+
+from pygnuutils.ls import Ls, LsStub, LsConfig, Formats
+from pygnuutils.snapshot import RecordingLsStub, ReplayLsStub
+
+
+class LsTestStub(LsStub):
+    def __init__(self):
+        self.stdout = StringIO()
+
+    def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+        print(*objects, sep=sep, end=end, flush=flush, file=self.stdout)
+
+    def setlocale(self, locale_setting=''):
+        super(LsTestStub, self).setlocale('C.UTF-8')
+
+
+class ReplayTestStub(ReplayLsStub):
+    def __init__(self, path):
+        super().__init__(path)
+        self.stdout = StringIO()
+
+    def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+        print(*objects, sep=sep, end=end, flush=flush, file=self.stdout)
+
+    def setlocale(self, locale_setting=''):
+        super().setlocale('C.UTF-8')
+
+
+def test_record_and_replay(tmp_path):
+    tree = tmp_path / 'tree'
+    for dir_index in range(3):
+        dir_path = tree / f'dir_{dir_index}'
+        dir_path.mkdir(parents=True)
+        for i in range(dir_index + 1):
+            (dir_path / f'file_{i}.txt').write_text('a' * i)
+    os.symlink('dir_0/file_0.txt', tree / 'link')
+    config = LsConfig(format=Formats.LONG_FORMAT, recursive=True)
+    recording_stub = RecordingLsStub(LsTestStub())
+    Ls(recording_stub).run(str(tree), config=config)
+    recording_stub.save(tmp_path / 'tree.snapshot')
+
+    with ReplayTestStub(tmp_path / 'tree.snapshot') as replay_stub:
+        Ls(replay_stub).run(str(tree), config=LsConfig(format=Formats.LONG_FORMAT, recursive=True))
+        assert replay_stub.stdout.getvalue() == recording_stub.stdout.getvalue()
+        assert replay_stub.readlink(str(tree / 'link')) == 'dir_0/file_0.txt'
+        with pytest.raises(FileNotFoundError):
+            replay_stub.listdir(str(tmp_path))
+
+
+def test_replay_recorded_error(tmp_path):
+    recording_stub = RecordingLsStub()
+    with pytest.raises(FileNotFoundError):
+        recording_stub.stat(str(tmp_path / 'missing'))
+    recording_stub.save(tmp_path / 'errors.snapshot')
+    with ReplayLsStub(tmp_path / 'errors.snapshot') as replay_stub:
+        with pytest.raises(FileNotFoundError) as e:
+            replay_stub.stat(str(tmp_path / 'missing'))
+        assert e.value.strerror == os.strerror(e.value.errno)
+
+
+def test_replay_bytes_paths(tmp_path):
+    class BytesRecordingStub(LsTestStub):
+        def __init__(self):
+            super().__init__()
+            self.buffer = BytesIO()
+
+        def write(self, data):
+            self.buffer.write(data)
+
+    class BytesReplayStub(ReplayTestStub):
+        def __init__(self, path):
+            super().__init__(path)
+            self.buffer = BytesIO()
+
+        def write(self, data):
+            self.buffer.write(data)
+
+    root = os.fsencode(tmp_path / 'tree')
+    os.makedirs(os.path.join(root, b'caf\xe9'))
+    with open(os.path.join(root, b'caf\xe9', b'\xff.txt'), 'wb'):
+        pass
+    os.symlink(b'caf\xe9', os.path.join(root, b'link'))
+    recording_stub = RecordingLsStub(BytesRecordingStub())
+    Ls(recording_stub).run(root, config=LsConfig(format=Formats.LONG_FORMAT, recursive=True))
+    recording_stub.save(tmp_path / 'tree.snapshot')
+
+    with BytesReplayStub(tmp_path / 'tree.snapshot') as replay_stub:
+        Ls(replay_stub).run(root, config=LsConfig(format=Formats.LONG_FORMAT, recursive=True))
+        assert replay_stub.buffer.getvalue() == recording_stub.stub.buffer.getvalue()
+        assert b'\xff.txt' in replay_stub.buffer.getvalue()
+        assert sorted(replay_stub.listdir(root)) == [b'caf\xe9', b'link']
+        assert replay_stub.readlink(os.path.join(root, b'link')) == b'caf\xe9'
+        assert replay_stub.readlink(os.path.join(os.fsdecode(root), 'link')) == os.fsdecode(b'caf\xe9')
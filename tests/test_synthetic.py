@@ -0,0 +1,51 @@
+from io import StringIO
+from stat import S_ISDIR, S_ISLNK
+
+from pygnuutils.ls import Ls, LsConfig, Formats
+from pygnuutils.synthetic import SyntheticLsStub
+
+
+class SyntheticTestStub(SyntheticLsStub):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.stdout = StringIO()
+
+    def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
+        print(*objects, sep=sep, end=end, flush=flush, file=self.stdout)
+
+    def setlocale(self, locale_setting=''):
+        super().setlocale('C.UTF-8')
+
+
+def _walk(stub, path):
+    for name in stub.listdir(path):
+        entry = stub.join(path, name)
+        yield entry
+        if S_ISDIR(stub.stat(entry, follow_symlinks=False).st_mode):
+            yield from _walk(stub, entry)
+
+
+def test_deterministic_listing():
+    outputs = []
+    for _ in range(2):
+        stub = SyntheticTestStub(fanout=20, depth=3, uid_count=5)
+        Ls(stub).run(stub.root, config=LsConfig(format=Formats.LONG_FORMAT, recursive=True))
+        outputs.append(stub.stdout.getvalue())
+    assert outputs[0] == outputs[1]
+    assert outputs[0].startswith('/synthetic:\ntotal ')
+
+
+def test_tree_shape():
+    stub = SyntheticLsStub(fanout=10, depth=3, dir_ratio=0.5, symlink_ratio=0.2, name_lengths=(6,), uid_count=4)
+    entries = list(_walk(stub, stub.root))
+    assert len(set(entries)) == len(entries)
+    assert max(entry.count('/') for entry in entries) == 4
+    stats = [stub.stat(entry, follow_symlinks=False) for entry in entries]
+    assert {stat.st_uid for stat in stats} == {1000, 1001, 1002, 1003}
+    links = [entry for entry, stat in zip(entries, stats) if S_ISLNK(stat.st_mode)]
+    assert links
+    for link in links:
+        assert stub.readlink(link) in stub.listdir(stub.dirname(link))
+    for name in stub.listdir(stub.root):
+        assert len(name) == 7
+    assert SyntheticLsStub(seed=1).listdir('/synthetic') != stub.listdir('/synthetic')